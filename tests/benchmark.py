@@ -0,0 +1,306 @@
+import argparse
+import gc
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+from text_label.exporters.text_directory import TextDirectoryExporter
+from text_label.gui import GuiUpdateQueue
+from text_label.project import Project
+from text_label.statechart import Statechart
+
+
+SIZES = {'1k': 1_000, '100k': 100_000, '500k': 500_000, '1m': 1_000_000}
+NUM_CATEGORIES = 10
+# сколько одиночных операций делает бенчмарк на проекте любого размера
+NUM_OPERATIONS = 1_000
+# допустимое ухудшение относительно baseline, плюс абсолютный запас на шум коротких замеров
+DEFAULT_THRESHOLD = 0.25
+MIN_SECONDS_SLACK = 0.005
+MIN_PEAK_KB_SLACK = 64
+PATH_TO_BASELINES = pathlib.Path(__file__).parent / 'benchmark_baselines.json'
+# один поисковый запрос, как его набирает пользователь: ответ нужен не дольше бюджета на проектах до LATENCY_MAX_SIZE текстов,
+# независимо от baseline
+SEARCH_QUERIES = {'search_word': ('synthetic ', False), 'search_prefix': ('synth', False),
+                  'search_words_prefix': ('number 4999', False), 'search_unlabelled': ('synthetic ', True)}
+LATENCY_BUDGETS = {name: 0.05 for name in SEARCH_QUERIES}
+LATENCY_MAX_SIZE = 500_000
+
+# бенчмарк получает размер проекта и временный каталог, готовит всё, что не надо мерить, и возвращает замеряемую функцию
+Benchmark = Callable[[int, pathlib.Path], Callable[[], None]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+_raw_data_cache: dict[int, list] = {}
+
+
+def benchmark(name: str):
+    def register(func: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def make_project(size: int, history_depth: Optional[int] = None) -> Project:
+    if size not in _raw_data_cache:
+        # треть текстов без категории, как в недоразмеченном проекте
+        _raw_data_cache[size] = [[f'synthetic text number {text_id} about topic {text_id % 997}',
+                                  text_id % NUM_CATEGORIES if text_id % 3 else None] for text_id in range(size)]
+    categories = {category_id: f'category{category_id}' for category_id in range(NUM_CATEGORIES)}
+    if history_depth is None:
+        return Project(categories=categories, data=_raw_data_cache[size])
+    return Project(categories=categories, data=_raw_data_cache[size], history_depth=history_depth)
+
+
+@benchmark('add_text')
+def bench_add_text(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    project = make_project(size)
+
+    def run():
+        for text_id in range(NUM_OPERATIONS):
+            project.add_text(f'added text {text_id}')
+    return run
+
+
+@benchmark('mark_text')
+def bench_mark_text(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    project = make_project(size)
+    step = max(1, size // NUM_OPERATIONS)
+
+    def run():
+        for text_id in range(0, size, step):
+            project.mark_text(text_id, (text_id + 1) % NUM_CATEGORIES)
+    return run
+
+
+@benchmark('mark_texts')
+def bench_mark_texts(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    # одна пачка на 1% проекта и её отмена
+    project = make_project(size)
+    text_ids = list(range(0, size, 100))
+
+    def run():
+        project.mark_texts(text_ids, 0)
+        project.undo()
+    return run
+
+
+@benchmark('undo')
+def bench_undo(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    project = make_project(size)
+    step = max(1, size // NUM_OPERATIONS)
+    for text_id in range(0, size, step):
+        project.mark_text(text_id, (text_id + 1) % NUM_CATEGORIES)
+
+    def run():
+        while project.undo() is not None:
+            pass
+    return run
+
+
+@benchmark('save_project')
+def bench_save_project(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    project = make_project(size)
+    return lambda: project.save_project(path_to_dir / 'project.json.tl')
+
+
+@benchmark('load_project_from_path')
+def bench_load_project_from_path(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    make_project(size).save_project(path_to_dir / 'project.json.tl')
+    return lambda: Project.load_project_from_path(path_to_dir / 'project.json.tl')
+
+
+@benchmark('load_blob_project')
+def bench_load_blob_project(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    # тела текстов остаются в файле, открытие читает только индекс
+    make_project(size).save_project(path_to_dir / 'project.blob.tl')
+    return lambda: Project.load_project_from_path(path_to_dir / 'project.blob.tl').close()
+
+
+@benchmark('get_texts')
+def bench_get_texts(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    project = make_project(size)
+
+    def run():
+        for category_id in range(NUM_CATEGORIES):
+            project.get_texts(category_id)
+    return run
+
+
+@benchmark('get_name')
+def bench_get_name(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    project = make_project(size)
+    return project.get_name
+
+
+@benchmark('duplicate_index_query')
+def bench_duplicate_index_query(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    # проверка при добавлении одного текста: есть ли копия и где она
+    project = make_project(size)
+    project.get_duplicate_index()
+    step = max(1, size // NUM_OPERATIONS)
+    texts = [project.data[text_id].text for text_id in range(0, size, step)]
+
+    def run():
+        for text in texts:
+            project.find_text_ids(text)
+    return run
+
+
+@benchmark('search_texts')
+def bench_search_texts(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    # целые слова, пересечение и набираемое последнее слово; индекс строится один раз, до замера
+    project = make_project(size)
+    project.get_search_index()
+    queries = [f'topic {topic}' for topic in range(0, 997, 100)] + ['number 12', 'about topic 99', 'synth', 'topic 12 numb']
+
+    def run():
+        for query in queries:
+            project.search_texts(query, limit=Statechart.MAX_SEARCH_RESULTS)
+    return run
+
+
+def make_search_query_benchmark(query: str, only_unlabelled: bool) -> Benchmark:
+    def bench_search_query(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+        project = make_project(size)
+        # индекс и словарь для префиксов строятся один раз, до замера
+        project.search_texts('tex')
+        return lambda: project.search_texts(query, only_unlabelled=only_unlabelled, limit=Statechart.MAX_SEARCH_RESULTS)
+    return bench_search_query
+
+
+for _name, (_query, _only_unlabelled) in SEARCH_QUERIES.items():
+    benchmark(_name)(make_search_query_benchmark(_query, _only_unlabelled))
+
+
+@benchmark('text_directory_export')
+def bench_text_directory_export(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    project = make_project(size)
+    return lambda: TextDirectoryExporter().export(path_to_dir / 'export', project=project)
+
+
+@benchmark('gui_update_queue')
+def bench_gui_update_queue(size: int, path_to_dir: pathlib.Path) -> Callable[[], None]:
+    # без Tk: сколько стоит принять поток изменений от statechart и схлопнуть их в одну перерисовку
+    texts = make_project(size).get_texts()
+    updates = GuiUpdateQueue(refresh_texts=lambda _: None)
+
+    def run():
+        for text_id in range(NUM_OPERATIONS):
+            updates.post_text_change(lambda *_: None, texts, text_id % size)
+            updates.post('select_text', lambda *_: None, text_id)
+        updates.run()
+    return run
+
+
+def measure(func: Benchmark, size: int, repeat: int) -> dict:
+    # время - лучший из repeat запусков без tracemalloc, пиковая память - отдельным запуском под tracemalloc
+    seconds = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            run = func(size, pathlib.Path(tmpdir))
+            gc.collect()
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        run = func(size, pathlib.Path(tmpdir))
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {'seconds': round(seconds, 6), 'peak_kb': round(peak / 1024)}
+
+
+def run_benchmarks(sizes: list[str], names: Optional[list[str]] = None,
+                   report: Optional[Callable[[str, dict], None]] = None) -> dict[str, dict]:
+    results = {}
+    for size_name in sizes:
+        size = SIZES[size_name]
+        for name in names or BENCHMARKS:
+            key = f'{name}[{size_name}]'
+            results[key] = measure(BENCHMARKS[name], size, repeat=3 if size <= 100_000 else 1)
+            if report is not None:
+                report(key, results[key])
+    return results
+
+
+def load_baselines(path_to_baselines: pathlib.Path = PATH_TO_BASELINES) -> dict[str, dict]:
+    try:
+        with open(path_to_baselines, mode='r', encoding='utf-8') as baselines_handle:
+            return json.load(baselines_handle)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results: dict[str, dict], path_to_baselines: pathlib.Path = PATH_TO_BASELINES):
+    # обновляются только замеренные ключи, baseline остальных размеров остаётся
+    baselines = load_baselines(path_to_baselines)
+    baselines.update(results)
+    with open(path_to_baselines, mode='w', encoding='utf-8') as baselines_handle:
+        json.dump(dict(sorted(baselines.items())), baselines_handle, indent=2)
+        baselines_handle.write('\n')
+
+
+def find_regressions(results: dict[str, dict], baselines: dict[str, dict], threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        for metric, slack in (('seconds', MIN_SECONDS_SLACK), ('peak_kb', MIN_PEAK_KB_SLACK)):
+            limit = baseline[metric] * (1 + threshold) + slack
+            if result[metric] > limit:
+                regressions.append(f'{key}: {metric} {result[metric]} > {limit:.6g} (baseline {baseline[metric]})')
+    return regressions
+
+
+def find_budget_overruns(results: dict[str, dict]) -> list[str]:
+    overruns = []
+    for key, result in results.items():
+        name, size_name = key[:-1].split('[')
+        budget = LATENCY_BUDGETS.get(name)
+        if budget is not None and SIZES[size_name] <= LATENCY_MAX_SIZE and result['seconds'] > budget:
+            overruns.append(f'{key}: seconds {result["seconds"]} > budget {budget}')
+    return overruns
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='text-label performance benchmarks')
+    parser.add_argument('--sizes', default='1k,100k', help=f'comma separated, any of {",".join(SIZES)}')
+    parser.add_argument('--only', help='comma separated benchmark names')
+    parser.add_argument('--threshold', type=float, default=float(os.environ.get('BENCHMARK_THRESHOLD', DEFAULT_THRESHOLD)),
+                        help='allowed relative slowdown or memory growth')
+    parser.add_argument('--baselines', type=pathlib.Path, default=PATH_TO_BASELINES)
+    parser.add_argument('--update', action='store_true', help='store the results as the new baselines')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baselines)
+
+    def report(key: str, result: dict):
+        baseline = baselines.get(key)
+        compared = f'  (baseline {baseline["seconds"]:.4f} s, {baseline["peak_kb"]} KiB)' if baseline else ''
+        print(f'{key:40} {result["seconds"]:10.4f} s {result["peak_kb"]:10} KiB{compared}', flush=True)
+
+    results = run_benchmarks(args.sizes.split(','), args.only.split(',') if args.only else None, report=report)
+    if args.update:
+        save_baselines(results, args.baselines)
+        return 0
+
+    regressions = find_regressions(results, baselines, args.threshold) + find_budget_overruns(results)
+    for regression in regressions:
+        print(f'REGRESSION {regression}', file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
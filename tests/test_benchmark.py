@@ -0,0 +1,39 @@
+import os
+import unittest
+
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_find_regressions(self):
+        baselines = {'add_text[1k]': {'seconds': 1.0, 'peak_kb': 1000}}
+        assert benchmark.find_regressions({'add_text[1k]': {'seconds': 1.2, 'peak_kb': 1100}}, baselines, threshold=0.25) == []
+        assert benchmark.find_regressions({'new[1k]': {'seconds': 100.0, 'peak_kb': 10 ** 9}}, baselines) == []
+
+        regressions = benchmark.find_regressions({'add_text[1k]': {'seconds': 1.5, 'peak_kb': 2000}}, baselines, threshold=0.25)
+        assert len(regressions) == 2
+        assert regressions[0].startswith('add_text[1k]: seconds')
+
+    def test_find_budget_overruns(self):
+        assert benchmark.find_budget_overruns({'search_word[500k]': {'seconds': 0.01, 'peak_kb': 1},
+                                               'search_word[1m]': {'seconds': 1.0, 'peak_kb': 1},
+                                               'add_text[1k]': {'seconds': 1.0, 'peak_kb': 1}}) == []
+        overruns = benchmark.find_budget_overruns({'search_prefix[100k]': {'seconds': 1.0, 'peak_kb': 1}})
+        assert len(overruns) == 1
+        assert overruns[0].startswith('search_prefix[100k]: seconds')
+
+    # замеры зависят от машины и её загрузки, поэтому в обычном прогоне тестов не участвуют
+    @unittest.skipUnless(os.environ.get('RUN_BENCHMARKS'), 'set RUN_BENCHMARKS=1 to compare with the baselines')
+    def test_no_regressions(self):
+        # по умолчанию только маленький проект, большие - BENCHMARK_SIZES=1k,100k,500k,1m или python benchmark.py
+        sizes = os.environ.get('BENCHMARK_SIZES', '1k').split(',')
+        threshold = float(os.environ.get('BENCHMARK_THRESHOLD', benchmark.DEFAULT_THRESHOLD))
+        results = benchmark.run_benchmarks(sizes)
+        assert set(results) == {f'{name}[{size}]' for name in benchmark.BENCHMARKS for size in sizes}
+
+        regressions = benchmark.find_regressions(results, benchmark.load_baselines(), threshold) + benchmark.find_budget_overruns(results)
+        assert regressions == [], '\n'.join(regressions)
+
+
+if __name__ == '__main__':
+    unittest.main()
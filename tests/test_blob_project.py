@@ -0,0 +1,158 @@
+import os.path
+import pathlib
+import sys
+import tempfile
+import unittest
+
+from text_label.blob_project import BlobProject, BlobTextInfo
+from text_label.exporters.text_directory import TextDirectoryExporter
+from text_label.project import Project
+from text_label.text_info import TextInfo
+
+
+class TestBlobProject(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        self.path_to_blob = pathlib.Path(self.tmpdir.name, 'project.blob.tl')
+        Project.load_project_from_path(path_to_project).save_project(self.path_to_blob)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_load_project(self):
+        project = Project.load_project_from_path(self.path_to_blob)
+        assert isinstance(project, BlobProject)
+
+        assert project.categories == {0: 'cat1', 1: 'cat2'}
+        assert len(project.data) == 3
+        assert project.data[2].category_id == 1
+        assert project.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1)]
+        assert project.get_texts(1) == [TextInfo('text3', category_id=1)]
+        assert project.get_text_ids_of_category(None) == [1]
+        project.close()
+
+    def test_lazy_bodies(self):
+        project = BlobProject(self.path_to_blob, text_cache_bytes=1024)
+        text_info = project.data[0]
+        assert isinstance(text_info, BlobTextInfo)
+        assert project.data.get_cache_stats()['entries'] == 0
+
+        assert text_info.text == 'text1'
+        assert project.data[0].text == 'text1'
+        assert project.data.get_cache_stats() == {'entries': 1, 'bytes': sys.getsizeof('text1'), 'hits': 1, 'misses': 1}
+        assert project.data.get_preview(1, 3) == 'tex'
+        project.close()
+
+    def test_full_scans_bypass_cache(self):
+        project = BlobProject(self.path_to_blob, text_cache_bytes=1024)
+        project.add_text('text4')
+        assert list(project.iter_texts()) == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1), TextInfo('text4')]
+        assert list(project.iter_texts(1)) == [TextInfo('text3', category_id=1)]
+        assert not any(isinstance(text_info, BlobTextInfo) for text_info in project.iter_texts())
+
+        TextDirectoryExporter().export(pathlib.Path(self.tmpdir.name, 'export'), project=project)
+        assert project.build_duplicate_index(10)
+        assert project.data.get_cache_stats() == {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 0}
+        assert pathlib.Path(self.tmpdir.name, 'export', 'cat2', '0.txt').read_text(encoding='utf-8') == 'text3'
+        project.close()
+
+    def test_snapshot(self):
+        project = BlobProject(self.path_to_blob)
+        project.add_text('text4')
+        snapshot = project.make_snapshot()
+        expected = [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1), TextInfo('text4')]
+
+        project.mark_text(0, 1)
+        project.remove_text(1)
+        project.add_text('text5')
+        project.save_project(self.path_to_blob)
+        assert isinstance(snapshot, BlobProject)
+        assert list(snapshot.iter_texts()) == expected
+        assert list(snapshot.iter_texts(1)) == [TextInfo('text3', category_id=1)]
+        assert project.data.get_cache_stats()['entries'] == 0
+        project.close()
+
+    def test_mutations_and_undo(self):
+        project = Project.load_project_from_path(self.path_to_blob)
+        name = project.get_name()
+
+        project.add_category('cat3')
+        project.mark_text(1, 2)
+        project.remove_text(0)
+        project.add_text('text4')
+        assert project.categories == {0: 'cat1', 1: 'cat2', 2: 'cat3'}
+        assert project.get_texts() == [TextInfo('text2', category_id=2), TextInfo('text3', category_id=1), TextInfo('text4')]
+        assert project.get_name() != name
+        assert project.mark_texts([0, 1, 2], 0) == [0, 1, 2]
+        assert project.get_text_ids_of_category(0) == [0, 1, 2]
+
+        for _ in range(5):
+            project.undo()
+        assert project.categories == {0: 'cat1', 1: 'cat2'}
+        assert project.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1)]
+        assert project.get_name() == name
+        # возвращённый отменой текст снова читается из файла
+        assert isinstance(project.data[0], BlobTextInfo)
+        project.close()
+
+    def test_save_appends_bodies(self):
+        project = Project.load_project_from_path(self.path_to_blob)
+        path_to_bodies = self.path_to_blob.with_name(f'{self.path_to_blob.name}.0.bodies')
+        bodies_size = path_to_bodies.stat().st_size
+
+        project.add_text('текст5')
+        project.mark_text(0, 1)
+        project.remove_text(1)
+        project.save_project(self.path_to_blob)
+        assert path_to_bodies.stat().st_size == bodies_size + len('текст5'.encode('utf-8'))
+        assert isinstance(project.data[2], BlobTextInfo)
+        assert project.data[2].text == 'текст5'
+        project.close()
+
+        project = Project.load_project_from_path(self.path_to_blob)
+        assert project.get_texts() == [TextInfo('text1', category_id=1), TextInfo('text3', category_id=1), TextInfo('текст5')]
+        assert project.get_text_ids_of_category(1) == [0, 1]
+        project.close()
+
+    def test_compaction(self):
+        self.addCleanup(setattr, BlobProject, 'BODIES_COMPACTION_MIN_BYTES', BlobProject.BODIES_COMPACTION_MIN_BYTES)
+        BlobProject.BODIES_COMPACTION_MIN_BYTES = 0
+        project = Project.load_project_from_path(self.path_to_blob)
+        project.remove_text(0)
+        project.remove_text(0)
+        project.save_project(self.path_to_blob)
+
+        assert sorted(path.name for path in pathlib.Path(self.tmpdir.name).iterdir()) == ['project.blob.tl', 'project.blob.tl.1.bodies']
+        assert project.get_texts() == [TextInfo('text3', category_id=1)]
+        project.close()
+
+        project = Project.load_project_from_path(self.path_to_blob)
+        assert project.get_texts() == [TextInfo('text3', category_id=1)]
+        project.close()
+
+    def test_save_as_other_format(self):
+        project = Project.load_project_from_path(self.path_to_blob)
+        project.add_text('text4')
+        path_to_json = pathlib.Path(self.tmpdir.name, 'project.json.tl')
+        project.save_project(path_to_json)
+        project.close()
+
+        project = Project.load_project_from_path(path_to_json)
+        assert project.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1), TextInfo('text4')]
+
+    def test_journal_replay(self):
+        project = Project.load_project_from_path(self.path_to_blob)
+        project.enable_journal()
+        project.add_text('text4')
+        project.mark_text(0, None)
+        project._flush_journal()
+        project.close()
+
+        project = Project.load_project_from_path(self.path_to_blob)
+        assert project.get_texts() == [TextInfo('text1'), TextInfo('text2'), TextInfo('text3', category_id=1), TextInfo('text4')]
+        project.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from text_label.category_index import CategoryIndex
+from text_label.text_info import TextInfo
+
+
+class TestCategoryIndex(unittest.TestCase):
+    def test_build(self):
+        index = CategoryIndex([TextInfo('text1', 0), TextInfo('text2'), TextInfo('text3', 0)])
+        assert index.get_text_ids(0) == [0, 2]
+        assert index.get_text_ids(None) == [1]
+        assert index.get_text_ids(1) == []
+        assert index.count(0) == 2
+
+    def test_add_discard(self):
+        index = CategoryIndex()
+        index.add(5, 0)
+        index.add(1, 0)
+        index.add(3, 0)
+        assert index.get_text_ids(0) == [1, 3, 5]
+
+        index.discard(3, 0)
+        index.discard(3, 0)
+        index.discard(3, 1)
+        assert index.get_text_ids(0) == [1, 5]
+
+    def test_shift(self):
+        index = CategoryIndex([TextInfo('text1', 0), TextInfo('text2'), TextInfo('text3', 0), TextInfo('text4')])
+        index.shift(1, 1)
+        assert index.get_text_ids(0) == [0, 3]
+        assert index.get_text_ids(None) == [2, 4]
+
+        index.shift(3, -1)
+        assert index.get_text_ids(0) == [0, 2]
+        assert index.get_text_ids(None) == [2, 3]
+
+    def test_move_many(self):
+        for size in (10, CategoryIndex.MIN_BULK_MOVES * 4):
+            index = CategoryIndex([TextInfo(str(text_id), text_id % 3 or None) for text_id in range(size)])
+            index.move_many([(text_id, text_id % 3 or None, 2) for text_id in range(0, size, 2)])
+            assert index.get_text_ids(2) == sorted({text_id for text_id in range(size) if text_id % 3 == 2 or text_id % 2 == 0})
+            assert index.get_text_ids(1) == [text_id for text_id in range(size) if text_id % 3 == 1 and text_id % 2 == 1]
+            assert index.get_text_ids(None) == [text_id for text_id in range(size) if text_id % 3 == 0 and text_id % 2 == 1]
+
+
+if __name__ == '__main__':
+    unittest.main()
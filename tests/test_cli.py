@@ -0,0 +1,86 @@
+import contextlib
+import io
+import json
+import os.path
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from text_label import cli
+from text_label.project import Project
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path_to_dir = pathlib.Path(self.tmpdir.name)
+        self.path_to_project = self.path_to_dir / 'project.json.tl'
+        Project(categories={0: 'cat1', 1: 'cat2'}, data=[['text1', 0], ['text2'], ['text3', 1]]).save_project(self.path_to_project)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _run(self, *argv) -> tuple[int, str]:
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            code = cli.main([str(arg) for arg in argv])
+        return code, stdout.getvalue()
+
+    def test_stats(self):
+        code, output = self._run('stats', self.path_to_project, '--json')
+        stats = json.loads(output)
+
+        assert code == 0
+        assert stats['texts'] == 3
+        assert stats['categories'] == {'cat1': 1, 'cat2': 1}
+        assert stats['unlabelled'] == 1
+
+    def test_read_assignments(self):
+        lines = ['text_id,label', '0,cat2', '1\tcat1', '2,', '{"text_id": 1, "label": null}']
+        assert list(cli.read_assignments(lines)) == [(0, 'cat2'), (1, 'cat1'), (2, None), (1, None)]
+
+    def test_label(self):
+        path_to_mapping = self.path_to_dir / 'mapping.csv'
+        path_to_mapping.write_text('0,cat2\n1,cat3\n2,\n', encoding='utf-8')
+        path_to_output = self.path_to_dir / 'labelled.jsonl.tl'
+
+        code, _ = self._run('label', self.path_to_project, path_to_mapping)
+        assert code == 1
+
+        code, _ = self._run('label', self.path_to_project, path_to_mapping, '--create-categories', '--output', path_to_output)
+        assert code == 0
+        project = Project.load_project_from_path(path_to_output)
+        assert project.categories == {0: 'cat1', 1: 'cat2', 2: 'cat3'}
+        assert [text_info.category_id for text_info in project.get_texts()] == [1, 2, None]
+
+    def test_merge(self):
+        path_to_other = self.path_to_dir / 'other.json.tl'
+        Project(categories={0: 'cat2', 1: 'cat4'}, data=[['text1', 0], ['text4', 1]]).save_project(path_to_other)
+        path_to_output = self.path_to_dir / 'merged.json.tl'
+
+        code, _ = self._run('merge', path_to_output, self.path_to_project, path_to_other, '--dedup')
+        assert code == 0
+        project = Project.load_project_from_path(path_to_output)
+        assert project.categories == {0: 'cat1', 1: 'cat2', 2: 'cat4'}
+        assert [(text_info.text, text_info.category_id) for text_info in project.get_texts()] == \
+               [('text1', 0), ('text2', None), ('text3', 1), ('text4', 2)]
+
+    def test_export(self):
+        path_to_export = self.path_to_dir / 'export'
+        code, _ = self._run('export', self.path_to_project, 'jsonl', path_to_export)
+
+        assert code == 0
+        assert len(list(path_to_export.glob('*.jsonl'))) == 1
+
+    def test_no_tkinter(self):
+        code = 'import sys; from text_label import cli; cli.main(sys.argv[1:]); assert "tkinter" not in sys.modules'
+        result = subprocess.run([sys.executable, '-c', code, 'export', str(self.path_to_project), 'archive', str(self.path_to_dir / 'a.zip')],
+                                env={**os.environ, 'PYTHONPATH': os.path.dirname(os.path.dirname(os.path.abspath(cli.__file__)))},
+                                capture_output=True)
+        assert result.returncode == 0, result.stderr
+
+
+if __name__ == '__main__':
+    unittest.main()
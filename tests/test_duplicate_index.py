@@ -0,0 +1,139 @@
+import random
+import unittest
+
+from text_label.duplicate_index import DuplicateIndex, HashMultiset, TextLocator
+from text_label.project import Project
+
+
+class TestHashMultiset(unittest.TestCase):
+    def test_add_discard(self):
+        hashes = HashMultiset([3, 1, 2, 2])
+        assert hashes.count(2) == 2
+        assert len(hashes) == 4
+
+        hashes.add(2)
+        hashes.add(5)
+        hashes.discard(1)
+        hashes.discard(7)
+        assert [hashes.count(value) for value in range(7)] == [0, 0, 3, 1, 0, 1, 0]
+
+        hashes.merge()
+        assert list(hashes.hashes) == [2, 2, 2, 3, 5]
+        assert [hashes.count(value) for value in range(7)] == [0, 0, 3, 1, 0, 1, 0]
+
+    def test_merge_on_many_changes(self):
+        hashes = HashMultiset()
+        for value in range(HashMultiset.MIN_MERGE_SIZE * 3):
+            hashes.add(value)
+        assert len(hashes.hashes) > 0
+        assert len(hashes) == HashMultiset.MIN_MERGE_SIZE * 3
+        assert all(hashes.count(value) == 1 for value in range(0, HashMultiset.MIN_MERGE_SIZE * 3, 97))
+
+
+class TestDuplicateIndex(unittest.TestCase):
+    def test_exact(self):
+        index = DuplicateIndex(['a', 'b', 'a'])
+        assert index.count_duplicates('a') == 2
+        assert index.is_duplicate('b')
+        assert not index.is_duplicate('c')
+
+        index.remove(0, 'a')
+        index.remove(0, 'b')
+        assert index.count_duplicates('a') == 1
+        assert not index.is_duplicate('b')
+
+    def test_near(self):
+        text = 'The quick brown fox jumps over the lazy dog near the river bank in the morning'
+        index = DuplicateIndex([text], near_duplicates=True)
+
+        assert not index.is_near_duplicate(text)
+        assert index.is_near_duplicate(text.replace('morning', 'evening'))
+        assert index.is_near_duplicate(text.upper())
+        assert not index.is_near_duplicate('Completely unrelated sentence about labelling cats and dogs')
+
+    def test_find_text_ids(self):
+        index = DuplicateIndex(['a', 'b', 'a'])
+        index.insert(0, 'c')
+        index.remove(2, 'b')
+        index.extend(['b'])
+        assert index.find_text_ids('a') == [1, 2]
+        assert index.find_text_ids('b') == [3]
+        assert index.find_text_ids('d') == []
+
+    def test_project_keeps_index_up_to_date(self):
+        project = Project(data=[['a'], ['b']])
+        index = project.get_duplicate_index()
+
+        project.add_text('c')
+        project.remove_text(0)
+        assert index.is_duplicate('c')
+        assert not index.is_duplicate('a')
+
+        project.undo()
+        assert index.is_duplicate('a')
+        assert project.find_text_ids('a') == [0]
+
+    def test_project_builds_index_in_steps(self):
+        project = Project(data=[[f'text {idx}'] for idx in range(10)])
+        assert not project.build_duplicate_index(4)
+        # правки до и после проиндексированной части
+        project.remove_text(1)
+        project.remove_text(8)
+        project.add_text('text 1')
+        project.undo()
+        project.undo()
+        assert len(project.duplicate_index) == 3
+        assert not project.build_duplicate_index(4)
+        assert project.build_duplicate_index(4)
+        assert [project.find_text_ids(f'text {idx}') for idx in range(10)] == [[0], [], *([idx] for idx in range(1, 9))]
+
+    def test_find_text_ids_reads_only_candidates(self):
+        class CountingList(list):
+            reads = 0
+
+            def __getitem__(self, idx):
+                CountingList.reads += 1
+                return super().__getitem__(idx)
+
+        project = Project(data=[[f'text {idx}'] for idx in range(10_000)])
+        project.get_duplicate_index()
+        project.data = CountingList(project.data)
+        assert project.find_text_ids('text 5000') == [5000]
+        assert project.find_text_ids('missing') == []
+        assert CountingList.reads == 1
+
+
+class TestTextLocator(unittest.TestCase):
+    def test_positions_follow_inserts_and_removes(self):
+        hashes = {name: hash(name) for name in ('a', 'b', 'c', 'd')}
+        locator = TextLocator([hashes['a'], hashes['b'], hashes['a']])
+        locator.insert(1, hashes['c'])
+        locator.remove(0, hashes['a'])
+        locator.extend([hashes['b']])
+        assert len(locator) == 4
+        assert [locator.find(hashes[name]) for name in ('a', 'b', 'c', 'd')] == [[2], [1, 3], [0], []]
+
+        locator.merge()
+        assert [locator.find(hashes[name]) for name in ('a', 'b', 'c', 'd')] == [[2], [1, 3], [0], []]
+
+    def test_matches_list_after_many_changes(self):
+        rng = random.Random(0)
+        values = [hash(f'text {idx % 50}') for idx in range(200)]
+        locator = TextLocator(values)
+        locator.MIN_MERGE_SIZE = 16
+        for _ in range(2000):
+            text_id = rng.randrange(len(values) + 1)
+            if rng.random() < 0.5 and len(values) > 0:
+                text_id = min(text_id, len(values) - 1)
+                locator.remove(text_id, values.pop(text_id))
+            else:
+                # вставки в одно место исчерпывают промежуток между ключами
+                text_id = min(text_id, 3)
+                values.insert(text_id, hash(f'text {rng.randrange(60)}'))
+                locator.insert(text_id, values[text_id])
+        for value in set(values) | {hash('missing')}:
+            assert locator.find(value) == [text_id for text_id, other in enumerate(values) if other == value]
+
+
+if __name__ == '__main__':
+    unittest.main()
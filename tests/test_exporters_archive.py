@@ -0,0 +1,59 @@
+import os.path
+import pathlib
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from text_label.project import Project
+from text_label.exporters.archive import ArchiveExporter
+
+
+class TestExportersArchive(unittest.TestCase):
+    def setUp(self):
+        path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        self.project = Project.load_project_from_path(path_to_project)
+
+    def test_export_tar_gz(self):
+        path_to_archive = pathlib.Path(tempfile.mktemp(prefix='test_exporters_archive', suffix='.tar.gz'))
+        summary = ArchiveExporter().export(path_to_archive, project=self.project)
+
+        assert summary.files == 2
+        with tarfile.open(path_to_archive, mode='r:gz') as archive:
+            assert sorted(archive.getnames()) == ['cat1', 'cat1/0.txt', 'cat2', 'cat2/0.txt']
+            assert archive.extractfile('cat2/0.txt').read() == b'text3'
+
+    def test_export_tar(self):
+        path_to_archive = pathlib.Path(tempfile.mktemp(prefix='test_exporters_archive', suffix='.tar'))
+        ArchiveExporter().export(path_to_archive, project=self.project)
+
+        with tarfile.open(path_to_archive, mode='r:') as archive:
+            assert archive.extractfile('cat1/0.txt').read() == b'text1'
+
+    def test_export_zip(self):
+        path_to_archive = pathlib.Path(tempfile.mktemp(prefix='test_exporters_archive', suffix='.zip'))
+        summary = ArchiveExporter().export(path_to_archive, project=self.project)
+
+        assert summary.files == 2
+        with zipfile.ZipFile(path_to_archive) as archive:
+            assert sorted(archive.namelist()) == ['cat1/', 'cat1/0.txt', 'cat2/', 'cat2/0.txt']
+            assert archive.read('cat1/0.txt') == b'text1'
+
+    def test_unsupported_format(self):
+        path_to_archive = pathlib.Path(tempfile.mktemp(prefix='test_exporters_archive', suffix='.rar'))
+        with self.assertRaises(ValueError):
+            ArchiveExporter().export(path_to_archive, project=self.project)
+
+    def test_export_cancel(self):
+        path_to_archive = pathlib.Path(tempfile.mktemp(prefix='test_exporters_archive', suffix='.zip'))
+        exporter = ArchiveExporter()
+        exporter.PROGRESS_EVERY = 1
+        summary = exporter.export(path_to_archive, project=self.project, progress_callback=lambda done, total: exporter.cancel())
+
+        assert summary.cancelled is True
+        assert summary.files == 1
+        assert not os.path.exists(path_to_archive)
+
+
+if __name__ == '__main__':
+    unittest.main()
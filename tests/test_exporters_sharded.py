@@ -0,0 +1,78 @@
+import csv
+import glob
+import json
+import pathlib
+import tempfile
+import time
+import unittest
+
+from text_label.project import Project
+from text_label.exporters.sharded import ShardedExporter
+from text_label.exporters.jsonl_shards import JsonlExporter
+from text_label.exporters.csv_shards import CsvExporter
+
+
+class TestExportersSharded(unittest.TestCase):
+    @staticmethod
+    def _make_project(texts_count: int) -> Project:
+        project = Project(categories={0: 'cat1', 1: 'cat2'},
+                          data=[[f'text{i}', i % 2] for i in range(texts_count)])
+        project.add_text('unlabelled')
+        return project
+
+    def test_get_split_is_deterministic(self):
+        splits = ShardedExporter.DEFAULT_SPLITS
+        assert ShardedExporter.get_split('text1', splits) == ShardedExporter.get_split('text1', splits)
+
+        counts = {split: 0 for split in splits}
+        for i in range(10000):
+            counts[ShardedExporter.get_split(f'text{i}', splits)] += 1
+        assert 7500 < counts['train'] < 8500
+        assert 700 < counts['val'] < 1300
+        assert 700 < counts['test'] < 1300
+
+    def test_export_jsonl_shards(self):
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_sharded'))
+        summary = JsonlExporter(shard_size=4).export(path_to_dir, project=self._make_project(10))
+
+        assert summary.rows == 10
+        assert summary.files == 3
+        assert sorted(p.name for p in path_to_dir.iterdir()) == ['part-00000.jsonl', 'part-00001.jsonl', 'part-00002.jsonl']
+
+        with open(path_to_dir / 'part-00000.jsonl', encoding='utf-8') as handle:
+            rows = [json.loads(line) for line in handle]
+        assert rows[0] == {'text': 'text0', 'label': 'cat1', 'category_id': 0}
+        assert len(rows) == 4
+
+    def test_export_csv_splits(self):
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_sharded'))
+        exporter = CsvExporter(shard_size=1000, splits=ShardedExporter.DEFAULT_SPLITS)
+        summary = exporter.export(path_to_dir, project=self._make_project(1000))
+
+        assert summary.rows == 1000
+        rows = {}
+        for path_to_shard in sorted(glob.glob(str(path_to_dir / '*.csv'))):
+            with open(path_to_shard, encoding='utf-8', newline='') as handle:
+                reader = csv.reader(handle)
+                assert next(reader) == ['text', 'label', 'category_id']
+                for text, label, _ in reader:
+                    rows[text] = pathlib.Path(path_to_shard).name.split('-')[0]
+                    assert ShardedExporter.get_split(text, ShardedExporter.DEFAULT_SPLITS) == rows[text]
+        assert len(rows) == 1000
+        assert set(rows.values()) == {'train', 'val', 'test'}
+
+    def test_export_million_rows(self):
+        project = self._make_project(1_000_000)
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_sharded'))
+
+        started = time.perf_counter()
+        summary = JsonlExporter().export(path_to_dir, project=project)
+        elapsed = time.perf_counter() - started
+
+        assert summary.rows == 1_000_000
+        assert summary.files == 10
+        assert elapsed < 10, f'1M rows exported in {elapsed:.1f}s'
+
+
+if __name__ == '__main__':
+    unittest.main()
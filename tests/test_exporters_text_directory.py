@@ -4,8 +4,9 @@ import pathlib
 import tempfile
 import unittest
 
+from text_label.bus import Bus
 from text_label.project import Project
-from text_label.exporters.text_directory import TextDirectoryExporter
+from text_label.exporters.text_directory import TextDirectoryExporter, IncrementalTextDirectoryExporter
 
 
 class TestExportersTextDirectory(unittest.TestCase):
@@ -26,7 +27,160 @@ class TestExportersTextDirectory(unittest.TestCase):
 
         assert len(glob.glob(str(path_to_dir.resolve().absolute()) + '/*/*.txt')) == 2
 
+    def test_export_summary_and_progress(self):
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_text_directory'))
+
+        project = Project()
+        project.add_category('cat1')
+        for i in range(1000):
+            project.add_text(f'text{i}')
+            project.mark_text(i, 0)
+
+        progress = []
+        exporter = TextDirectoryExporter(max_workers=4)
+        exporter.BATCH_SIZE = 100
+        summary = exporter.export(path_to_dir, project=project, progress_callback=lambda done, total: progress.append((done, total)))
+
+        assert summary.files == 1000
+        assert summary.bytes == sum(len(f'text{i}') for i in range(1000))
+        assert summary.cancelled is False
+        assert progress[-1] == (1000, 1000)
+        assert len(glob.glob(str(path_to_dir.resolve().absolute()) + '/cat1/*.txt')) == 1000
+        with open(path_to_dir / 'cat1' / '999.txt', encoding='utf-8') as handle:
+            assert handle.read() == 'text999'
+
+    def test_export_in_background_reports_errors(self):
+        path_to_file = pathlib.Path(tempfile.mktemp(prefix='test_exporters_text_directory'))
+        path_to_file.write_text('not a directory', encoding='utf-8')
+        summaries = []
+
+        class Gui:
+            def show_export_progress(self, exporter_name, done, total):
+                pass
+
+            def show_export_summary(self, exporter_name, summary):
+                summaries.append(summary)
+
+        bus = Bus()
+        bus.register('gui', Gui())
+        exporter = TextDirectoryExporter(bus=bus)
+        exporter.export_in_background(path_to_dir=path_to_file, project=Project.load_project_from_path(pathlib.Path('./assets/test.json.tl')))
+        exporter.export_thread.join()
+
+        assert len(summaries) == 1
+        assert summaries[0].error is not None
+        assert str(summaries[0]).startswith('failed')
+
+    def test_export_cancel(self):
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_text_directory'))
+
+        project = Project()
+        project.add_category('cat1')
+        for i in range(1000):
+            project.add_text(f'text{i}')
+            project.mark_text(i, 0)
+
+        exporter = TextDirectoryExporter(max_workers=1)
+        exporter.BATCH_SIZE = 10
+        summary = exporter.export(path_to_dir, project=project, progress_callback=lambda done, total: exporter.cancel())
+
+        assert summary.cancelled is True
+        assert summary.files < 1000
+
+    def test_export_twice(self):
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_text_directory'))
+        project = Project.load_project_from_path(pathlib.Path('./assets/test.json.tl'))
+
+        TextDirectoryExporter().export(path_to_dir, project=project)
+        summary = TextDirectoryExporter().export(path_to_dir, project=project)
+
+        assert summary.files == 2
+        assert len(glob.glob(str(path_to_dir.resolve().absolute()) + '/*/*.txt')) == 2
+
+    def test_incremental_export(self):
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_text_directory'))
+
+        project = Project()
+        project.add_category('cat1')
+        project.add_category('cat2')
+        for i in range(100):
+            project.add_text(f'text{i}')
+            project.mark_text(i, i % 2)
+        exporter = IncrementalTextDirectoryExporter(max_workers=2)
+
+        summary = exporter.export(path_to_dir, project=project)
+        assert summary.files == 100
+        assert len(glob.glob(str(path_to_dir) + '/cat1/*.txt')) == 50
+
+        # проект не менялся - ничего не пишем
+        summary = exporter.export(path_to_dir, project=project)
+        assert (summary.files, summary.moved, summary.removed) == (0, 0, 0)
+
+        project.mark_text(0, 1)
+        project.mark_text(1, None)
+        project.add_text('new text')
+        project.mark_text(100, 0)
+        summary = exporter.export(path_to_dir, project=project)
+        assert (summary.files, summary.moved, summary.removed) == (1, 1, 1)
+
+        path_to_moved = path_to_dir / 'cat2' / IncrementalTextDirectoryExporter.get_file_name('text0')
+        with open(path_to_moved, encoding='utf-8') as handle:
+            assert handle.read() == 'text0'
+        assert len(glob.glob(str(path_to_dir) + '/cat1/*.txt')) == 50
+        assert len(glob.glob(str(path_to_dir) + '/cat2/*.txt')) == 50
+
+        # удаление категории удаляет и её папку
+        project.remove_category(0)
+        summary = exporter.export(path_to_dir, project=project)
+        assert summary.removed == 50
+        assert not os.path.exists(path_to_dir / 'cat1')
+
+        manifest = IncrementalTextDirectoryExporter.read_manifest(path_to_dir)
+        assert manifest['project'] == project.get_name()
+        assert len(manifest['files']) == 50
+
+    def test_incremental_export_rereads_only_written_texts(self):
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_text_directory'))
+
+        project = Project()
+        project.add_category('cat1')
+        for i in range(100):
+            project.add_text(f'text{i}')
+            project.mark_text(i, 0)
+        IncrementalTextDirectoryExporter().export(path_to_dir, project=project)
+        project.add_text('new text')
+        project.mark_text(100, 0)
+
+        read_text_ids = []
+        iter_texts_at = project.iter_texts_at
+        project.iter_texts_at = lambda text_ids: iter_texts_at(read_text_ids.append(list(text_ids)) or read_text_ids[-1])
+        summary = IncrementalTextDirectoryExporter().export(path_to_dir, project=project)
+        assert summary.files == 1
+        # один проход для хешей и чтение тела только нового текста
+        assert read_text_ids == [list(range(101)), [100]]
+        with open(path_to_dir / 'cat1' / IncrementalTextDirectoryExporter.get_file_name('new text'), encoding='utf-8') as handle:
+            assert handle.read() == 'new text'
+
+    def test_incremental_export_cancel(self):
+        path_to_dir = pathlib.Path(tempfile.mktemp(prefix='test_exporters_text_directory'))
+
+        project = Project()
+        project.add_category('cat1')
+        for i in range(1000):
+            project.add_text(f'text{i}')
+            project.mark_text(i, 0)
+
+        exporter = IncrementalTextDirectoryExporter(max_workers=1)
+        exporter.BATCH_SIZE = 10
+        cancelled_summary = exporter.export(path_to_dir, project=project, progress_callback=lambda done, total: exporter.cancel())
+        assert cancelled_summary.cancelled is True
+        assert len(IncrementalTextDirectoryExporter.read_manifest(path_to_dir)['files']) == cancelled_summary.files
 
+        # следующий запуск дописывает только недостающие файлы
+        summary = IncrementalTextDirectoryExporter(max_workers=1).export(path_to_dir, project=project)
+        assert summary.cancelled is False
+        assert summary.files == 1000 - cancelled_summary.files
+        assert len(glob.glob(str(path_to_dir) + '/cat1/*.txt')) == 1000
 
 
 if __name__ == '__main__':
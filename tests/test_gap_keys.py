@@ -0,0 +1,22 @@
+import unittest
+
+from text_label import gap_keys
+
+
+class TestGapKeys(unittest.TestCase):
+    def test_make_key(self):
+        keys = gap_keys.make_initial_keys(3)
+        assert list(keys) == [gap_keys.GAP, 2 * gap_keys.GAP, 3 * gap_keys.GAP]
+        assert gap_keys.get_initial_key(2) == keys[2]
+
+        assert gap_keys.make_key(keys, 3) == 4 * gap_keys.GAP
+        assert gap_keys.make_key(keys, 0) == gap_keys.GAP // 2
+        assert keys[0] < gap_keys.make_key(keys, 1) < keys[1]
+        assert gap_keys.make_key([], 0) == gap_keys.GAP
+
+    def test_exhausted_gap(self):
+        keys = gap_keys.make_initial_keys(2)
+        for _ in range(gap_keys.GAP.bit_length() - 1):
+            keys.insert(1, gap_keys.make_key(keys, 1))
+        assert list(keys) == sorted(set(keys))
+        assert gap_keys.make_key(keys, 1) is None
@@ -0,0 +1,162 @@
+import sys
+import time
+import unittest
+
+from text_label.gui import TextListWindow, GuiUpdateQueue, TextRenderCache
+from text_label.project import TextInfo
+
+
+class TestTextListWindow(unittest.TestCase):
+    def test_indexes(self):
+        window = TextListWindow(size=100, visible_rows=10, buffer=5)
+        assert window.indexes() == range(0, 15)
+
+        window.scroll_to(50)
+        assert window.indexes() == range(50, 65)
+
+        window.scroll_to(1000)
+        assert window.first_idx == 90
+        assert window.indexes() == range(90, 100)
+
+        window.scroll_by(-1000)
+        assert window.first_idx == 0
+
+    def test_small_dataset(self):
+        window = TextListWindow(size=3, visible_rows=10, buffer=5)
+        assert window.indexes() == range(0, 3)
+        assert window.fractions() == (0.0, 1.0)
+
+        window = TextListWindow(size=0, visible_rows=10, buffer=5)
+        assert window.indexes() == range(0, 0)
+        assert window.fractions() == (0.0, 1.0)
+
+    def test_make_visible(self):
+        window = TextListWindow(size=100, visible_rows=10, buffer=5)
+        window.make_visible(5)
+        assert window.first_idx == 0
+
+        window.make_visible(20)
+        assert window.first_idx == 11
+        assert window.contains(20)
+
+        window.make_visible(3)
+        assert window.first_idx == 3
+
+    def test_insert_remove(self):
+        window = TextListWindow(size=100, visible_rows=10, buffer=5)
+        window.scroll_to(50)
+
+        window.insert(10)
+        assert window.size == 101
+        assert window.first_idx == 51
+
+        window.insert(60)
+        assert window.first_idx == 51
+
+        window.remove(0)
+        assert window.size == 101
+        assert window.first_idx == 50
+
+        window.scroll_to(1000)
+        window.remove(100)
+        assert window.first_idx == 90
+
+
+class TestGuiUpdateQueue(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.queue = GuiUpdateQueue(refresh_texts=lambda texts: self.calls.append(('refresh', len(texts))))
+
+    def test_coalesce_by_key(self):
+        for i in range(100):
+            self.queue.post('categories', lambda categories: self.calls.append(('categories', categories)), {0: str(i)})
+
+        assert self.queue.run() == 1
+        assert self.calls == [('categories', {0: '99'})]
+        assert self.queue.run() == 0
+
+    def test_text_changes(self):
+        texts = ['a', 'b', 'c']
+        change = lambda texts, text_idx: self.calls.append(('change', text_idx))
+        self.queue.post_text_change(change, texts, 0)
+        self.queue.post_text_change(change, texts, 2)
+
+        self.queue.run()
+        assert self.calls == [('change', 0), ('change', 2)]
+
+    def test_text_changes_collapse_into_refresh(self):
+        texts = ['a'] * 1000
+        change = lambda texts, text_idx: self.calls.append(('change', text_idx))
+        for i in range(100):
+            self.queue.post_text_change(change, texts, i)
+
+        self.queue.run()
+        assert self.calls == [('refresh', 1000)]
+
+        # изменения после запланированной полной перерисовки в неё и входят
+        self.calls.clear()
+        self.queue.post_texts(texts)
+        self.queue.post_text_change(change, texts, 0)
+        self.queue.run()
+        assert self.calls == [('refresh', 1000)]
+
+    def test_latency_stats(self):
+        self.queue.post_texts(['a'])
+        self.queue.post_texts(['a', 'b'])
+        self.queue.run()
+
+        stats = self.queue.get_latency_stats()
+        assert stats['posted'] == 2
+        assert stats['painted'] == 1
+        assert stats['max_ms'] >= stats['mean_ms'] >= 0
+
+
+class TestTextRenderCache(unittest.TestCase):
+    def test_render(self):
+        assert TextRenderCache.render('') == ('',)
+        assert TextRenderCache.render('a\r\nb') == ('a\nb',)
+
+        text = ' '.join(f'word{word_id}' for word_id in range(10000))
+        chunks = TextRenderCache.render(text)
+        assert len(chunks) > 1
+        assert ''.join(chunks) == text
+        # слова не разрываются между кусками
+        assert all(chunk.endswith(' ') for chunk in chunks[:-1])
+        assert all(len(chunk) <= TextRenderCache.CHUNK_SIZE for chunk in chunks)
+
+    def test_lru_by_bytes(self):
+        texts = [TextInfo(text=str(text_id) * 1000) for text_id in range(10)]
+        entry_size = sys.getsizeof(texts[1].text)
+        cache = TextRenderCache(budget_bytes=entry_size * 3)
+
+        for text_idx in (1, 2, 3):
+            cache.get(texts, text_idx)
+        cache.get(texts, 1)
+        cache.get(texts, 4)
+        assert list(cache.chunks.entries) == [3, 1, 4]
+        assert cache.chunks.size_bytes <= cache.chunks.budget_bytes
+        assert cache.get_stats()['hits'] == 1
+
+        # текст больше всего бюджета показывается, но не кешируется
+        huge = [TextInfo(text='x' * entry_size * 4)]
+        assert cache.get(huge, 0) == TextRenderCache.render(huge[0].text)
+        assert 0 not in cache.chunks
+
+        cache.clear()
+        assert cache.get_stats() == {'entries': 0, 'bytes': 0, 'hits': 1, 'misses': 5}
+
+    def test_prefetch(self):
+        texts = [TextInfo(text=f'text{text_id}') for text_id in range(10)]
+        cache = TextRenderCache()
+        cache.prefetch(texts, [3, 2, 4])
+        deadline = time.monotonic() + 5
+        while len(cache.chunks.entries) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert set(cache.chunks.entries) == {2, 3, 4}
+
+        assert cache.get(texts, 3) == ('text3',)
+        assert cache.chunks.hits == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
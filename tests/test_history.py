@@ -1,31 +1,52 @@
 import unittest
 
-from text_label.history import History
+from text_label.history import History, MarkText
 
 
 class TestHistory(unittest.TestCase):
     def test_initial_state(self):
-        h = History(initial_state=1)
-        assert h.states == [1]
-        assert h.get_current_state() == 1
-
-    def test_add_state(self):
-        h = History(initial_state=1)
-        h.add_state(2)
-        assert h.get_current_state() == 2
-        assert h.states == [1, 2]
-
-    def test_rollback_state(self):
-        h = History(initial_state=1)
-        h.add_state(2)
-        assert h.get_current_state() == 2
-        assert h.rollback_state() == 2
-        assert h.get_current_state() == 1
-        assert h.states == [1]
-
-        assert h.rollback_state() == 1
-        assert h.get_current_state() == 1
-        assert h.states == [1]
+        h = History()
+        assert len(h.undo_operations) == 0
+        assert len(h.redo_operations) == 0
+        assert h.can_undo() is False
+        assert h.can_redo() is False
+
+    def test_add_operation(self):
+        h = History()
+        h.add_operation(MarkText(text_id=0, prev_category_id=None, category_id=1))
+        assert h.can_undo() is True
+        assert list(h.undo_operations) == [MarkText(text_id=0, prev_category_id=None, category_id=1)]
+
+    def test_rollback_operation(self):
+        h = History()
+        h.add_operation(MarkText(text_id=0, prev_category_id=None, category_id=1))
+        assert h.rollback_operation() == MarkText(text_id=0, prev_category_id=None, category_id=1)
+        assert h.can_undo() is False
+        assert h.can_redo() is True
+
+        assert h.rollback_operation() is None
+
+    def test_redo_operation(self):
+        h = History()
+        h.add_operation(MarkText(text_id=0, prev_category_id=None, category_id=1))
+        h.rollback_operation()
+        assert h.redo_operation() == MarkText(text_id=0, prev_category_id=None, category_id=1)
+        assert h.can_undo() is True
+        assert h.redo_operation() is None
+
+    def test_add_operation_clears_redo(self):
+        h = History()
+        h.add_operation(MarkText(text_id=0, prev_category_id=None, category_id=1))
+        h.rollback_operation()
+        h.add_operation(MarkText(text_id=0, prev_category_id=None, category_id=2))
+        assert h.can_redo() is False
+
+    def test_max_depth(self):
+        h = History(max_depth=2)
+        for i in range(5):
+            h.add_operation(MarkText(text_id=i, prev_category_id=None, category_id=1))
+
+        assert [op.text_id for op in h.undo_operations] == [3, 4]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,52 @@
+import os.path
+import subprocess
+import sys
+import unittest
+
+
+PATH_TO_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestImportTime(unittest.TestCase):
+    # с запасом на медленные CI, локально импорт занимает ~25 мс
+    MAX_IMPORT_MS = 150
+
+    @staticmethod
+    def _import(module: str) -> tuple[set[str], float]:
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                env={**os.environ, 'PYTHONPATH': PATH_TO_PACKAGE_ROOT},
+                                capture_output=True, text=True, check=True)
+        modules, total_us = set(), 0
+        for line in result.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            modules.add(name.strip())
+            # верхний уровень без отступа; модули самого интерпретатора (site, encodings) не считаем
+            if name.startswith(' text_label'):
+                total_us += int(cumulative)
+        return modules, total_us / 1000
+
+    def test_library_modules_do_not_import_gui(self):
+        for module in ('text_label.project', 'text_label.cli', 'text_label.main', 'text_label.exporters.registry',
+                       'text_label.exporters.text_directory', 'text_label.exporters.archive',
+                       'text_label.exporters.jsonl_shards', 'text_label.exporters.csv_shards'):
+            modules, _ = self._import(module)
+            assert 'tkinter' not in modules, module
+            assert 'miros' not in modules, module
+
+    def test_exporters_are_not_imported_at_startup(self):
+        modules, _ = self._import('text_label.main')
+        assert not any(module.startswith('text_label.exporters') for module in modules)
+
+    # замер времени зависит от машины и её загрузки, поэтому только по запросу, как и бенчмарки
+    @unittest.skipUnless(os.environ.get('RUN_BENCHMARKS'), 'set RUN_BENCHMARKS=1 to measure import time')
+    def test_import_time(self):
+        for module in ('text_label.project', 'text_label.cli'):
+            _, import_ms = self._import(module)
+            assert import_ms < self.MAX_IMPORT_MS, f'{module}: {import_ms:.0f} ms'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import json
+import pathlib
+import tempfile
+import unittest
+
+from text_label.project import Project
+from text_label.importers.corpus import CorpusImporter
+
+
+class TestCorpusImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path_to_dir = pathlib.Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_import_jsonl(self):
+        path_to_file = self.path_to_dir / 'corpus.jsonl'
+        lines = [
+            json.dumps({'text': 'a', 'label': 'pos'}),
+            json.dumps({'text': 'b'}),
+            '',
+            json.dumps('c'),
+            '{broken',
+            json.dumps({'text': 'a', 'label': 'neg'}),
+            json.dumps({'label': 'neg'}),
+        ]
+        path_to_file.write_text('\n'.join(lines), encoding='utf-8')
+
+        batches = list(CorpusImporter(batch_size=2).import_batches(path_to_file))
+
+        assert [text for batch in batches for text in batch.texts] == ['a', 'b', 'c']
+        assert [category for batch in batches for category in batch.categories] == ['pos', None, None]
+        assert sum(batch.duplicates for batch in batches) == 1
+        assert len([error for batch in batches for error in batch.errors]) == 2
+        assert batches[-1].done == batches[-1].total == path_to_file.stat().st_size
+
+    def test_import_csv(self):
+        path_to_file = self.path_to_dir / 'corpus.csv'
+        path_to_file.write_text('id,text,label\n1,"multi\nline",pos\n2,b,\n3,"с, запятой",neg\n', encoding='utf-8')
+
+        batches = list(CorpusImporter().import_batches(path_to_file))
+
+        assert batches[0].texts == ['multi\nline', 'b', 'с, запятой']
+        assert batches[0].categories == ['pos', None, 'neg']
+
+    def test_import_csv_long_field(self):
+        path_to_file = self.path_to_dir / 'corpus.csv'
+        path_to_file.write_text(f'text,label\n"{"a" * 200_000}",pos\n', encoding='utf-8')
+
+        batches = list(CorpusImporter().import_batches(path_to_file))
+
+        assert len(batches[0].texts[0]) == 200_000
+
+    def test_run_in_background_reports_any_error(self):
+        class BrokenImporter(CorpusImporter):
+            def import_batches(self, source):
+                raise RuntimeError('broken source')
+                yield
+
+        summaries = []
+        BrokenImporter().run_in_background('corpus.jsonl', on_batch=lambda batch: None, on_done=summaries.append).join()
+
+        assert len(summaries) == 1
+        assert summaries[0].errors == [('corpus.jsonl', 'broken source')]
+
+    def test_import_csv_without_text_column(self):
+        path_to_file = self.path_to_dir / 'corpus.csv'
+        path_to_file.write_text('id,body\n1,a\n', encoding='utf-8')
+
+        with self.assertRaises(ValueError):
+            list(CorpusImporter().import_batches(path_to_file))
+
+    def test_known_hashes(self):
+        path_to_file = self.path_to_dir / 'corpus.jsonl'
+        path_to_file.write_text('"a"\n"b"\n', encoding='utf-8')
+
+        batches = list(CorpusImporter(known_hashes=CorpusImporter.hash_texts(['a'])).import_batches(path_to_file))
+
+        assert batches[0].texts == ['b']
+        assert batches[0].duplicates == 1
+
+    def test_add_texts_with_categories(self):
+        project = Project(categories={0: 'pos'}, data=[['x', 0]])
+        project.add_texts(['a', 'b', 'c'], ['neg', 'pos', None])
+
+        assert project.categories == {0: 'pos', 1: 'neg'}
+        assert [text_info.category_id for text_info in project.get_texts()] == [0, 1, 0, None]
+        assert project.get_text_ids_of_category(0) == [0, 2]
+
+        # новые категории откатываются вместе с текстами
+        project.undo()
+        assert project.categories == {0: 'pos'}
+        assert len(project.get_texts()) == 1
+
+    def test_import_in_batches(self):
+        path_to_file = self.path_to_dir / 'corpus.jsonl'
+        with open(path_to_file, mode='w', encoding='utf-8') as file_handle:
+            for idx in range(200_000):
+                file_handle.write(json.dumps({'text': f'text number {idx}', 'label': f'cat{idx % 5}'}) + '\n')
+
+        project = Project()
+        batch_sizes = []
+        for batch in CorpusImporter().import_batches(path_to_file):
+            project.add_texts(batch.texts, batch.categories)
+            batch_sizes.append(len(batch.texts))
+
+        assert len(project.get_texts()) == 200_000
+        assert len(project.categories) == 5
+        # корпус идёт пачками, а не читается в память целиком
+        assert max(batch_sizes) == CorpusImporter.BATCH_SIZE
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import pathlib
+import tempfile
+import unittest
+
+from text_label.importers.directory import DirectoryImporter
+
+
+class TestDirectoryImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path_to_dir = pathlib.Path(self.tmpdir.name)
+        (self.path_to_dir / 'nested').mkdir()
+        for idx in range(5):
+            (self.path_to_dir / f'{idx}.txt').write_text(f'text {idx}', encoding='utf-8')
+        (self.path_to_dir / 'nested' / '5.txt').write_text('text 5', encoding='utf-8')
+        (self.path_to_dir / 'skip.md').write_text('not a text', encoding='utf-8')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_find_files(self):
+        paths = DirectoryImporter.find_files(self.path_to_dir)
+        assert [path.name for path in paths] == ['0.txt', '1.txt', '2.txt', '3.txt', '4.txt', '5.txt']
+
+        paths = DirectoryImporter.find_files(str(self.path_to_dir / '*.md'))
+        assert [path.name for path in paths] == ['skip.md']
+
+    def test_iter_batches(self):
+        importer = DirectoryImporter(max_workers=2, batch_size=4)
+        batches = list(importer.iter_batches(importer.find_files(self.path_to_dir)))
+
+        assert [batch.done for batch in batches] == [4, 6]
+        assert all(batch.total == 6 for batch in batches)
+        assert [text for batch in batches for text in batch.texts] == [f'text {idx}' for idx in range(6)]
+
+    def test_unreadable_files_are_reported(self):
+        (self.path_to_dir / 'broken.txt').write_bytes(b'\xff\xfe\xfa')
+        importer = DirectoryImporter(max_workers=2, batch_size=100)
+        batches = list(importer.iter_batches(importer.find_files(self.path_to_dir)))
+
+        assert len(batches[0].texts) == 6
+        assert len(batches[0].errors) == 1
+        assert batches[0].errors[0][0].endswith('broken.txt')
+
+    def test_run_in_background(self):
+        importer = DirectoryImporter(max_workers=2, batch_size=2)
+        batches, summaries = [], []
+        importer.run_in_background(self.path_to_dir, on_batch=batches.append, on_done=summaries.append).join()
+
+        assert len(batches) == 3
+        assert summaries[0].texts == 6
+        assert not summaries[0].cancelled
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import sys
+import unittest
+
+from text_label.lru_cache import LruCache
+
+
+class TestLruCache(unittest.TestCase):
+    def test_lru_by_bytes(self):
+        entry_size = sys.getsizeof('a' * 1000)
+        cache = LruCache(budget_bytes=entry_size * 2)
+        cache.put(('f', 0), 'a' * 1000)
+        cache.put(('f', 1), 'b' * 1000)
+        assert cache.get(('f', 0)) == 'a' * 1000
+        cache.put(('f', 2), 'c' * 1000)
+        assert list(cache.entries) == [('f', 0), ('f', 2)]
+        assert cache.get(('f', 1)) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        cache.put(('f', 3), 'd' * entry_size * 2)
+        assert ('f', 3) not in cache
+        assert cache.size_bytes <= cache.budget_bytes
+
+        cache.clear()
+        assert cache.get_stats() == {'entries': 0, 'bytes': 0, 'hits': 1, 'misses': 1}
+
+    def test_get_size(self):
+        cache = LruCache(budget_bytes=10, get_size=len)
+        cache.put('a', 'x' * 6)
+        cache.put('b', 'y' * 4)
+        assert cache.size_bytes == 10
+        cache.put('a', 'x' * 2)
+        assert list(cache.entries) == ['b', 'a']
+        assert cache.size_bytes == 6
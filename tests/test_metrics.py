@@ -0,0 +1,81 @@
+import json
+import pathlib
+import tempfile
+import time
+import unittest
+
+from text_label.bus import Bus
+from text_label.gui import TestableGui
+from text_label.metrics import Histogram, Metrics
+from text_label.project import Project
+from text_label.statechart import Statechart
+
+
+class TestHistogram(unittest.TestCase):
+    def test_observe(self):
+        histogram = Histogram()
+        for value in (0.01, 0.3, 0.3, 4, 20000):
+            histogram.observe(value)
+        stats = histogram.to_dict()
+        assert stats['count'] == 5
+        assert stats['max'] == 20000
+        assert stats['p50'] == 0.5
+        assert stats['p95'] == 20000
+        assert stats['buckets'] == {'<=0.05': 1, '<=0.5': 2, '<=5': 1, '>': 1}
+
+    def test_empty(self):
+        assert Histogram().to_dict()['p95'] == 0.0
+
+
+class TestMetrics(unittest.TestCase):
+    def test_instrument_project(self):
+        metrics = Metrics()
+        project = Project()
+        metrics.instrument_project(project)
+        project.add_text('text1')
+        project.add_text('text2')
+        project.get_texts()
+        assert metrics.snapshot()['histograms']['project.add_text.ms']['count'] == 2
+        assert metrics.snapshot()['histograms']['project.get_texts.ms']['count'] == 1
+
+        # выключенные метрики не оставляют обёрток
+        metrics.disable()
+        assert 'add_text' not in vars(project)
+        project.add_text('text3')
+        assert metrics.snapshot()['histograms']['project.add_text.ms']['count'] == 2
+
+    def test_statechart(self):
+        bus = Bus()
+        metrics = Metrics()
+        bus.register('metrics', metrics)
+        statechart = Statechart(name='statechart', bus=bus)
+        TestableGui(bus=bus)
+        metrics.enable(bus)
+
+        statechart.run()
+        statechart.launch_new_project_event()
+        statechart.launch_add_category_event('cat1')
+        statechart.launch_import_text_from_input('text1')
+        time.sleep(0.1)
+        statechart.stop()
+
+        snapshot = metrics.snapshot(bus)
+        assert snapshot['counters']['statechart.events.ADD_CATEGORY'] == 1
+        assert snapshot['histograms']['statechart.dwell.ms']['count'] >= 3
+        assert snapshot['histograms']['statechart.queue_depth']['count'] >= 3
+        assert snapshot['histograms']['statechart.on_add_category_in_in_project.ms']['count'] == 1
+        # новый проект тоже замеряется
+        assert snapshot['histograms']['project.add_text.ms']['count'] == 1
+
+        metrics.disable()
+        assert 'dispatch' not in vars(statechart)
+        assert 'add_text' not in vars(statechart.project)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            metrics.dump(pathlib.Path(tmpdir, 'metrics.json'), bus)
+            with open(pathlib.Path(tmpdir, 'metrics.json'), encoding='utf-8') as dump_handle:
+                assert json.load(dump_handle)['counters'] == snapshot['counters']
+
+
+if __name__ == '__main__':
+    unittest.main()
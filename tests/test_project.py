@@ -5,6 +5,7 @@ import pathlib
 import os.path
 
 from text_label.project import Project
+from text_label.project_journal import ProjectJournal
 from text_label.text_info import TextInfo
 
 
@@ -90,6 +91,31 @@ class TestProject(unittest.TestCase):
         assert len(project.get_texts()) == 3
         assert len(project.get_texts(0)) == 1
 
+    def test_get_text_ids_of_category(self):
+        path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        project = Project.load_project_from_path(path_to_project)
+
+        assert project.get_text_ids_of_category(0) == [0]
+        assert project.get_text_ids_of_category(None) == [1]
+        assert project.count_texts_of_category(1) == 1
+
+        project.mark_text(1, 0)
+        project.remove_text(0)
+        project.add_text('text4')
+        assert project.get_text_ids_of_category(0) == [0]
+        assert project.get_text_ids_of_category(1) == [1]
+        assert project.get_text_ids_of_category(None) == [2]
+        assert project.get_texts(0) == [TextInfo('text2', category_id=0)]
+
+        project.remove_category(0)
+        assert project.get_text_ids_of_category(None) == [0, 2]
+
+        for _ in range(4):
+            project.undo()
+        assert project.get_text_ids_of_category(0) == [0]
+        assert project.get_text_ids_of_category(1) == [2]
+        assert project.get_text_ids_of_category(None) == [1]
+
     def test_save_project(self):
         path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
         project = Project.load_project_from_path(path_to_project)
@@ -116,6 +142,291 @@ class TestProject(unittest.TestCase):
 
         assert project.data == expected_data
 
+    def test_mark_texts(self):
+        project = Project(categories={0: 'cat1', 1: 'cat2'}, data=[['text1', 0], ['text2'], ['text3', 1], ['text4']])
+        assert project.mark_texts([3, 0, 2, 1], 1) == [0, 1, 3]
+        assert [text_info.category_id for text_info in project.data] == [1, 1, 1, 1]
+        assert project.get_text_ids_of_category(1) == [0, 1, 2, 3]
+        assert len(project.history.undo_operations) == 1
+
+        assert project.mark_texts([0, 1], 1) == []
+        assert len(project.history.undo_operations) == 1
+
+        project.undo()
+        assert [text_info.category_id for text_info in project.data] == [0, None, 1, None]
+        assert project.get_text_ids_of_category(None) == [1, 3]
+        project.redo()
+        assert project.get_text_ids_of_category(None) == []
+
+    def test_mark_texts_moves_in_bulk(self):
+        project = Project(categories={0: 'cat1'}, data=[[f'text{text_id}'] for text_id in range(50_000)])
+        text_ids = list(range(0, 50_000, 10))
+        single_moves = []
+        for name in ('add', 'discard'):
+            method = getattr(project.category_index, name)
+            setattr(project.category_index, name, lambda *args, method=method: single_moves.append(args) or method(*args))
+
+        # списки категорий пересобираются один раз, а не по вставке на каждый текст
+        project.mark_texts(text_ids, 0)
+        assert project.get_text_ids_of_category(0) == text_ids
+        project.undo()
+        assert project.count_texts_of_category(None) == 50_000
+        assert single_moves == []
+
+    def test_undo_redo(self):
+        path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        project = Project.load_project_from_path(path_to_project)
+
+        project.mark_text(1, 1)
+        project.remove_text(0)
+        project.add_text('text4')
+        project.remove_category(1)
+        assert project.categories == {0: 'cat1'}
+        assert project.data == [TextInfo('text2'), TextInfo('text3'), TextInfo('text4')]
+
+        for _ in range(4):
+            project.undo()
+        assert project.categories == {0: 'cat1', 1: 'cat2'}
+        assert project.data == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1)]
+        assert project.undo() is None
+
+        for _ in range(4):
+            project.redo()
+        assert project.categories == {0: 'cat1'}
+        assert project.data == [TextInfo('text2'), TextInfo('text3'), TextInfo('text4')]
+        assert project.redo() is None
+
+    def test_undo_remove_category_keeps_order(self):
+        project = Project(categories={0: 'cat1', 1: 'cat2'})
+        project.remove_category(0)
+        project.undo()
+        assert list(project.categories.items()) == [(0, 'cat1'), (1, 'cat2')]
+
+        project.add_category('cat3')
+        assert project.categories == {0: 'cat1', 1: 'cat2', 2: 'cat3'}
+
+    def test_add_texts(self):
+        project = Project()
+        project.add_text('0')
+        assert project.add_texts(['1', '2', '3']) == range(1, 4)
+        assert [text_info.text for text_info in project.get_texts()] == ['0', '1', '2', '3']
+
+        # вся пачка отменяется одним шагом
+        project.undo()
+        assert [text_info.text for text_info in project.get_texts()] == ['0']
+        project.redo()
+        assert [text_info.text for text_info in project.get_texts()] == ['0', '1', '2', '3']
+
+        assert project.add_texts([]) == range(4, 4)
+
+    def test_get_name(self):
+        project = Project(categories={0: 'cat1'}, data=[['text1', 0], ['text2']])
+        name = project.get_name()
+
+        project.mark_text(1, 0)
+        project.add_text('text3')
+        assert project.get_name() != name
+
+        project.undo()
+        project.undo()
+        assert project.get_name() == name
+        assert Project(categories={0: 'cat1'}, data=[['text1', 0], ['text2']]).get_name() == name
+
+        # имя зависит от содержимого, а не от истории изменений
+        other = Project()
+        other.add_text('text2')
+        other.add_category('cat1')
+        other.add_text('text1')
+        other.mark_text(1, 0)
+        assert other.get_name() == name
+
+    def test_get_name_is_stable_across_save_and_load(self):
+        project = Project(categories={0: 'cat1'}, data=[['text1', 0], ['text2']])
+        name = project.get_name()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for file_name in ('project.json.tl', 'project.jsonl.tl', 'project.sqlite.tl'):
+                path_to_project = pathlib.Path(tmpdir, file_name)
+                project.save_project(path_to_project)
+                loaded = Project.load_project_from_path(path_to_project)
+                assert loaded.get_name() == name, file_name
+                if hasattr(loaded, 'close'):
+                    loaded.close()
+
+    def test_history_depth(self):
+        project = Project(history_depth=2)
+        for i in range(5):
+            project.add_text(f'text{i}')
+
+        assert project.undo() is not None
+        assert project.undo() is not None
+        assert project.undo() is None
+        assert project.data == [TextInfo('text0'), TextInfo('text1'), TextInfo('text2')]
+
+    def test_save_project_log(self):
+        path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        project = Project.load_project_from_path(path_to_project)
+
+        path_to_temp_project_file = pathlib.Path(tempfile.mktemp(suffix='.jsonl.tl'))
+        project.save_project(path_to_temp_project_file)
+        assert project.log_size == 5
+
+        loaded_project = Project.load_project_from_path(path_to_temp_project_file)
+        assert loaded_project.categories == project.categories
+        assert loaded_project.data == project.data
+
+    def test_save_project_log_appends_changes(self):
+        path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        project = Project.load_project_from_path(path_to_project)
+
+        path_to_temp_project_file = pathlib.Path(tempfile.mktemp(suffix='.jsonl.tl'))
+        project.save_project(path_to_temp_project_file)
+        with open(path_to_temp_project_file, encoding='utf-8') as handle:
+            lines_before = len(handle.readlines())
+
+        project.mark_text(1, 1)
+        project.remove_text(0)
+        project.add_text('text4')
+        project.remove_category(0)
+        project.undo()
+        project.save_project(path_to_temp_project_file)
+        with open(path_to_temp_project_file, encoding='utf-8') as handle:
+            lines_after = len(handle.readlines())
+
+        assert lines_after - lines_before == len(['mark', 'remove', 'add', 'remove_category', 'undo_remove_category'])
+
+        loaded_project = Project.load_project_from_path(path_to_temp_project_file)
+        assert loaded_project.categories == {0: 'cat1', 1: 'cat2'}
+        assert loaded_project.data == [TextInfo('text2', category_id=1), TextInfo('text3', category_id=1), TextInfo('text4')]
+
+    def test_changes_recorded_only_when_needed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            project = Project()
+            project.add_text('text1')
+            assert project.unsaved_changes == []
+
+            # файл проекта переписывается целиком, журнала нет
+            project.save_project(pathlib.Path(tmpdir, 'project.json.tl'))
+            project.mark_text(0, None)
+            assert project.unsaved_changes == []
+
+            project.enable_journal()
+            project.add_text('text2')
+            assert len(project.unsaved_changes) == 1
+
+            project.close()
+            project.save_project(pathlib.Path(tmpdir, 'project.jsonl.tl'))
+            project.remove_text(1)
+            assert len(project.unsaved_changes) == 1
+
+    def test_save_project_log_compaction(self):
+        project = Project()
+        project.add_text('text1')
+        project.LOG_COMPACTION_MIN_RECORDS = 0
+
+        path_to_temp_project_file = pathlib.Path(tempfile.mktemp(suffix='.jsonl.tl'))
+        project.save_project(path_to_temp_project_file)
+        for _ in range(3):
+            project.mark_text(0, None)
+        project.save_project(path_to_temp_project_file)
+
+        assert project.log_size == 1
+        assert Project.load_project_from_path(path_to_temp_project_file).data == [TextInfo('text1')]
+
+    def test_journal_replayed_after_crash(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path_to_temp_project_file = pathlib.Path(tmpdir, 'project.json.tl')
+            project = Project()
+            project.add_category('cat1')
+            project.add_text('text1')
+            project.save_project(path_to_temp_project_file)
+            project.enable_journal()
+
+            project.add_texts(['text2', 'text3'], ['cat2', None])
+            project.mark_text(0, 0)
+            project.remove_text(2)
+            # процесс упал, не сохранив проект и не закрыв журнал
+
+            loaded_project = Project.load_project_from_path(path_to_temp_project_file)
+            assert loaded_project.categories == {0: 'cat1', 1: 'cat2'}
+            assert loaded_project.data == [TextInfo('text1', category_id=0), TextInfo('text2', category_id=1)]
+            assert len(loaded_project.unsaved_changes) == 5
+
+            loaded_project.save_project(path_to_temp_project_file)
+            assert not ProjectJournal.get_path(path_to_temp_project_file).exists()
+            assert Project.load_project_from_path(path_to_temp_project_file).data == loaded_project.data
+
+    def test_journal_ignored_after_save(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path_to_temp_project_file = pathlib.Path(tmpdir, 'project.json.tl')
+            project = Project()
+            project.add_text('text1')
+            project.save_project(path_to_temp_project_file)
+            project.enable_journal()
+            project.add_text('text2')
+            project.save_project(path_to_temp_project_file)
+            project.add_text('text3')
+            project.close()
+
+            loaded_project = Project.load_project_from_path(path_to_temp_project_file)
+            assert loaded_project.data == [TextInfo('text1'), TextInfo('text2'), TextInfo('text3')]
+
+            # файл проекта заменили без журнала, старый журнал к нему уже не относится
+            Project(data=[['other']]).save_project(path_to_temp_project_file.with_suffix('.tmp'))
+            os.replace(path_to_temp_project_file.with_suffix('.tmp'), path_to_temp_project_file)
+            assert Project.load_project_from_path(path_to_temp_project_file).data == [TextInfo('other')]
+
+    def test_autosave_compacts_journal(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path_to_temp_project_file = pathlib.Path(tmpdir, 'project.json.tl')
+            project = Project()
+            project.LOG_COMPACTION_RATIO = 1
+            project.LOG_COMPACTION_MIN_RECORDS = 0
+            project.add_text('text1')
+            project.save_project(path_to_temp_project_file)
+            project.enable_journal()
+
+            project.mark_text(0, None)
+            assert not project.autosave()
+            assert project.journal.records == 1
+            with open(path_to_temp_project_file, encoding='utf-8') as handle:
+                saved_before = handle.read()
+
+            project.add_category('cat1')
+            project.mark_text(0, 0)
+            assert project.autosave()
+            assert project.journal.records == 0
+            assert project.history.can_undo()
+            with open(path_to_temp_project_file, encoding='utf-8') as handle:
+                assert handle.read() != saved_before
+            assert Project.load_project_from_path(path_to_temp_project_file).data == project.data
+            project.close()
+
+    def test_save_project_is_atomic(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path_to_temp_project_file = pathlib.Path(tmpdir, 'project.json.tl')
+            project = Project(data=[['text1']])
+            project.save_project(path_to_temp_project_file)
+
+            project.data.append(TextInfo(text=object()))
+            with self.assertRaises(TypeError):
+                project.save_project(path_to_temp_project_file)
+            assert os.listdir(tmpdir) == ['project.json.tl']
+            assert Project.load_project_from_path(path_to_temp_project_file).data == [TextInfo('text1')]
+
+    def test_snapshot_is_not_changed_by_edits(self):
+        project = Project(categories={0: 'cat1'}, data=[['text1', 0], ['text2'], ['text3']])
+        snapshot = project.make_snapshot()
+        name = project.get_name()
+
+        project.mark_text(1, 0)
+        project.remove_text(0)
+        project.add_category('cat2')
+        project.add_text('text4')
+        assert snapshot.categories == {0: 'cat1'}
+        assert snapshot.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3')]
+        assert snapshot.get_text_ids_of_category(0) == [0]
+        assert snapshot.get_name() == name
+
 
 if __name__ == '__main__':
     unittest.main()
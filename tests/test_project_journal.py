@@ -0,0 +1,54 @@
+import pathlib
+import tempfile
+import unittest
+
+from text_label.project_journal import ProjectJournal
+from text_label.project_log import ProjectLog
+
+
+class TestProjectJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path_to_project = pathlib.Path(self.tmpdir.name, 'project.json.tl')
+        self.path_to_project.write_text('{}', encoding='utf-8')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_create_write_read(self):
+        assert ProjectJournal.read_records(self.path_to_project) is None
+
+        journal = ProjectJournal.create(self.path_to_project, [ProjectLog.make_add_category_record(0, 'cat1')])
+        journal.write(ProjectLog.make_remove_text_record(3))
+        journal.flush()
+        assert journal.records == 2
+        assert ProjectJournal.read_records(self.path_to_project) == [
+            {'op': 'add_category', 'category_id': 0, 'category': 'cat1'},
+            {'op': 'remove_text', 'text_id': 3},
+        ]
+        journal.close()
+
+    def test_torn_tail(self):
+        journal = ProjectJournal.create(self.path_to_project)
+        journal.write(ProjectLog.make_remove_text_record(1))
+        journal.handle.write('{"op": "remove_te')
+        journal.close()
+        assert ProjectJournal.read_records(self.path_to_project) == [{'op': 'remove_text', 'text_id': 1}]
+
+    def test_other_base(self):
+        ProjectJournal.create(self.path_to_project, [ProjectLog.make_remove_text_record(1)]).close()
+        self.path_to_project.write_text('{"changed": true}', encoding='utf-8')
+        assert ProjectJournal.read_records(self.path_to_project) is None
+
+        ProjectJournal.remove(self.path_to_project)
+        assert not ProjectJournal.get_path(self.path_to_project).exists()
+
+    def test_sync_is_batched(self):
+        journal = ProjectJournal.create(self.path_to_project)
+        synced_at = journal.synced_at
+        journal.write(ProjectLog.make_remove_text_record(1))
+        journal.flush()
+        assert journal.synced_at == synced_at
+        journal.flush(sync=True)
+        assert journal.synced_at > synced_at
+        journal.close()
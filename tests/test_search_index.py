@@ -0,0 +1,116 @@
+import random
+import unittest
+
+from text_label import gap_keys
+from text_label.search_index import SearchIndex
+from text_label.project import Project
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.texts = ['Привет, мир', 'hello world', 'Hello there', 'world of texts', 'labelling texts']
+        self.index = SearchIndex(self.texts)
+
+    def search(self, query: str, text_ids=None, limit=None):
+        return self.index.search(query, text_ids, get_text=lambda text_id: self.texts[text_id], limit=limit)
+
+    def test_tokens(self):
+        assert self.search('hello') == [1, 2]
+        assert self.search('HELLO ') == [1, 2]
+        assert self.search('мир') == [0]
+        assert self.search('world texts') == [3]
+        assert self.search('missing world') == []
+        assert self.search('') == [0, 1, 2, 3, 4]
+
+    def test_prefix(self):
+        assert self.search('hel') == [1, 2]
+        assert self.search('tex') == [3, 4]
+        assert self.search('world tex') == [3]
+        # короткий префикс ищется как целое слово
+        assert self.search('he') == []
+        assert self.search('hel ') == []
+
+    def test_text_ids(self):
+        assert self.search('texts', [0, 4]) == [4]
+        assert self.search('', [2, 3]) == [2, 3]
+
+    def test_insert_remove(self):
+        self.texts.insert(1, 'another world')
+        self.index.insert(1, 'another world')
+        assert self.search('world') == [1, 2, 4]
+
+        self.index.remove(0, self.texts.pop(0))
+        assert self.search('world') == [0, 1, 3]
+        assert self.search('мир') == []
+
+    def test_limit(self):
+        assert self.search('world', limit=2) == [1, 3]
+        assert self.search('tex', limit=1) == [3]
+        assert self.search('', limit=3) == [0, 1, 2]
+        assert self.search('texts', [0, 4], limit=1) == [4]
+
+    def test_prefix_after_insert_remove(self):
+        # словарь для префиксов уже построен и дальше обновляется вставками
+        assert self.search('hel') == [1, 2]
+        self.texts.append('helium balloon')
+        self.index.insert(len(self.texts) - 1, 'helium balloon')
+        assert self.search('hel') == [1, 2, 5]
+        assert self.search('ball') == [5]
+        self.index.remove(5, self.texts.pop())
+        assert self.search('ball') == []
+        assert self.index.sorted_tokens == sorted(self.index.postings)
+
+    def test_renumber(self):
+        # вставки в одно и то же место исчерпывают промежуток между uid
+        for _ in range(gap_keys.GAP.bit_length() + 5):
+            self.texts.insert(1, 'inserted')
+            self.index.insert(1, 'inserted')
+        assert self.search('hello') == [len(self.texts) - 4, len(self.texts) - 3]
+        assert self.search('inserted') == list(range(1, len(self.texts) - 4))
+        assert list(self.index.uids) == sorted(self.index.uids)
+
+
+class TestProjectSearch(unittest.TestCase):
+    def test_search_texts(self):
+        project = Project()
+        project.add_category('cat')
+        project.add_text('a red fox')
+        project.add_text('a grey fox')
+        project.add_text('a red dog')
+        project.mark_text(0, 0)
+
+        assert project.search_texts('fox') == [0, 1]
+        assert project.search_texts('red', category_id=0) == [0]
+        assert project.search_texts('red', only_unlabelled=True) == [2]
+
+        project.remove_text(0)
+        assert project.search_texts('fox') == [0]
+        project.undo()
+        assert project.search_texts('fox') == [0, 1]
+        project.add_text('fox again')
+        assert project.search_texts('fox') == [0, 1, 3]
+
+    def test_query_reads_few_texts(self):
+        rng = random.Random(0)
+        words = [f'w{idx}' for idx in range(2_000)]
+        texts = [' '.join(rng.choices(words, k=20)) for _ in range(20_000)]
+        project = Project()
+        project.add_texts(texts)
+        project.get_search_index()
+        project.remove_text(10_000)
+        project.undo()
+
+        read_text_ids = []
+        index = project.get_search_index()
+        for query in ('w1', 'w1 w2', 'w1 w20', 'w17 w1999', 'w1234 ', 'w17 w19'):
+            read_text_ids.clear()
+            result = index.search(query, get_text=lambda text_id: read_text_ids.append(text_id) or texts[text_id])
+            # целые слова ищутся только по индексу, префикс проверяется не больше чем у MAX_SCANNED_CANDIDATES текстов
+            assert len(read_text_ids) <= SearchIndex.MAX_SCANNED_CANDIDATES, query
+            tokens = SearchIndex.tokenize(query)
+            prefix = tokens.pop() if not query.endswith(' ') and len(tokens[-1]) >= SearchIndex.MIN_PREFIX_LENGTH else None
+            expected = [text_id for text_id, text in enumerate(texts)
+                        if set(tokens) <= set(text.split()) and (prefix is None or any(word.startswith(prefix) for word in text.split()))]
+            assert result == expected, query
+            text_ids = list(range(0, len(texts), 3))
+            assert index.search(query, text_ids, limit=50) == [text_id for text_id in expected if text_id % 3 == 0][:50], query
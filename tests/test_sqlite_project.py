@@ -0,0 +1,152 @@
+import os.path
+import pathlib
+import tempfile
+import unittest
+
+from text_label.project import Project
+from text_label.project_journal import ProjectJournal
+from text_label.sqlite_project import SqliteProject
+from text_label.text_info import TextInfo
+
+
+class TestSqliteProject(unittest.TestCase):
+    def setUp(self):
+        path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        self.path_to_database = pathlib.Path(tempfile.mktemp(suffix='.sqlite.tl'))
+        Project.load_project_from_path(path_to_project).save_project(self.path_to_database)
+
+    def test_load_project(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        assert isinstance(project, SqliteProject)
+
+        assert project.categories == {0: 'cat1', 1: 'cat2'}
+        assert len(project.data) == 3
+        assert project.data[2].category_id == 1
+        assert project.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1)]
+        assert project.get_texts(1) == [TextInfo('text3', category_id=1)]
+
+    def test_journal_after_save_as_database_is_replayed(self):
+        # обычный проект сохранили в базу и правили дальше с журналом, затем процесс упал
+        path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        project = Project.load_project_from_path(path_to_project)
+        path_to_database = pathlib.Path(tempfile.mktemp(suffix='.sqlite.tl'))
+        project.save_project(path_to_database)
+        project.enable_journal()
+        project.mark_text(1, 0)
+        project.add_text('text4')
+        project._flush_journal()
+
+        expected = [TextInfo('text1', category_id=0), TextInfo('text2', category_id=0), TextInfo('text3', category_id=1), TextInfo('text4')]
+        loaded_project = Project.load_project_from_path(path_to_database)
+        assert loaded_project.get_texts() == expected
+        assert not ProjectJournal.get_path(path_to_database).exists()
+        loaded_project.close()
+        # записи перенесены в базу один раз
+        assert Project.load_project_from_path(path_to_database).get_texts() == expected
+
+    def test_mutations_and_undo(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        name = project.get_name()
+
+        project.add_category('cat3')
+        project.mark_text(1, 2)
+        project.remove_text(0)
+        project.add_text('text4')
+        assert project.categories == {0: 'cat1', 1: 'cat2', 2: 'cat3'}
+        assert project.get_texts() == [TextInfo('text2', category_id=2), TextInfo('text3', category_id=1), TextInfo('text4')]
+
+        assert project.get_name() != name
+
+        for _ in range(4):
+            project.undo()
+        assert project.categories == {0: 'cat1', 1: 'cat2'}
+        assert project.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1)]
+        assert project.get_name() == name
+
+    def test_get_text_ids_of_category(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        assert project.get_text_ids_of_category(0) == [0]
+        assert project.get_text_ids_of_category(None) == [1]
+        assert project.count_texts_of_category(None) == 1
+
+        project.remove_text(0)
+        project.remove_category(1)
+        assert project.get_text_ids_of_category(None) == [0, 1]
+        assert project.count_texts_of_category(1) == 0
+
+    def test_mark_texts(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        name = project.get_name()
+        assert project.mark_texts([0, 1, 2], 1) == [0, 1]
+        assert project.get_text_ids_of_category(1) == [0, 1, 2]
+
+        project.undo()
+        assert project.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1)]
+        assert project.get_name() == name
+
+    def test_save_is_commit(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        project.remove_text(0)
+        project.remove_category(1)
+        project.undo()
+        project.remove_text(0)
+        project.add_text('text4')
+        project.save_project(self.path_to_database)
+        project.close()
+
+        project = Project.load_project_from_path(self.path_to_database)
+        assert project.categories == {0: 'cat1', 1: 'cat2'}
+        assert project.get_texts() == [TextInfo('text3', category_id=1), TextInfo('text4')]
+
+    def test_unsaved_changes_are_discarded(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        project.add_text('text4')
+        project.close()
+
+        project = Project.load_project_from_path(self.path_to_database)
+        assert len(project.get_texts()) == 3
+
+    def test_changes_are_not_kept_in_memory(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        project.add_text('text4')
+        project.mark_text(0, 1)
+        project.autosave()
+        assert project.unsaved_changes == []
+        project.close()
+
+    def test_save_as_switches_database(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        project.add_text('text4')
+        path_to_copy = pathlib.Path(tempfile.mktemp(suffix='.sqlite.tl'))
+        project.save_project(path_to_copy)
+        assert project.path_to_project == path_to_copy
+
+        project.remove_text(0)
+        project.autosave()
+        project.close()
+
+        # правки до сохранения уже были в исходной базе, после - идут только в копию
+        assert len(Project.load_project_from_path(path_to_copy).get_texts()) == 3
+        assert len(Project.load_project_from_path(self.path_to_database).get_texts()) == 4
+
+    def test_save_as_other_format_is_a_copy(self):
+        project = Project.load_project_from_path(self.path_to_database)
+        path_to_json = pathlib.Path(tempfile.mktemp(suffix='.json.tl'))
+        project.save_project(path_to_json)
+        assert project.path_to_project == self.path_to_database
+        project.close()
+
+        assert len(Project.load_project_from_path(path_to_json).get_texts()) == 3
+
+    def test_insert_in_the_middle(self):
+        project = SqliteProject(self.path_to_database)
+        for i in range(15):
+            project._insert_text(1, TextInfo(f'inserted{i}'))
+
+        assert project.get_texts()[0] == TextInfo('text1', category_id=0)
+        assert project.get_texts()[1:16] == [TextInfo(f'inserted{i}') for i in reversed(range(15))]
+        assert project.get_texts()[16:] == [TextInfo('text2'), TextInfo('text3', category_id=1)]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import os.path
 import pathlib
+import shutil
 import time
 import unittest
 import tempfile
@@ -37,9 +38,16 @@ class TestStatechart(unittest.TestCase):
         self.statechart.run()
         self.gui.run()
 
-        self.path_to_project = pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl')
+        # загруженный проект ведёт журнал рядом с собой, поэтому работаем с копией
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path_to_project = pathlib.Path(self.tmpdir.name, 'test.json.tl')
+        shutil.copy(pathlib.Path(os.path.dirname(__file__), 'assets', 'test.json.tl'), self.path_to_project)
         self.path_to_file = pathlib.Path(os.path.dirname(__file__), 'assets', 'text.txt')
 
+    def tearDown(self):
+        self.statechart.stop()
+        self.tmpdir.cleanup()
+
     def test_new_project_event(self):
         self.statechart.launch_new_project_event()
         self.statechart.launch_add_category_event('cat1')
@@ -125,6 +133,18 @@ class TestStatechart(unittest.TestCase):
         assert self.statechart.project.categories == {0: 'cat1', 1: 'cat2'}
         assert self.statechart.project.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2', category_id=1), TextInfo('text3', category_id=1)]
 
+    def test_mark_texts_event(self):
+        self.statechart.launch_load_project_event(path_to_project=self.path_to_project)
+        self.statechart.launch_mark_texts_event(text_ids=[0, 1, 2], category_id=1)
+        self.statechart.launch_undo_event()
+        self.statechart.launch_redo_event()
+        time.sleep(0.1)
+
+        assert self.statechart.project.get_texts() == [TextInfo('text1', category_id=1), TextInfo('text2', category_id=1), TextInfo('text3', category_id=1)]
+        self.statechart.launch_undo_event()
+        time.sleep(0.1)
+        assert self.statechart.project.get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2'), TextInfo('text3', category_id=1)]
+
     def test_save_project_event(self):
         path_to_temp_project_file = pathlib.Path(tempfile.mktemp())
 
@@ -222,6 +242,102 @@ class TestStatechart(unittest.TestCase):
 
         self._assert_spy_check(expected_spy, actual_spy)
 
+    def test_import_directory(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for idx in range(1200):
+                pathlib.Path(tmpdir, f'{idx:04d}.txt').write_text(f'text {idx}', encoding='utf-8')
+
+            self.statechart.launch_new_project_event()
+            self.statechart.launch_import_directory_event(tmpdir)
+            # добавление категории во время импорта откладывается до его окончания
+            self.statechart.launch_add_category_event('cat1')
+            time.sleep(1)
+
+        assert self.statechart.importer is None
+        assert self.statechart.project.categories == {0: 'cat1'}
+        assert [text_info.text for text_info in self.statechart.project.get_texts()] == [f'text {idx}' for idx in range(1200)]
+
+        # отменяется добавление категории, затем каждая пачка импорта целиком
+        self.statechart.launch_undo_event()
+        self.statechart.launch_undo_event()
+        time.sleep(0.1)
+        assert self.statechart.project.categories == {}
+        assert len(self.statechart.project.get_texts()) == 1000
+
+    def test_import_directory_skips_duplicates(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for idx in range(10):
+                pathlib.Path(tmpdir, f'{idx}.txt').write_text(f'text {idx % 5}', encoding='utf-8')
+
+            self.statechart.launch_new_project_event()
+            self.statechart.launch_import_text_from_input('text 0')
+            self.statechart.launch_import_directory_event(tmpdir)
+            self.statechart.launch_import_text_from_input('text 1')
+            time.sleep(0.5)
+
+        assert sorted(text_info.text for text_info in self.statechart.project.get_texts()) == [f'text {idx}' for idx in range(5)]
+
+
+    def test_duplicate_text_is_shown_instead_of_added(self):
+        self.addCleanup(setattr, Statechart, 'DUPLICATE_INDEX_STEP', Statechart.DUPLICATE_INDEX_STEP)
+        Statechart.DUPLICATE_INDEX_STEP = 1
+        shown = []
+        self.gui.show_duplicate_text = shown.append
+        self.statechart.launch_load_project_event(path_to_project=self.path_to_project)
+        self.statechart.launch_import_text_from_input('text2')
+        self.statechart.launch_import_text_from_input('text4')
+        time.sleep(0.1)
+
+        assert shown == [1]
+        assert [text_info.text for text_info in self.statechart.project.get_texts()] == ['text1', 'text2', 'text3', 'text4']
+        assert len(self.statechart.project.duplicate_index) == 4
+
+    def test_search_runs_in_statechart(self):
+        results = []
+        self.gui.show_search_results = lambda query, only_unlabelled, text_ids: results.append((query, only_unlabelled, text_ids))
+        self.statechart.launch_load_project_event(path_to_project=self.path_to_project)
+        self.statechart.launch_search_event('text', False)
+        self.statechart.launch_search_event('text3', True)
+        self.statechart.launch_search_event('', True)
+        time.sleep(0.1)
+
+        assert results == [('text', False, [0, 1, 2]), ('text3', True, []), ('', True, [1])]
+
+    def test_save_as_database_switches_to_database(self):
+        from text_label.project import Project
+        from text_label.project_journal import ProjectJournal
+        from text_label.sqlite_project import SqliteProject
+        path_to_database = pathlib.Path(self.tmpdir.name, 'test.sqlite.tl')
+        self.statechart.launch_load_project_event(path_to_project=self.path_to_project)
+        self.statechart.launch_save_project_event(path_to_database)
+        self.statechart.launch_mark_text_event(text_id=1, category_id=0)
+        self.statechart.launch_import_text_from_input('text4')
+        time.sleep(0.1)
+
+        assert isinstance(self.statechart.project, SqliteProject)
+        assert not ProjectJournal.get_path(path_to_database).exists()
+        # правки в базе, а не в журнале; без падения они фиксируются при автосохранении
+        self.statechart.project.autosave()
+        assert Project.load_project_from_path(path_to_database).get_texts() == [TextInfo('text1', category_id=0), TextInfo('text2', category_id=0),
+                                                                                TextInfo('text3', category_id=1), TextInfo('text4')]
+
+    def test_show_export_options_gets_name_from_statechart(self):
+        shown = []
+        self.gui.show_export_options = lambda exporter_name, project_name, project: shown.append((exporter_name, project_name, project))
+        self.statechart.launch_load_project_event(path_to_project=self.path_to_project)
+        self.statechart.launch_show_export_options_event('archive')
+        time.sleep(0.1)
+
+        assert [(exporter_name, project_name) for exporter_name, project_name, _ in shown] == [('archive', self.statechart.project.get_name())]
+        # экспорт получает снимок: правки после открытия окна экспорта его не меняют
+        snapshot = shown[0][2]
+        texts = [TextInfo(text_info.text, text_info.category_id) for text_info in self.statechart.project.get_texts()]
+        self.statechart.launch_mark_text_event(0, 1)
+        self.statechart.launch_remove_text_event(1)
+        time.sleep(0.1)
+        assert snapshot.get_texts() == texts
+        assert snapshot.get_name() == shown[0][1]
+
 
 if __name__ == '__main__':
     unittest.main()
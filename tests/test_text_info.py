@@ -0,0 +1,31 @@
+import tracemalloc
+import unittest
+
+from text_label.text_info import TextInfo
+
+
+class TestTextInfo(unittest.TestCase):
+    def test_no_instance_dict(self):
+        text_info = TextInfo('text1', category_id=0)
+        assert not hasattr(text_info, '__dict__')
+        assert text_info == TextInfo(text='text1', category_id=0)
+
+    def test_memory_per_item(self):
+        items_count = 100_000
+        texts = [f'text{i}' for i in range(items_count)]
+
+        tracemalloc.start()
+        try:
+            data = [TextInfo(text=text, category_id=i % 10) for i, text in enumerate(texts)]
+            allocated, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # экземпляр со слотами занимает 48 байт + 8 байт на ссылку в списке,
+        # обычный dataclass с __dict__ - около 96
+        bytes_per_item = allocated / len(data)
+        assert bytes_per_item < 64, f'{bytes_per_item:.1f} bytes per TextInfo'
+
+
+if __name__ == '__main__':
+    unittest.main()
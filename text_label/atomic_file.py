@@ -0,0 +1,35 @@
+import contextlib
+import os
+import pathlib
+from typing import IO, Iterator, Union
+
+
+def make_tmp_path(path_to_file: Union[str, pathlib.Path]) -> pathlib.Path:
+    path_to_file = pathlib.Path(path_to_file)
+    return path_to_file.with_name(path_to_file.name + '.tmp')
+
+
+def replace_file(path_to_tmp: Union[str, pathlib.Path], path_to_file: Union[str, pathlib.Path]):
+    os.replace(path_to_tmp, path_to_file)
+    # без fsync каталога переименование может не пережить отключение питания
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(pathlib.Path(path_to_file).parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+@contextlib.contextmanager
+def open_atomic(path_to_file: Union[str, pathlib.Path], mode: str = 'w', encoding: str = 'utf-8') -> Iterator[IO]:
+    # пишем во временный файл рядом и подменяем им старый, так что на диске всегда целый файл
+    path_to_tmp = make_tmp_path(path_to_file)
+    try:
+        with open(path_to_tmp, mode=mode, encoding=None if 'b' in mode else encoding) as handle:
+            yield handle
+            handle.flush()
+            os.fsync(handle.fileno())
+        replace_file(path_to_tmp, path_to_file)
+    except BaseException:
+        path_to_tmp.unlink(missing_ok=True)
+        raise
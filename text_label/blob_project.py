@@ -0,0 +1,375 @@
+import array
+import contextlib
+import json
+import mmap
+import os
+import pathlib
+import struct
+import sys
+import threading
+from collections.abc import Sequence
+from typing import Iterable, Iterator, Optional, Union
+
+from text_label.atomic_file import open_atomic
+from text_label.category_index import CategoryIndex
+from text_label.history import History
+from text_label.lru_cache import LruCache
+from text_label.project import Project
+from text_label.text_info import TextInfo
+
+
+class BlobFile:
+    def __init__(self, path_to_bodies: pathlib.Path):
+        self.path = pathlib.Path(path_to_bodies)
+        with open(self.path, mode='rb') as bodies_handle:
+            size = os.fstat(bodies_handle.fileno()).st_size
+            # пустой файл mmap не отображает
+            self.mapping: Union[mmap.mmap, bytes] = mmap.mmap(bodies_handle.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b''
+
+    def read(self, start: int, end: int) -> str:
+        return self.mapping[start:end].decode('utf-8')
+
+    def read_prefix(self, start: int, end: int, length: int) -> str:
+        # символ utf-8 занимает не больше 4 байт, оборванный на границе символ отбрасывается
+        return self.mapping[start:min(end, start + 4 * length)].decode('utf-8', errors='ignore')[:length]
+
+    def close(self):
+        if isinstance(self.mapping, mmap.mmap):
+            self.mapping.close()
+
+
+class BlobTextInfo(TextInfo):
+    # тело текста читается из файла только при обращении к text
+    __slots__ = ('texts', 'blob', 'start', 'end')
+
+    def __init__(self, texts: 'BlobTexts', blob: BlobFile, start: int, end: int, category_id: Optional[int] = None):
+        self.texts = texts
+        self.blob = blob
+        self.start = start
+        self.end = end
+        self.category_id = category_id
+
+    @property
+    def text(self) -> str:
+        return self.texts.read_text(self.blob, self.start, self.end)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TextInfo):
+            return self.text == other.text and self.category_id == other.category_id
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'BlobTextInfo(start={self.start}, end={self.end}, category_id={self.category_id})'
+
+
+class BlobTexts(Sequence):
+    NO_CATEGORY = -1
+
+    def __init__(self, cache_bytes: int):
+        self.lock = threading.RLock()
+        self.cache = LruCache(cache_bytes)
+        self.path_to_index: Optional[pathlib.Path] = None
+        self.blob: Optional[BlobFile] = None
+        # начало и конец тела в файле; отрицательное начало - номер ещё не сохранённого текста в added
+        self.starts = array.array('q')
+        self.ends = array.array('q')
+        self.category_ids = array.array('q')
+        self.added: list[str] = []
+        # байты файла тел, на которые ещё ссылаются тексты; остальное - мусор от удалённых
+        self.live_bytes = 0
+        self.generation = 0
+
+    def open(self, path_to_index: pathlib.Path) -> tuple[dict[int, str], dict[Optional[int], list[int]]]:
+        path_to_index = pathlib.Path(path_to_index)
+        with open(path_to_index, mode='rb') as index_handle:
+            header = BlobProject.read_header(index_handle)
+            count = header['count']
+            starts = BlobProject.read_array(index_handle, count, header)
+            ends = BlobProject.read_array(index_handle, count, header)
+            category_ids = BlobProject.read_array(index_handle, count, header)
+            text_ids = {None if category_id == self.NO_CATEGORY else category_id: BlobProject.read_array(index_handle, size, header).tolist()
+                        for category_id, size in header['category_index']}
+        blob = BlobFile(path_to_index.with_name(header['bodies']))
+
+        with self.lock:
+            # старый файл не закрывается: на него могут ссылаться тексты в истории отмены
+            if self.blob is None or self.blob.path != blob.path:
+                self.cache.clear()
+            self.path_to_index = path_to_index
+            self.blob = blob
+            self.starts, self.ends, self.category_ids = starts, ends, category_ids
+            self.added = []
+            self.live_bytes = header['live_bytes']
+            self.generation = header['generation']
+        return {int(category_id): category for category_id, category in header['categories'].items()}, text_ids
+
+    def close(self):
+        with self.lock:
+            if self.blob is not None:
+                self.blob.close()
+            self.cache.clear()
+
+    def read_text(self, blob: BlobFile, start: int, end: int) -> str:
+        key = (blob.path, start)
+        with self.lock:
+            text = self.cache.get(key)
+        if text is None:
+            text = blob.read(start, end)
+            with self.lock:
+                self.cache.put(key, text)
+        return text
+
+    def get_preview(self, idx: int, length: int) -> str:
+        with self.lock:
+            start, end = self.starts[idx], self.ends[idx]
+            if start < 0:
+                return self.added[-start - 1][:length]
+            blob = self.blob
+        return blob.read_prefix(start, end, length)
+
+    def _make_category_id(self, idx: int) -> Optional[int]:
+        category_id = self.category_ids[idx]
+        return None if category_id == self.NO_CATEGORY else category_id
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        with self.lock:
+            start = self.starts[idx]
+            if start < 0:
+                return TextInfo(text=self.added[-start - 1], category_id=self._make_category_id(idx))
+            return BlobTextInfo(self, self.blob, start, self.ends[idx], self._make_category_id(idx))
+
+    def __iter__(self) -> Iterator[TextInfo]:
+        # проход по всем текстам читает тела мимо кеша, чтобы не вытеснить из него то, что смотрят в GUI
+        idx = 0
+        while True:
+            with self.lock:
+                if idx >= len(self.starts):
+                    return
+                start, end, category_id = self.starts[idx], self.ends[idx], self._make_category_id(idx)
+                text = self.added[-start - 1] if start < 0 else None
+                blob = self.blob
+            yield TextInfo(text=blob.read(start, end) if text is None else text, category_id=category_id)
+            idx += 1
+
+    def iter_uncached(self, text_ids: Iterable[int]) -> Iterator[TextInfo]:
+        # как __iter__, но по выбранным позициям: смещения запоминаются сразу, как get_texts запоминает тексты,
+        # а тела читаются по ходу прохода мимо кеша
+        starts, ends, category_ids = array.array('q'), array.array('q'), array.array('q')
+        with self.lock:
+            blob, added = self.blob, self.added
+            for idx in text_ids:
+                starts.append(self.starts[idx])
+                ends.append(self.ends[idx])
+                category_ids.append(self.category_ids[idx])
+        for start, end, category_id in zip(starts, ends, category_ids):
+            yield TextInfo(text=added[-start - 1] if start < 0 else blob.read(start, end),
+                           category_id=None if category_id == self.NO_CATEGORY else category_id)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def copy(self) -> 'BlobTexts':
+        # смещения и категории на этот момент, тела - в том же файле, который только дописывается; без своего кеша
+        texts = BlobTexts(cache_bytes=0)
+        with self.lock:
+            texts.blob = self.blob
+            texts.starts, texts.ends, texts.category_ids = array.array('q', self.starts), array.array('q', self.ends), array.array('q', self.category_ids)
+            texts.added = list(self.added)
+            texts.live_bytes = self.live_bytes
+            texts.generation = self.generation
+        return texts
+
+    def insert(self, idx: int, text_info: TextInfo):
+        with self.lock:
+            # возвращённый отменой текст снова ссылается на своё тело в файле
+            if isinstance(text_info, BlobTextInfo) and self.blob is not None and text_info.blob.path == self.blob.path:
+                start, end = text_info.start, text_info.end
+                self.live_bytes += end - start
+            else:
+                self.added.append(text_info.text)
+                start, end = -len(self.added), 0
+            self.starts.insert(idx, start)
+            self.ends.insert(idx, end)
+            self.category_ids.insert(idx, self.NO_CATEGORY if text_info.category_id is None else text_info.category_id)
+
+    def pop(self, idx: int) -> TextInfo:
+        with self.lock:
+            text_info = self[idx]
+            if self.starts[idx] >= 0:
+                self.live_bytes -= self.ends[idx] - self.starts[idx]
+            self.starts.pop(idx)
+            self.ends.pop(idx)
+            self.category_ids.pop(idx)
+        return text_info
+
+    def set_category_id(self, idx: int, category_id: Optional[int]):
+        with self.lock:
+            self.category_ids[idx] = self.NO_CATEGORY if category_id is None else category_id
+
+    def get_cache_stats(self) -> dict[str, int]:
+        with self.lock:
+            return self.cache.get_stats()
+
+
+class BlobProject(Project):
+    SUFFIX = '.blob.tl'
+    MAGIC = b'TLBLOB\x00\x01'
+    VERSION = 1
+    HEADER_LENGTH = struct.Struct('<Q')
+    TEXT_CACHE_BYTES = 64 * 1024 * 1024
+    # во сколько раз файл тел может быть больше живых тел, прежде чем его перепишем без мусора
+    BODIES_COMPACTION_RATIO = 2
+    BODIES_COMPACTION_MIN_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, path_to_index: pathlib.Path, history_depth: Optional[int] = History.DEFAULT_MAX_DEPTH,
+                 text_cache_bytes: Optional[int] = None):
+        super().__init__(history_depth=history_depth)
+        self.data: BlobTexts = BlobTexts(text_cache_bytes if text_cache_bytes is not None else self.TEXT_CACHE_BYTES)
+        self.categories, text_ids = self.data.open(path_to_index)
+        self.category_index = CategoryIndex.from_text_ids(text_ids)
+        self.path_to_project = pathlib.Path(path_to_index)
+
+    @classmethod
+    def is_blob_path(cls, path_to_project: pathlib.Path) -> bool:
+        return str(path_to_project).endswith(cls.SUFFIX)
+
+    @classmethod
+    def is_blob_file(cls, path_to_project: pathlib.Path) -> bool:
+        with open(path_to_project, mode='rb') as project_handle:
+            return project_handle.read(len(cls.MAGIC)) == cls.MAGIC
+
+    @classmethod
+    def read_header(cls, index_handle) -> dict:
+        if index_handle.read(len(cls.MAGIC)) != cls.MAGIC:
+            raise ValueError(f'{index_handle.name} is not a blob project')
+        header_length, = cls.HEADER_LENGTH.unpack(index_handle.read(cls.HEADER_LENGTH.size))
+        header = json.loads(index_handle.read(header_length))
+        if header.get('version') != cls.VERSION:
+            raise ValueError(f'Unsupported blob project version: {header.get("version")}')
+        return header
+
+    @staticmethod
+    def read_array(index_handle, count: int, header: dict) -> array.array:
+        values = array.array('q')
+        values.fromfile(index_handle, count)
+        if header['byteorder'] != sys.byteorder:
+            values.byteswap()
+        return values
+
+    @classmethod
+    def _get_generation(cls, path_to_index: pathlib.Path) -> Optional[int]:
+        try:
+            with open(path_to_index, mode='rb') as index_handle:
+                return cls.read_header(index_handle)['generation']
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _make_bodies_path(path_to_index: pathlib.Path, generation: int) -> pathlib.Path:
+        return path_to_index.with_name(f'{path_to_index.name}.{generation}.bodies')
+
+    @classmethod
+    def write_blob(cls, path_to_index: pathlib.Path, categories: dict[int, str], data: Iterable[TextInfo]):
+        # тела лежат в отдельном файле, в который только дописывают; сам проект - небольшой индекс смещений,
+        # поэтому сохранение того же проекта дописывает новые тела и переписывает только индекс
+        path_to_index = pathlib.Path(path_to_index)
+        prev_generation = cls._get_generation(path_to_index)
+        if isinstance(data, BlobTexts) and data.path_to_index is not None and cls._can_append(path_to_index, data):
+            generation = data.generation
+            with data.lock:
+                starts, ends, category_ids = array.array('q', data.starts), array.array('q', data.ends), array.array('q', data.category_ids)
+                added = list(data.added)
+                live_bytes = data.live_bytes
+            with open(cls._make_bodies_path(path_to_index, generation), mode='ab') as bodies_handle:
+                offset = bodies_handle.tell()
+                for idx, start in enumerate(starts):
+                    if start < 0:
+                        body = added[-start - 1].encode('utf-8')
+                        bodies_handle.write(body)
+                        starts[idx], ends[idx] = offset, offset + len(body)
+                        offset += len(body)
+                        live_bytes += len(body)
+                bodies_handle.flush()
+                os.fsync(bodies_handle.fileno())
+        else:
+            generation = prev_generation + 1 if prev_generation is not None else 0
+            starts, ends, category_ids = array.array('q'), array.array('q'), array.array('q')
+            with open(cls._make_bodies_path(path_to_index, generation), mode='wb') as bodies_handle:
+                offset = 0
+                for text_info in data:
+                    body = text_info.text.encode('utf-8')
+                    bodies_handle.write(body)
+                    starts.append(offset)
+                    offset += len(body)
+                    ends.append(offset)
+                    category_ids.append(BlobTexts.NO_CATEGORY if text_info.category_id is None else text_info.category_id)
+                bodies_handle.flush()
+                os.fsync(bodies_handle.fileno())
+            live_bytes = offset
+
+        text_ids: dict[int, array.array] = {}
+        for text_id, category_id in enumerate(category_ids):
+            text_ids.setdefault(category_id, array.array('q')).append(text_id)
+        header = {'version': cls.VERSION, 'byteorder': sys.byteorder, 'generation': generation,
+                  'bodies': cls._make_bodies_path(path_to_index, generation).name, 'live_bytes': live_bytes,
+                  'count': len(starts), 'categories': categories,
+                  'category_index': [[category_id, len(category_text_ids)] for category_id, category_text_ids in text_ids.items()]}
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        with open_atomic(path_to_index, mode='wb') as index_handle:
+            index_handle.write(cls.MAGIC)
+            index_handle.write(cls.HEADER_LENGTH.pack(len(header_bytes)))
+            index_handle.write(header_bytes)
+            for values in (starts, ends, category_ids, *text_ids.values()):
+                values.tofile(index_handle)
+
+        if prev_generation is not None and prev_generation != generation:
+            # открытое отображение старого файла остаётся читаемым и после удаления; где так нельзя - файл останется мусором
+            with contextlib.suppress(OSError):
+                cls._make_bodies_path(path_to_index, prev_generation).unlink(missing_ok=True)
+
+    @classmethod
+    def _can_append(cls, path_to_index: pathlib.Path, data: BlobTexts) -> bool:
+        if path_to_index.resolve() != data.path_to_index.resolve():
+            return False
+        bodies_size = os.path.getsize(cls._make_bodies_path(path_to_index, data.generation))
+        return bodies_size <= cls.BODIES_COMPACTION_RATIO * data.live_bytes + cls.BODIES_COMPACTION_MIN_BYTES
+
+    def _write_project(self, path_to_project: pathlib.Path):
+        super()._write_project(path_to_project)
+        if self.is_blob_path(path_to_project):
+            # сохранённые тела переехали в файл, смещения берём из нового индекса
+            self.data.open(path_to_project)
+
+    def close(self):
+        super().close()
+        self.data.close()
+
+    def make_snapshot(self) -> 'BlobProject':
+        # копируются только смещения, поэтому снимок не читает тела и экспорт из него идёт мимо кеша
+        snapshot = BlobProject.__new__(BlobProject)
+        Project.__init__(snapshot, categories=self.categories, history_depth=0)
+        snapshot.data = self.data.copy()
+        snapshot.category_index = self.category_index.copy()
+        return snapshot
+
+    def iter_texts(self, category_id: Optional[int] = None) -> Iterator[TextInfo]:
+        return self.iter_texts_at(range(len(self.data)) if category_id is None else self.category_index.get_text_ids(category_id))
+
+    def iter_texts_at(self, text_ids: Iterable[int]) -> Iterator[TextInfo]:
+        return self.data.iter_uncached(text_ids)
+
+    def _set_text_category(self, text_id: int, category_id: Optional[int]):
+        super()._set_text_category(text_id, category_id)
+        self.data.set_category_id(text_id, category_id)
+
+    def _set_texts_category(self, text_ids: list[int], category_ids: list[Optional[int]]):
+        super()._set_texts_category(text_ids, category_ids)
+        for text_id, category_id in zip(text_ids, category_ids):
+            self.data.set_category_id(text_id, category_id)
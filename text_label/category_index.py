@@ -0,0 +1,68 @@
+import bisect
+from typing import Iterable, Optional
+
+from text_label.text_info import TextInfo
+
+
+class CategoryIndex:
+    MIN_BULK_MOVES = 64
+
+    def __init__(self, data: Iterable[TextInfo] = ()):
+        # category_id (None - без категории) -> отсортированный список позиций текстов
+        self.text_ids: dict[Optional[int], list[int]] = {}
+        for text_id, text_info in enumerate(data):
+            self.text_ids.setdefault(text_info.category_id, []).append(text_id)
+
+    @classmethod
+    def from_text_ids(cls, text_ids: dict[Optional[int], list[int]]) -> 'CategoryIndex':
+        # готовые отсортированные списки, например сохранённые вместе с проектом
+        index = cls()
+        index.text_ids = text_ids
+        return index
+
+    def copy(self) -> 'CategoryIndex':
+        return self.from_text_ids({category_id: list(text_ids) for category_id, text_ids in self.text_ids.items()})
+
+    def add(self, text_id: int, category_id: Optional[int]):
+        text_ids = self.text_ids.setdefault(category_id, [])
+        if len(text_ids) == 0 or text_ids[-1] < text_id:
+            text_ids.append(text_id)
+        else:
+            bisect.insort(text_ids, text_id)
+
+    def discard(self, text_id: int, category_id: Optional[int]):
+        text_ids = self.text_ids.get(category_id, [])
+        idx = bisect.bisect_left(text_ids, text_id)
+        if idx < len(text_ids) and text_ids[idx] == text_id:
+            text_ids.pop(idx)
+
+    def move_many(self, moves: list[tuple[int, Optional[int], Optional[int]]]):
+        # (text_id, category_id, new_category_id); поштучная вставка в длинный список стоит O(n) на каждый текст,
+        # поэтому задетые списки пересобираются целиком
+        if len(moves) < self.MIN_BULK_MOVES:
+            for text_id, category_id, new_category_id in moves:
+                self.discard(text_id, category_id)
+                self.add(text_id, new_category_id)
+            return
+
+        removed: dict[Optional[int], set[int]] = {}
+        added: dict[Optional[int], list[int]] = {}
+        for text_id, category_id, new_category_id in moves:
+            removed.setdefault(category_id, set()).add(text_id)
+            added.setdefault(new_category_id, []).append(text_id)
+        for category_id, text_ids in removed.items():
+            self.text_ids[category_id] = [text_id for text_id in self.text_ids.get(category_id, []) if text_id not in text_ids]
+        for category_id, text_ids in added.items():
+            self.text_ids[category_id] = sorted(self.text_ids.get(category_id, []) + text_ids)
+
+    def shift(self, from_text_id: int, delta: int):
+        for text_ids in self.text_ids.values():
+            idx = bisect.bisect_left(text_ids, from_text_id)
+            if idx < len(text_ids):
+                text_ids[idx:] = [text_id + delta for text_id in text_ids[idx:]]
+
+    def get_text_ids(self, category_id: Optional[int]) -> list[int]:
+        return list(self.text_ids.get(category_id, []))
+
+    def count(self, category_id: Optional[int]) -> int:
+        return len(self.text_ids.get(category_id, []))
@@ -0,0 +1,179 @@
+import argparse
+import json
+import pathlib
+import sys
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from text_label.project import Project
+from text_label.exporters.registry import get_exporter, get_exporter_names
+
+
+# (text_id, category), category None - снять метку
+Assignment = Tuple[int, Optional[str]]
+
+
+def read_assignments(lines: Iterable[str]) -> Iterator[Assignment]:
+    for line_no, line in enumerate(lines, start=1):
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        if line.lstrip().startswith('{'):
+            row = json.loads(line)
+            yield int(row['text_id']), row.get('label') or None
+            continue
+
+        text_id, _, category = line.partition('\t' if '\t' in line else ',')
+        if line_no == 1 and not text_id.strip().lstrip('-').isdigit():
+            # заголовок csv
+            continue
+        yield int(text_id), category.strip() or None
+
+
+def apply_assignments(project: Project, assignments: Iterable[Assignment], create_categories: bool = False) -> int:
+    category_ids = {category: category_id for category_id, category in project.categories.items()}
+    # если текст встречается несколько раз, побеждает последняя строка
+    category_id_by_text_id: dict[int, Optional[int]] = {}
+    for text_id, category in assignments:
+        if not 0 <= text_id < len(project.data):
+            raise ValueError(f'No text with id {text_id}')
+        if category is not None and category not in category_ids:
+            if not create_categories:
+                raise ValueError(f'Unknown category: {category}')
+            project.add_category(category)
+            category_ids = {category: category_id for category_id, category in project.categories.items()}
+        category_id_by_text_id[text_id] = category_ids[category] if category is not None else None
+
+    text_ids_by_category_id: dict[Optional[int], list[int]] = {}
+    for text_id, category_id in category_id_by_text_id.items():
+        text_ids_by_category_id.setdefault(category_id, []).append(text_id)
+    return sum(len(project.mark_texts(text_ids, category_id)) for category_id, text_ids in text_ids_by_category_id.items())
+
+
+def merge_projects(projects: Iterable[Project], dedup: bool = False) -> Project:
+    # история слияния не нужна, а Batch держал бы ссылки на все тексты
+    merged = Project(history_depth=0)
+    seen_texts = set()
+    for project in projects:
+        texts, categories = [], []
+        for text_info in project.get_texts():
+            if dedup:
+                if text_info.text in seen_texts:
+                    continue
+                seen_texts.add(text_info.text)
+            texts.append(text_info.text)
+            categories.append(project.categories.get(text_info.category_id) if text_info.category_id is not None else None)
+        # категории объединяются по имени, в том числе те, у которых нет текстов
+        for category in project.categories.values():
+            merged.add_category(category)
+        merged.add_texts(texts, categories)
+    return merged
+
+
+def get_stats(project: Project) -> dict:
+    return {
+        'name': project.get_name(),
+        'texts': len(project.data),
+        'categories': {category: project.count_texts_of_category(category_id) for category_id, category in project.categories.items()},
+        'unlabelled': project.count_texts_of_category(None),
+    }
+
+
+def _print_stats(stats: dict, output: TextIO):
+    print(f'name: {stats["name"]}', file=output)
+    print(f'texts: {stats["texts"]}', file=output)
+    for category, count in stats['categories'].items():
+        print(f'  {category}: {count}', file=output)
+    print(f'  <NOCATEGORY>: {stats["unlabelled"]}', file=output)
+
+
+def _run_stats(args) -> int:
+    project = Project.load_project_from_path(args.project)
+    stats = get_stats(project)
+    if args.json:
+        json.dump(stats, sys.stdout, ensure_ascii=False)
+        print()
+    else:
+        _print_stats(stats, sys.stdout)
+    project.close()
+    return 0
+
+
+def _run_label(args) -> int:
+    project = Project.load_project_from_path(args.project)
+    if args.mapping == '-':
+        changed = apply_assignments(project, read_assignments(sys.stdin), create_categories=args.create_categories)
+    else:
+        with open(args.mapping, mode='r', encoding='utf-8') as mapping_handle:
+            changed = apply_assignments(project, read_assignments(mapping_handle), create_categories=args.create_categories)
+    project.save_project(pathlib.Path(args.output or args.project))
+    project.close()
+    print(f'{changed} texts relabelled', file=sys.stderr)
+    return 0
+
+
+def _run_merge(args) -> int:
+    projects = [Project.load_project_from_path(path_to_project) for path_to_project in args.projects]
+    merged = merge_projects(projects, dedup=args.dedup)
+    merged.save_project(pathlib.Path(args.output))
+    for project in projects:
+        project.close()
+    print(f'{len(merged.data)} texts, {len(merged.categories)} categories', file=sys.stderr)
+    return 0
+
+
+def _run_export(args) -> int:
+    project = Project.load_project_from_path(args.project)
+    kwargs = {}
+    if args.exporter in ('jsonl', 'csv'):
+        kwargs = {'shard_size': args.shard_size, 'splits': {'train': 0.8, 'val': 0.1, 'test': 0.1} if args.split else None}
+    exporter = get_exporter(args.exporter, **kwargs)
+    summary = exporter.export(pathlib.Path(args.destination), project=project)
+    project.close()
+    print(summary, file=sys.stderr)
+    return 0
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='simple-text-label-cli', description='Headless text-label project tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stats_parser = subparsers.add_parser('stats', help='print project statistics')
+    stats_parser.add_argument('project')
+    stats_parser.add_argument('--json', action='store_true')
+    stats_parser.set_defaults(run=_run_stats)
+
+    label_parser = subparsers.add_parser('label', help='apply "text_id,category" lines (csv, tsv or jsonl) to a project')
+    label_parser.add_argument('project')
+    label_parser.add_argument('mapping', help='mapping file, "-" for stdin')
+    label_parser.add_argument('--output', help='save to another path instead of overwriting the project')
+    label_parser.add_argument('--create-categories', action='store_true')
+    label_parser.set_defaults(run=_run_label)
+
+    merge_parser = subparsers.add_parser('merge', help='merge projects, categories are matched by name')
+    merge_parser.add_argument('output')
+    merge_parser.add_argument('projects', nargs='+')
+    merge_parser.add_argument('--dedup', action='store_true', help='skip texts that are already in the merged project')
+    merge_parser.set_defaults(run=_run_merge)
+
+    export_parser = subparsers.add_parser('export', help='export a project')
+    export_parser.add_argument('project')
+    export_parser.add_argument('exporter', choices=get_exporter_names())
+    export_parser.add_argument('destination')
+    export_parser.add_argument('--shard-size', type=int, default=100_000)
+    export_parser.add_argument('--split', action='store_true', help='split jsonl/csv export into train/val/test')
+    export_parser.set_defaults(run=_run_export)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = make_parser().parse_args(argv)
+    try:
+        return args.run(args)
+    except (OSError, ValueError, KeyError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,250 @@
+import array
+import bisect
+import re
+import zlib
+from collections import Counter
+from typing import Iterable
+
+from text_label import gap_keys
+
+
+class HashMultiset:
+    # изменения копятся в небольших счётчиках и вливаются в отсортированный массив,
+    # когда их становится больше 1/8 массива: 8 байт на хеш вместо ~100 байт у dict
+    MIN_MERGE_SIZE = 4096
+
+    def __init__(self, hashes: Iterable[int] = ()):
+        self.hashes = array.array('q', sorted(hashes))
+        self.added: Counter = Counter()
+        self.removed: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self.hashes) + sum(self.added.values()) - sum(self.removed.values())
+
+    def _count_merged(self, value: int) -> int:
+        return bisect.bisect_right(self.hashes, value) - bisect.bisect_left(self.hashes, value)
+
+    def count(self, value: int) -> int:
+        return self._count_merged(value) - self.removed.get(value, 0) + self.added.get(value, 0)
+
+    def _add(self, value: int):
+        if self.removed.get(value, 0) > 0:
+            self.removed[value] -= 1
+        else:
+            self.added[value] += 1
+
+    def add(self, value: int):
+        self._add(value)
+        self._maybe_merge()
+
+    def update(self, values: Iterable[int]):
+        for value in values:
+            self._add(value)
+        self._maybe_merge()
+
+    def discard(self, value: int):
+        if self.added.get(value, 0) > 0:
+            self.added[value] -= 1
+        elif self._count_merged(value) > self.removed.get(value, 0):
+            self.removed[value] += 1
+        self._maybe_merge()
+
+    def _maybe_merge(self):
+        if len(self.added) + len(self.removed) > max(self.MIN_MERGE_SIZE, len(self.hashes) // 8):
+            self.merge()
+
+    def merge(self):
+        hashes = list(self.hashes)
+        for value, count in self.removed.items():
+            if count > 0:
+                idx = bisect.bisect_left(hashes, value)
+                del hashes[idx:idx + count]
+        hashes.extend(self.added.elements())
+        hashes.sort()
+        self.hashes = array.array('q', hashes)
+        self.added.clear()
+        self.removed.clear()
+
+
+class TextLocator:
+    # у текста есть ключ gap_keys, который не меняется при вставке и удалении соседей. Записи "хеш << KEY_BITS | ключ"
+    # лежат в отсортированном массиве: копии находятся бисекцией по диапазону хеша, позиция ключа - бисекцией по keys.
+    # От хеша остаются старшие биты, лишних кандидатов отсеивает сравнение самих текстов.
+    # Правки копятся в небольших added и removed и вливаются в массив, как в HashMultiset
+    KEY_BITS = 40
+    MIN_MERGE_SIZE = 4096
+
+    def __init__(self, hashes: Iterable[int] = ()):
+        self.keys = array.array('q')
+        self.entries = array.array('q')
+        # усечённый хеш -> ключи текстов, ещё не влитых в entries
+        self.added: dict[int, list[int]] = {}
+        # записи удалённых текстов, которые ещё лежат в entries
+        self.removed: set[int] = set()
+        self.extend(hashes)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def _truncate(cls, value: int) -> int:
+        return value >> (cls.KEY_BITS + 1)
+
+    def extend(self, hashes: Iterable[int]):
+        # новые тексты в конце: их записи сразу вливаются в массив, сортировка сливает два готовых куска
+        key = gap_keys.make_key(self.keys, len(self.keys))
+        new_entries = []
+        for value in hashes:
+            self.keys.append(key)
+            new_entries.append(self._truncate(value) << self.KEY_BITS | key)
+            key += gap_keys.GAP
+        if len(new_entries) > 0:
+            entries = self.entries.tolist()
+            entries.extend(new_entries)
+            entries.sort()
+            self.entries = array.array('q', entries)
+
+    def insert(self, text_id: int, value: int):
+        key = gap_keys.make_key(self.keys, text_id)
+        if key is None:
+            self._renumber()
+            key = gap_keys.make_key(self.keys, text_id)
+        self.keys.insert(text_id, key)
+        truncated = self._truncate(value)
+        entry = truncated << self.KEY_BITS | key
+        # ключ освободившегося места мог достаться тексту с тем же хешем
+        if entry in self.removed:
+            self.removed.discard(entry)
+        else:
+            self.added.setdefault(truncated, []).append(key)
+        self._maybe_merge()
+
+    def remove(self, text_id: int, value: int):
+        key = self.keys.pop(text_id)
+        truncated = self._truncate(value)
+        added_keys = self.added.get(truncated)
+        if added_keys is not None and key in added_keys:
+            added_keys.remove(key)
+            if len(added_keys) == 0:
+                del self.added[truncated]
+        else:
+            self.removed.add(truncated << self.KEY_BITS | key)
+        self._maybe_merge()
+
+    def _maybe_merge(self):
+        if len(self.added) + len(self.removed) > max(self.MIN_MERGE_SIZE, len(self.entries) // 8):
+            self.merge()
+
+    def merge(self):
+        entries = [entry for entry in self.entries if entry not in self.removed] if self.removed else self.entries.tolist()
+        entries.extend(truncated << self.KEY_BITS | key for truncated, keys in self.added.items() for key in keys)
+        entries.sort()
+        self.entries = array.array('q', entries)
+        self.added.clear()
+        self.removed.clear()
+
+    def _renumber(self):
+        # новые ключи возрастают так же, как старые, поэтому порядок записей не меняется
+        self.merge()
+        key_mask = (1 << self.KEY_BITS) - 1
+        new_keys = gap_keys.make_initial_keys(len(self.keys))
+        key_map = dict(zip(self.keys, new_keys))
+        self.entries = array.array('q', (entry & ~key_mask | key_map[entry & key_mask] for entry in self.entries))
+        self.keys = new_keys
+
+    def find(self, value: int) -> list[int]:
+        truncated = self._truncate(value)
+        key_mask = (1 << self.KEY_BITS) - 1
+        lo = bisect.bisect_left(self.entries, truncated << self.KEY_BITS)
+        hi = bisect.bisect_left(self.entries, (truncated + 1) << self.KEY_BITS, lo)
+        keys = [entry & key_mask for entry in self.entries[lo:hi] if entry not in self.removed]
+        keys.extend(self.added.get(truncated, ()))
+        return sorted(bisect.bisect_left(self.keys, key) for key in keys)
+
+
+class DuplicateIndex:
+    # MinHash с одной перестановкой: каждый шингл попадает в одну из NUM_BINS корзин, в корзине храним минимум
+    NUM_BINS = 16
+    BAND_ROWS = 4
+    SHINGLE_SIZE = 5
+
+    def __init__(self, texts: Iterable[str] = (), near_duplicates: bool = False):
+        self.near_duplicates = near_duplicates
+        # hash() строки кешируется в самом объекте str; индекс не сохраняется на диск, поэтому соль hash() не мешает
+        texts = list(texts)
+        hashes = [hash(text) for text in texts]
+        self.exact = HashMultiset(hashes)
+        self.positions = TextLocator(hashes)
+        self.bands = HashMultiset(band_hash for text in texts for band_hash in self.make_band_hashes(text)) if near_duplicates else None
+
+    def __len__(self) -> int:
+        # индекс может строиться по частям и тогда покрывает только первые len() текстов проекта
+        return len(self.positions)
+
+    @classmethod
+    def _normalize(cls, text: str) -> str:
+        return re.sub(r'\s+', ' ', text.lower()).strip()
+
+    @classmethod
+    def make_signature(cls, text: str) -> list[int]:
+        text = cls._normalize(text)
+        # crc32 вместо hash(): у hash() строк соль меняется от запуска к запуску, и с ней менялось бы, какие тексты считаются похожими
+        shingles = {zlib.crc32(text[idx:idx + cls.SHINGLE_SIZE].encode('utf-8')) for idx in range(max(1, len(text) - cls.SHINGLE_SIZE + 1))}
+        bins = [-1] * cls.NUM_BINS
+        for shingle in shingles:
+            bin_idx, value = shingle % cls.NUM_BINS, shingle // cls.NUM_BINS
+            if bins[bin_idx] < 0 or value < bins[bin_idx]:
+                bins[bin_idx] = value
+        # пустые корзины заполняем значением из следующей непустой, чтобы короткие тексты тоже сравнивались
+        for bin_idx in range(cls.NUM_BINS):
+            offset = 1
+            while bins[bin_idx] < 0 and offset < cls.NUM_BINS:
+                bins[bin_idx] = bins[(bin_idx + offset) % cls.NUM_BINS]
+                offset += 1
+        return bins
+
+    @classmethod
+    def make_band_hashes(cls, text: str) -> list[int]:
+        signature = cls.make_signature(text)
+        return [hash((band, *signature[band:band + cls.BAND_ROWS])) for band in range(0, cls.NUM_BINS, cls.BAND_ROWS)]
+
+    def extend(self, texts: Iterable[str]):
+        texts = list(texts)
+        hashes = [hash(text) for text in texts]
+        self.exact.update(hashes)
+        self.positions.extend(hashes)
+        if self.bands is not None:
+            self.bands.update(band_hash for text in texts for band_hash in self.make_band_hashes(text))
+
+    def insert(self, text_id: int, text: str):
+        self.exact.add(hash(text))
+        self.positions.insert(text_id, hash(text))
+        if self.bands is not None:
+            for band_hash in self.make_band_hashes(text):
+                self.bands.add(band_hash)
+
+    def remove(self, text_id: int, text: str):
+        self.exact.discard(hash(text))
+        self.positions.remove(text_id, hash(text))
+        if self.bands is not None:
+            for band_hash in self.make_band_hashes(text):
+                self.bands.discard(band_hash)
+
+    def count_duplicates(self, text: str) -> int:
+        return self.exact.count(hash(text))
+
+    def find_text_ids(self, text: str) -> list[int]:
+        # позиции текстов с тем же или близким хешем; совпадение самих текстов проверяет вызывающий
+        if not self.is_duplicate(text):
+            return []
+        return self.positions.find(hash(text))
+
+    def is_duplicate(self, text: str) -> bool:
+        return self.count_duplicates(text) > 0
+
+    def is_near_duplicate(self, text: str) -> bool:
+        # совпадение хотя бы одной полосы с текстом, который не является точной копией
+        if self.bands is None:
+            return False
+        duplicates = self.count_duplicates(text)
+        return any(self.bands.count(band_hash) > duplicates for band_hash in self.make_band_hashes(text))
@@ -0,0 +1,96 @@
+import io
+import pathlib
+import tarfile
+import time
+import zipfile
+from typing import Optional
+
+from text_label.project import Project
+from text_label.exporters.exporter import Exporter, ExportSummary, ProgressCallback
+
+
+class ArchiveExporter(Exporter):
+    NAME = 'archive'
+    PROGRESS_EVERY = 1000
+    SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.zip')
+
+    def show_options(self, project_name: str, project: Project):
+        from tkinter import filedialog
+        path_to_archive = filedialog.asksaveasfilename(initialdir=pathlib.Path(__file__).parent,
+                                                       initialfile=f'{project_name}.tar.gz',
+                                                       filetypes=[('Tar', '.tar'), ('Tar Gz', '.tar.gz'), ('Zip', '.zip')])
+        if path_to_archive:
+            self.export_in_background(path_to_archive=pathlib.Path(path_to_archive), project=project)
+
+    @classmethod
+    def get_archive_format(cls, path_to_archive: pathlib.Path) -> str:
+        name = str(path_to_archive).lower()
+        if name.endswith('.zip'):
+            return 'zip'
+        if name.endswith('.tar.gz') or name.endswith('.tgz'):
+            return 'tar.gz'
+        if name.endswith('.tar'):
+            return 'tar'
+        raise ValueError(f'Unsupported archive type: {path_to_archive}, expected one of {cls.SUFFIXES}')
+
+    def export(self, path_to_archive: pathlib.Path, project: Project,
+               progress_callback: Optional[ProgressCallback] = None) -> ExportSummary:
+        self.cancel_event.clear()
+        path_to_archive = pathlib.Path(path_to_archive)
+        archive_format = self.get_archive_format(path_to_archive)
+
+        if archive_format == 'zip':
+            summary = self._export_zip(path_to_archive, project, progress_callback)
+        else:
+            summary = self._export_tar(path_to_archive, project, progress_callback, compress=archive_format == 'tar.gz')
+
+        if self.is_cancelled():
+            path_to_archive.unlink(missing_ok=True)
+        return summary.finish(cancelled=self.is_cancelled())
+
+    def _export_tar(self, path_to_archive: pathlib.Path, project: Project,
+                    progress_callback: Optional[ProgressCallback], compress: bool) -> ExportSummary:
+        summary = ExportSummary()
+        total = self.count_category_texts(project)
+        mtime = time.time()
+        with tarfile.open(path_to_archive, mode='w:gz' if compress else 'w') as archive:
+            for cat_name in list(project.categories.values()):
+                dir_info = tarfile.TarInfo(name=cat_name)
+                dir_info.type = tarfile.DIRTYPE
+                dir_info.mode = 0o755
+                dir_info.mtime = mtime
+                archive.addfile(dir_info)
+
+            for cat_name, idx, text_info in self.iter_category_texts(project):
+                if self.is_cancelled():
+                    break
+                data = text_info.text.encode('utf-8')
+                file_info = tarfile.TarInfo(name=f'{cat_name}/{idx}.txt')
+                file_info.size = len(data)
+                file_info.mode = 0o644
+                file_info.mtime = mtime
+                archive.addfile(file_info, io.BytesIO(data))
+                self._account(summary, len(data), total, progress_callback)
+        return summary
+
+    def _export_zip(self, path_to_archive: pathlib.Path, project: Project,
+                    progress_callback: Optional[ProgressCallback]) -> ExportSummary:
+        summary = ExportSummary()
+        total = self.count_category_texts(project)
+        with zipfile.ZipFile(path_to_archive, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for cat_name in list(project.categories.values()):
+                archive.writestr(f'{cat_name}/', b'')
+
+            for cat_name, idx, text_info in self.iter_category_texts(project):
+                if self.is_cancelled():
+                    break
+                data = text_info.text.encode('utf-8')
+                archive.writestr(f'{cat_name}/{idx}.txt', data)
+                self._account(summary, len(data), total, progress_callback)
+        return summary
+
+    def _account(self, summary: ExportSummary, written: int, total: int, progress_callback: Optional[ProgressCallback]):
+        summary.files += 1
+        summary.bytes += written
+        if progress_callback and (summary.files % self.PROGRESS_EVERY == 0 or summary.files == total):
+            progress_callback(summary.files, total)
@@ -0,0 +1,17 @@
+import csv
+import pathlib
+from typing import TextIO, Tuple
+
+from text_label.exporters.sharded import ShardedExporter, RowWriter
+
+
+class CsvExporter(ShardedExporter):
+    NAME = 'csv'
+    FILE_EXTENSION = '.csv'
+    HEADER = ('text', 'label', 'category_id')
+
+    def open_shard(self, path_to_shard: pathlib.Path) -> Tuple[TextIO, RowWriter]:
+        handle = open(path_to_shard, mode='w', encoding='utf-8', newline='', buffering=self.WRITE_BUFFER_SIZE)
+        writer = csv.writer(handle)
+        writer.writerow(self.HEADER)
+        return handle, writer.writerow
@@ -0,0 +1,114 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional, Tuple
+
+from text_label.bus import Bus
+from text_label.project import Project
+from text_label.text_info import TextInfo
+
+
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class ExportSummary:
+    files: int = 0
+    bytes: int = 0
+    rows: int = 0
+    moved: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+    cancelled: bool = False
+    error: Optional[str] = None
+    started: float = field(default_factory=time.perf_counter, repr=False, compare=False)
+
+    def finish(self, cancelled: bool = False) -> 'ExportSummary':
+        self.seconds = time.perf_counter() - self.started
+        self.cancelled = cancelled
+        return self
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1024 / 1024 / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        if self.error is not None:
+            return f'failed after {self.seconds:.1f}s ({self.files} files written): {self.error}'
+        status = 'cancelled' if self.cancelled else 'done'
+        if self.moved or self.removed:
+            status = f'{status} ({self.moved} moved, {self.removed} removed)'
+        if self.rows:
+            return (f'{status}: {self.rows} rows in {self.files} files, {self.bytes / 1024 / 1024:.1f} MB in {self.seconds:.1f}s '
+                    f'({self.rows_per_second:.0f} rows/s, {self.megabytes_per_second:.1f} MB/s)')
+        return (f'{status}: {self.files} files, {self.bytes / 1024 / 1024:.1f} MB in {self.seconds:.1f}s '
+                f'({self.files_per_second:.0f} files/s, {self.megabytes_per_second:.1f} MB/s)')
+
+
+class Exporter:
+    NAME: str = None
+
+    def __init__(self, bus: Optional[Bus] = None):
+        self.bus = bus
+        self.cancel_event = threading.Event()
+        self.export_thread: Optional[threading.Thread] = None
+        if self.bus:
+            self.bus.register(f'exporters[{self.NAME}]', self)
+
+    @staticmethod
+    def iter_category_texts(project: Project) -> Iterator[Tuple[str, int, TextInfo]]:
+        for category_id, category_name in list(project.categories.items()):
+            for idx, text_info in enumerate(project.iter_texts(category_id=category_id)):
+                yield category_name, idx, text_info
+
+    @staticmethod
+    def count_category_texts(project: Project) -> int:
+        return sum(project.count_texts_of_category(category_id) for category_id in list(project.categories.keys()))
+
+    def show_options(self, project_name: str, project: Project):
+        # project_name и снимок project сделаны в потоке statechart: дайджест нельзя строить из потока Tk,
+        # а живой проект statechart меняет, пока идёт экспорт
+        raise NotImplementedError
+
+    def export(self, *args, **kwargs) -> ExportSummary:
+        raise NotImplementedError
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def is_running(self) -> bool:
+        return self.export_thread is not None and self.export_thread.is_alive()
+
+    def export_in_background(self, **kwargs) -> threading.Thread:
+        def _export():
+            summary = ExportSummary()
+            try:
+                summary = self.export(progress_callback=self._report_progress, **kwargs)
+            except Exception as e:
+                # окно прогресса ждёт итога, поэтому об ошибке тоже сообщаем итогом
+                summary.error = f'{type(e).__name__}: {e}'
+                summary.finish(cancelled=self.is_cancelled())
+            self._report_summary(summary)
+
+        self.export_thread = threading.Thread(target=_export, name=f'export-{self.NAME}', daemon=True)
+        self.export_thread.start()
+        return self.export_thread
+
+    def _report_progress(self, done: int, total: int):
+        if self.bus and self.bus.gui:
+            self.bus.gui.show_export_progress(self.NAME, done, total)
+
+    def _report_summary(self, summary: ExportSummary):
+        if self.bus and self.bus.gui:
+            self.bus.gui.show_export_summary(self.NAME, summary)
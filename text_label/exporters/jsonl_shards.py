@@ -0,0 +1,27 @@
+import json
+import pathlib
+from json.encoder import encode_basestring
+from typing import TextIO, Tuple
+
+from text_label.exporters.sharded import ShardedExporter, Row, RowWriter
+
+
+class JsonlExporter(ShardedExporter):
+    NAME = 'jsonl'
+    FILE_EXTENSION = '.jsonl'
+
+    def open_shard(self, path_to_shard: pathlib.Path) -> Tuple[TextIO, RowWriter]:
+        handle = open(path_to_shard, mode='w', encoding='utf-8', buffering=self.WRITE_BUFFER_SIZE)
+        # строка собирается вручную: json.dumps на каждую строку в разы медленнее,
+        # а label и category_id повторяются и кэшируются
+        encoded_tails: dict[Tuple[str, int], str] = {}
+
+        def write_row(row: Row):
+            key = (row[1], row[2])
+            if key not in encoded_tails:
+                encoded_tails[key] = f', "label": {encode_basestring(row[1])}, "category_id": {json.dumps(row[2])}}}\n'
+            handle.write('{"text": ')
+            handle.write(encode_basestring(row[0]))
+            handle.write(encoded_tails[key])
+
+        return handle, write_row
@@ -0,0 +1,32 @@
+import importlib
+from typing import Optional
+
+from text_label.bus import Bus
+
+
+# имя экспортёра -> 'модуль:класс'; модуль импортируется только когда экспортёр выбран
+EXPORTERS = {
+    'text_directory': 'text_label.exporters.text_directory:TextDirectoryExporter',
+    'text_directory_incremental': 'text_label.exporters.text_directory:IncrementalTextDirectoryExporter',
+    'archive': 'text_label.exporters.archive:ArchiveExporter',
+    'jsonl': 'text_label.exporters.jsonl_shards:JsonlExporter',
+    'csv': 'text_label.exporters.csv_shards:CsvExporter',
+}
+
+
+def get_exporter_names() -> list[str]:
+    return list(EXPORTERS.keys())
+
+
+def load_exporter_class(name: str):
+    if name not in EXPORTERS:
+        raise ValueError(f'Unknown exporter: {name}, expected one of {get_exporter_names()}')
+    module_name, _, class_name = EXPORTERS[name].partition(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_exporter(name: str, bus: Optional[Bus] = None, **kwargs):
+    # один экземпляр на bus, чтобы отмена и прогресс находили запущенный экспорт
+    if bus is not None and bus.exporters and name in bus.exporters:
+        return bus.exporters[name]
+    return load_exporter_class(name)(bus=bus, **kwargs)
@@ -0,0 +1,145 @@
+import hashlib
+import pathlib
+from typing import Callable, Optional, TextIO, Tuple
+
+from text_label.bus import Bus
+from text_label.project import Project
+from text_label.exporters.exporter import Exporter, ExportSummary, ProgressCallback
+
+
+# (text, label, category_id)
+Row = Tuple[str, str, int]
+RowWriter = Callable[[Row], None]
+
+
+class Shards:
+    def __init__(self, path_to_dir: pathlib.Path, prefix: str, extension: str, shard_size: int,
+                 open_shard: Callable[[pathlib.Path], Tuple[TextIO, RowWriter]]):
+        self.path_to_dir = path_to_dir
+        self.prefix = prefix
+        self.extension = extension
+        self.shard_size = shard_size
+        self.open_shard = open_shard
+
+        self.paths: list[pathlib.Path] = []
+        self.handle: Optional[TextIO] = None
+        self.write_row: Optional[RowWriter] = None
+        self.rows_in_shard = 0
+
+    def write(self, row: Row):
+        if self.handle is None or self.rows_in_shard >= self.shard_size:
+            self._rotate()
+        self.write_row(row)
+        self.rows_in_shard += 1
+
+    def _rotate(self):
+        self.close()
+        path_to_shard = self.path_to_dir / f'{self.prefix}-{len(self.paths):05d}{self.extension}'
+        self.handle, self.write_row = self.open_shard(path_to_shard)
+        self.paths.append(path_to_shard)
+        self.rows_in_shard = 0
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def get_size(self) -> int:
+        return sum(path.stat().st_size for path in self.paths)
+
+
+class ShardedExporter(Exporter):
+    FILE_EXTENSION: str = None
+    DEFAULT_SHARD_SIZE = 100_000
+    DEFAULT_SPLITS = {'train': 0.8, 'val': 0.1, 'test': 0.1}
+    PROGRESS_EVERY = 10_000
+    WRITE_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, bus: Optional[Bus] = None, shard_size: int = DEFAULT_SHARD_SIZE,
+                 splits: Optional[dict[str, float]] = None, split_seed: str = ''):
+        super().__init__(bus=bus)
+        self.shard_size = shard_size
+        self.splits = splits
+        self.split_seed = split_seed
+
+    @staticmethod
+    def get_split(text: str, splits: dict[str, float], split_seed: str = '') -> str:
+        # сплит зависит только от текста и seed, поэтому стабилен между запусками и не зависит от порядка
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(split_seed.encode('utf-8'))
+        digest.update(text.encode('utf-8'))
+        point = int.from_bytes(digest.digest(), 'big') / 2 ** 64 * sum(splits.values())
+
+        cumulative = 0.0
+        for split, ratio in splits.items():
+            cumulative += ratio
+            if point < cumulative:
+                return split
+        return split
+
+    def show_options(self, project_name: str, project: Project):
+        import tkinter
+        from tkinter import filedialog
+
+        def run_export():
+            self.shard_size = max(1, int(shard_size_sv.get() or self.DEFAULT_SHARD_SIZE))
+            self.splits = dict(self.DEFAULT_SPLITS) if split_bv.get() else None
+            root.destroy()
+
+            path_to_root_dir = filedialog.askdirectory(initialdir=pathlib.Path(__file__).parent)
+            if path_to_root_dir:
+                path_to_dir = pathlib.Path(path_to_root_dir, project_name)
+                self.export_in_background(path_to_dir=path_to_dir, project=project)
+
+        root = tkinter.Toplevel()
+        root.title(f'Export: {self.NAME}')
+
+        main_frame = tkinter.Frame(root, pady=5, padx=5)
+        shard_size_sv = tkinter.StringVar(value=str(self.shard_size))
+        split_bv = tkinter.BooleanVar(value=self.splits is not None)
+        shard_size_label = tkinter.Label(main_frame, text='Rows per shard')
+        shard_size_input = tkinter.Entry(main_frame, textvariable=shard_size_sv)
+        split_checkbutton = tkinter.Checkbutton(main_frame, text='Split train/val/test (80/10/10)', variable=split_bv)
+        button = tkinter.Button(main_frame, text='Export', command=run_export)
+
+        main_frame.grid(row=0, column=0, sticky='nesw')
+        shard_size_label.grid(row=0, column=0, padx=10, pady=10)
+        shard_size_input.grid(row=0, column=1, padx=10, pady=10)
+        split_checkbutton.grid(row=1, column=0, columnspan=2, sticky='w', padx=10)
+        button.grid(row=2, column=0, columnspan=2, pady=10)
+
+        root.resizable(False, False)
+        root.grab_set()
+        root.bind('<Escape>', lambda _: root.destroy())
+
+    def open_shard(self, path_to_shard: pathlib.Path) -> Tuple[TextIO, RowWriter]:
+        raise NotImplementedError
+
+    def export(self, path_to_dir: pathlib.Path, project: Project,
+               progress_callback: Optional[ProgressCallback] = None) -> ExportSummary:
+        self.cancel_event.clear()
+        path_to_dir = pathlib.Path(path_to_dir)
+        path_to_dir.mkdir(parents=True, exist_ok=True)
+
+        summary = ExportSummary()
+        total = self.count_category_texts(project)
+        shards: dict[str, Shards] = {}
+        try:
+            for cat_name, _, text_info in self.iter_category_texts(project):
+                if summary.rows % self.PROGRESS_EVERY == 0 and self.is_cancelled():
+                    break
+                split = self.get_split(text_info.text, self.splits, self.split_seed) if self.splits else 'part'
+                if split not in shards:
+                    shards[split] = Shards(path_to_dir, split, self.FILE_EXTENSION, self.shard_size, self.open_shard)
+                shards[split].write((text_info.text, cat_name, text_info.category_id))
+
+                summary.rows += 1
+                if progress_callback and (summary.rows % self.PROGRESS_EVERY == 0 or summary.rows == total):
+                    progress_callback(summary.rows, total)
+        finally:
+            for split_shards in shards.values():
+                split_shards.close()
+
+        summary.files = sum(len(split_shards.paths) for split_shards in shards.values())
+        summary.bytes = sum(split_shards.get_size() for split_shards in shards.values())
+        return summary.finish(cancelled=self.is_cancelled())
@@ -1,49 +1,200 @@
+import hashlib
+import json
+import os
 import os.path
 import pathlib
-from typing import Optional, List
-from tkinter import filedialog
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, List, Tuple, Iterator, Iterable
 
 from text_label.bus import Bus
 from text_label.project import Project
 from text_label.text_info import TextInfo
+from text_label.exporters.exporter import Exporter, ExportSummary, ProgressCallback
 
 
-class TextDirectoryExporter:
-    def __init__(self, bus: Optional[Bus] = None):
-        self.bus = bus
-        if self.bus:
-            self.bus.register('exporters[text_directory]', self)
+class TextDirectoryExporter(Exporter):
+    NAME = 'text_directory'
+    BATCH_SIZE = 256
 
-    def show_options(self):
+    def __init__(self, bus: Optional[Bus] = None, max_workers: int = min(32, (os.cpu_count() or 1) * 4)):
+        super().__init__(bus=bus)
+        self.max_workers = max_workers
+
+    def show_options(self, project_name: str, project: Project):
+        from tkinter import filedialog
         path_to_root_dir = filedialog.askdirectory(initialdir=pathlib.Path(__file__).parent)
         if path_to_root_dir:
-            project = self.bus.statechart.project
-            path_to_dir = pathlib.Path(path_to_root_dir, project.get_name())
-            self.export(path_to_dir=path_to_dir, project=project)
+            path_to_dir = pathlib.Path(path_to_root_dir, project_name)
+            self.export_in_background(path_to_dir=path_to_dir, project=project)
 
-    def export(self, path_to_dir: pathlib.Path, project: Project):
+    def export(self, path_to_dir: pathlib.Path, project: Project,
+               progress_callback: Optional[ProgressCallback] = None) -> ExportSummary:
+        self.cancel_event.clear()
+        summary = ExportSummary()
         if self.make_root_dir(path_to_dir):
-            for cat_id in project.categories:
-                cat_name = project.categories[cat_id]
-                path_to_category_dir = self.make_category_dir(path_to_dir, category_name=cat_name)
-                if path_to_category_dir:
-                    self.put_text_files_in_category_dir(path_to_category_dir, texts=project.get_texts(category_id=cat_id))
+            path_to_category_dirs = {cat_name: self.make_category_dir(path_to_dir, category_name=cat_name)
+                                     for cat_name in list(project.categories.values())}
+            total = self.count_category_texts(project)
+
+            self._write_batches(self._make_batches(project, path_to_category_dirs), summary, total, progress_callback)
+        return summary.finish(cancelled=self.is_cancelled())
+
+    def _write_batches(self, batches: Iterator[List[Tuple[pathlib.Path, str]]], summary: ExportSummary, total: int,
+                       progress_callback: Optional[ProgressCallback]):
+        # не больше 2 * max_workers пачек в очереди, чтобы не держать в памяти весь проект
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='text-directory-export') as executor:
+            in_flight: set[Future] = set()
+            for batch in batches:
+                if self.is_cancelled():
+                    break
+                if len(in_flight) >= self.max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._collect(done, summary, total, progress_callback)
+                in_flight.add(executor.submit(self.write_text_files, batch))
+            self._collect(wait(in_flight).done, summary, total, progress_callback)
+
+    def _make_batches(self, project: Project, path_to_category_dirs: dict[str, pathlib.Path]) -> Iterator[List[Tuple[pathlib.Path, str]]]:
+        return self._batched(((path_to_category_dirs[cat_name] / f'{idx}.txt', text_info.text)
+                              for cat_name, idx, text_info in self.iter_category_texts(project)), self.BATCH_SIZE)
+
+    @staticmethod
+    def _collect(done: set[Future], summary: ExportSummary, total: int, progress_callback: Optional[ProgressCallback]):
+        for future in done:
+            files, written = future.result()
+            summary.files += files
+            summary.bytes += written
+        if progress_callback and done:
+            progress_callback(summary.files, total)
+
+    @staticmethod
+    def _batched(items: Iterable[Tuple[pathlib.Path, str]], batch_size: int) -> Iterator[List[Tuple[pathlib.Path, str]]]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
     @staticmethod
     def make_root_dir(path_to_root_dir: pathlib.Path) -> bool:
-        path_to_root_dir.mkdir(parents=True)
+        path_to_root_dir.mkdir(parents=True, exist_ok=True)
         return os.path.exists(path_to_root_dir)
 
     @staticmethod
     def make_category_dir(path_to_root_dir: pathlib.Path, category_name: str) -> pathlib.Path:
         path_to_category_dir = path_to_root_dir / category_name
-        path_to_category_dir.mkdir(parents=True)
+        path_to_category_dir.mkdir(parents=True, exist_ok=True)
         return path_to_category_dir
 
     @staticmethod
-    def put_text_files_in_category_dir(path_to_category_dir: pathlib.Path, texts: List[TextInfo]):
-        for idx, text_info in enumerate(texts):
-            path_to_file = path_to_category_dir / f'{idx}.txt'
-            with open(path_to_file, mode='w', encoding='utf-8') as file_handle:
-                file_handle.write(text_info.text)
+    def write_text_files(batch: List[Tuple[pathlib.Path, str]]) -> Tuple[int, int]:
+        written = 0
+        for path_to_file, text in batch:
+            with open(path_to_file, mode='wb') as file_handle:
+                written += file_handle.write(text.encode('utf-8'))
+        return len(batch), written
+
+    @classmethod
+    def put_text_files_in_category_dir(cls, path_to_category_dir: pathlib.Path, texts: List[TextInfo]):
+        cls.write_text_files([(path_to_category_dir / f'{idx}.txt', text_info.text) for idx, text_info in enumerate(texts)])
+
+
+class IncrementalTextDirectoryExporter(TextDirectoryExporter):
+    NAME = 'text_directory_incremental'
+    MANIFEST_NAME = '.text_label_manifest.json'
+
+    def show_options(self, project_name: str, project: Project):
+        from tkinter import filedialog
+        # экспорт всегда в одну и ту же папку, чтобы следующий запуск мог переиспользовать уже записанные файлы
+        path_to_dir = filedialog.askdirectory(initialdir=pathlib.Path(__file__).parent)
+        if path_to_dir:
+            self.export_in_background(path_to_dir=pathlib.Path(path_to_dir), project=project, project_name=project_name)
+
+    @staticmethod
+    def get_file_name(text: str) -> str:
+        # имя файла зависит только от текста, поэтому не меняется при вставке и удалении соседних текстов
+        return f'{hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()}.txt'
+
+    @classmethod
+    def read_manifest(cls, path_to_dir: pathlib.Path) -> dict:
+        try:
+            with open(path_to_dir / cls.MANIFEST_NAME, mode='r', encoding='utf-8') as manifest_handle:
+                return json.load(manifest_handle)
+        except (OSError, ValueError):
+            return {'version': 1, 'project': None, 'files': []}
+
+    @classmethod
+    def write_manifest(cls, path_to_dir: pathlib.Path, project_name: Optional[str], files: Iterable[str]):
+        path_to_manifest = path_to_dir / cls.MANIFEST_NAME
+        path_to_tmp_manifest = path_to_manifest.with_suffix('.tmp')
+        with open(path_to_tmp_manifest, mode='w', encoding='utf-8') as manifest_handle:
+            json.dump({'version': 1, 'project': project_name, 'files': sorted(files)}, manifest_handle)
+        os.replace(path_to_tmp_manifest, path_to_manifest)
+
+    def export(self, path_to_dir: pathlib.Path, project: Project,
+               progress_callback: Optional[ProgressCallback] = None, project_name: Optional[str] = None) -> ExportSummary:
+        self.cancel_event.clear()
+        summary = ExportSummary()
+        path_to_dir = pathlib.Path(path_to_dir)
+        self.make_root_dir(path_to_dir)
+
+        manifest = self.read_manifest(path_to_dir)
+        # из GUI имя приходит готовым из потока statechart, без GUI экспорт идёт в том же потоке, что и правки
+        if project_name is None:
+            project_name = project.get_name()
+        if manifest['project'] == project_name:
+            return summary.finish()
+
+        # относительный путь 'категория/хеш.txt' -> позиция текста; одинаковые тексты в одной категории дают один файл.
+        # Тексты читаются один раз для хеша и держатся в памяти только позиции, тела перечитываются лишь для записываемых файлов
+        wanted: dict[str, int] = {}
+        for category_id, cat_name in list(project.categories.items()):
+            text_ids = project.get_text_ids_of_category(category_id)
+            for text_id, text_info in zip(text_ids, project.iter_texts_at(text_ids)):
+                wanted[f'{cat_name}/{self.get_file_name(text_info.text)}'] = text_id
+        exported = set(manifest['files'])
+
+        removed = [file for file in exported if file not in wanted]
+        added = [file for file in wanted if file not in exported]
+
+        for cat_name in list(project.categories.values()):
+            self.make_category_dir(path_to_dir, category_name=cat_name)
+
+        # текст сменил категорию - переносим файл вместо записи заново
+        removed_by_name = {}
+        for file in removed:
+            removed_by_name.setdefault(file.rsplit('/', 1)[-1], []).append(file)
+        to_write = []
+        for file in added:
+            same_text_files = removed_by_name.get(file.rsplit('/', 1)[-1])
+            if same_text_files:
+                os.replace(path_to_dir / same_text_files.pop(), path_to_dir / file)
+                summary.moved += 1
+            else:
+                to_write.append(file)
+        for same_text_files in removed_by_name.values():
+            for file in same_text_files:
+                (path_to_dir / file).unlink(missing_ok=True)
+                summary.removed += 1
+
+        for path_to_category_dir in {(path_to_dir / file).parent for file in removed}:
+            if path_to_category_dir.name not in project.categories.values():
+                try:
+                    path_to_category_dir.rmdir()
+                except OSError:
+                    pass
+
+        # тела читаются по порядку позиций, как лежат в проекте
+        to_write.sort(key=wanted.__getitem__)
+        texts = project.iter_texts_at(wanted[file] for file in to_write)
+        self._write_batches(self._batched(((path_to_dir / file, text_info.text) for file, text_info in zip(to_write, texts)), self.BATCH_SIZE),
+                            summary, len(to_write), progress_callback)
 
+        if self.is_cancelled():
+            # часть файлов не записана: в манифест только то, что реально лежит на диске
+            self.write_manifest(path_to_dir, None, (file for file in wanted if (path_to_dir / file).exists()))
+        else:
+            self.write_manifest(path_to_dir, project_name, wanted.keys())
+        return summary.finish(cancelled=self.is_cancelled())
@@ -0,0 +1,25 @@
+import array
+from typing import Optional, Sequence
+
+# ключи записей возрастают вместе с позицией и не меняются при вставке и удалении соседей:
+# между соседними ключами остаётся промежуток, вставленная запись получает его середину
+GAP = 1024
+
+
+def get_initial_key(idx: int) -> int:
+    return (idx + 1) * GAP
+
+
+def make_initial_keys(count: int) -> array.array:
+    return array.array('q', range(GAP, (count + 1) * GAP, GAP))
+
+
+def make_key(keys: Sequence[int], idx: int) -> Optional[int]:
+    # ключ для записи, вставляемой на позицию idx; None - промежуток исчерпан, ключи пора перенумеровать
+    prev_key = keys[idx - 1] if idx > 0 else 0
+    if idx >= len(keys):
+        return prev_key + GAP
+    next_key = keys[idx]
+    if next_key - prev_key < 2:
+        return None
+    return (prev_key + next_key) // 2
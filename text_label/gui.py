@@ -1,9 +1,17 @@
+import bisect
 import copy
+import sys
+import threading
+import time
 import tkinter
+from collections import deque
 from tkinter import filedialog, scrolledtext, ttk, font, messagebox
-from typing import Optional, List
+from typing import Callable, Optional, List, Sequence
 
 from text_label.bus import Bus
+from text_label.exporters.registry import get_exporter, get_exporter_names
+from text_label.lru_cache import LruCache
+from text_label.project import Project
 from text_label.text_info import TextInfo
 
 
@@ -36,7 +44,461 @@ class CategoryWidget(tkinter.Frame):
             self.delete_command()
 
 
+class TextListWindow:
+    def __init__(self, size: int = 0, visible_rows: int = 1, buffer: int = 5):
+        self.size = size
+        self.visible_rows = visible_rows
+        self.buffer = buffer
+        self.first_idx = 0
+
+    @property
+    def pool_size(self) -> int:
+        return self.visible_rows + self.buffer
+
+    def _clamp(self):
+        self.first_idx = max(0, min(self.first_idx, self.size - self.visible_rows))
+
+    def set_size(self, size: int):
+        self.size = size
+        self._clamp()
+
+    def set_visible_rows(self, visible_rows: int):
+        self.visible_rows = max(1, visible_rows)
+        self._clamp()
+
+    def scroll_to(self, first_idx: int):
+        self.first_idx = first_idx
+        self._clamp()
+
+    def scroll_by(self, rows: int):
+        self.scroll_to(self.first_idx + rows)
+
+    def make_visible(self, idx: int):
+        if idx < self.first_idx:
+            self.first_idx = idx
+        elif idx >= self.first_idx + self.visible_rows:
+            self.first_idx = idx - self.visible_rows + 1
+        self._clamp()
+
+    def insert(self, idx: int):
+        self.size += 1
+        if idx < self.first_idx:
+            self.first_idx += 1
+        self._clamp()
+
+    def remove(self, idx: int):
+        self.size -= 1
+        if idx < self.first_idx:
+            self.first_idx -= 1
+        self._clamp()
+
+    def contains(self, idx: int) -> bool:
+        return self.first_idx <= idx < min(self.size, self.first_idx + self.pool_size)
+
+    def indexes(self) -> range:
+        return range(self.first_idx, min(self.size, self.first_idx + self.pool_size))
+
+    def fractions(self) -> tuple[float, float]:
+        if self.size == 0:
+            return 0.0, 1.0
+        return self.first_idx / self.size, min(1.0, (self.first_idx + self.visible_rows) / self.size)
+
+
+class VirtualTextList(tkinter.Frame):
+    PREVIEW_LENGTH = 100
+    SCROLL_UNITS = 3
+
+    def __init__(self, parent, buffer: int = 5):
+        super().__init__(parent)
+        self.texts: List[TextInfo] = []
+        # если задан - список показывает только эти (отсортированные) тексты
+        self.text_ids: Optional[List[int]] = None
+        self.window = TextListWindow(buffer=buffer)
+        self.row_items: List[str] = []
+        self.item_by_text_idx: dict[int, str] = {}
+        # строки Treeview переиспользуются при прокрутке, поэтому выделение хранится по индексам текстов
+        self.selected_text_ids: set[int] = set()
+        self.anchor_text_idx: Optional[int] = None
+
+        self.tree = ttk.Treeview(self, columns=['Text', 'text_idx'], displaycolumns=['Text'], selectmode='extended', show='headings')
+        self.scrollbar = tkinter.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.tree.grid(row=0, column=0, sticky='nesw')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', lambda e: self._on_wheel(-1 if e.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda _: self._on_wheel(-1))
+        self.tree.bind('<Button-5>', lambda _: self._on_wheel(1))
+        self.tree.bind('<Button-1>', lambda e: self._on_click(e, 'set'))
+        self.tree.bind('<Control-Button-1>', lambda e: self._on_click(e, 'toggle'))
+        self.tree.bind('<Shift-Button-1>', lambda e: self._on_click(e, 'range'))
+        self.tree.bind('<Control-a>', lambda _: self.select_all())
+
+    @classmethod
+    def _make_preview(cls, text: str) -> str:
+        return text[:cls.PREVIEW_LENGTH].replace('\n', ' ')
+
+    def _get_preview(self, text_idx: int) -> str:
+        # проекты с ленивыми телами отдают начало текста, не читая его целиком
+        get_preview = getattr(self.texts, 'get_preview', None)
+        if get_preview is not None:
+            return self._make_preview(get_preview(text_idx, self.PREVIEW_LENGTH))
+        return self._make_preview(self.texts[text_idx].text)
+
+    def _get_row_height(self) -> int:
+        row_height = ttk.Style().lookup('Treeview', 'rowheight')
+        return int(row_height) if row_height else 20
+
+    def _on_configure(self, event):
+        row_height = self._get_row_height()
+        # заголовок занимает примерно одну строку
+        self.window.set_visible_rows(event.height // row_height - 1)
+        self._render()
+
+    def _on_wheel(self, direction: int):
+        self.window.scroll_by(direction * self.SCROLL_UNITS)
+        self._render()
+        return 'break'
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self.window.scroll_to(int(float(args[1]) * self.window.size))
+        elif args[0] == 'scroll':
+            rows = int(args[1]) * (self.window.visible_rows if args[2] == 'pages' else 1)
+            self.window.scroll_by(rows)
+        self._render()
+
+    def _resize_pool(self):
+        while len(self.row_items) < self.window.pool_size:
+            self.row_items.append(self.tree.insert('', 'end', values=('', '')))
+        while len(self.row_items) > self.window.pool_size:
+            self.tree.delete(self.row_items.pop())
+
+    def _get_text_idx(self, row: int) -> int:
+        return self.text_ids[row] if self.text_ids is not None else row
+
+    def _get_row(self, text_idx: int) -> Optional[int]:
+        if self.text_ids is None:
+            return text_idx
+        row = bisect.bisect_left(self.text_ids, text_idx)
+        if row < len(self.text_ids) and self.text_ids[row] == text_idx:
+            return row
+        return None
+
+    def _render(self):
+        self._resize_pool()
+        rows = self.window.indexes()
+        self.item_by_text_idx = {}
+        for row_idx, item in enumerate(self.row_items):
+            if row_idx < len(rows):
+                text_idx = self._get_text_idx(rows[row_idx])
+                self.item_by_text_idx[text_idx] = item
+                self.tree.move(item, '', row_idx)
+                self.tree.item(item, values=(self._get_preview(text_idx), text_idx))
+            else:
+                self.tree.detach(item)
+        self.tree.yview_moveto(0)
+        self.scrollbar.set(*self.window.fractions())
+        self._render_selection()
+
+    def _render_selection(self):
+        self.tree.selection_set([item for text_idx, item in self.item_by_text_idx.items() if text_idx in self.selected_text_ids])
+
+    def _on_click(self, event, mode: str):
+        item = self.tree.identify_row(event.y)
+        if not item:
+            return None
+        text_idx = int(self.tree.item(item, 'values')[1])
+
+        if mode == 'toggle':
+            self.selected_text_ids ^= {text_idx}
+        elif mode == 'range' and self.anchor_text_idx is not None and self._get_row(self.anchor_text_idx) is not None:
+            first_row, last_row = sorted((self._get_row(self.anchor_text_idx), self._get_row(text_idx)))
+            self.selected_text_ids = {self._get_text_idx(row) for row in range(first_row, last_row + 1)}
+            text_idx = self.anchor_text_idx
+        else:
+            self.selected_text_ids = {text_idx}
+        self.anchor_text_idx = text_idx
+        self._render_selection()
+        self.tree.focus_set()
+        return 'break'
+
+    def select_all(self):
+        self.selected_text_ids = set(self.text_ids) if self.text_ids is not None else set(range(len(self.texts)))
+        self._render_selection()
+        return 'break'
+
+    def get_selected_text_ids(self) -> List[int]:
+        return sorted(self.selected_text_ids)
+
+    def _render_row(self, text_idx: int):
+        if text_idx in self.item_by_text_idx:
+            item = self.item_by_text_idx[text_idx]
+            self.tree.item(item, values=(self._get_preview(text_idx), text_idx))
+
+    def set_texts(self, texts: List[TextInfo], text_ids: Optional[List[int]] = None):
+        self.texts = texts
+        self.text_ids = text_ids
+        self.selected_text_ids = set()
+        self.window.set_size(len(text_ids) if text_ids is not None else len(texts))
+        self._render()
+
+    def insert_text(self, texts: List[TextInfo], text_idx: int):
+        self.texts = texts
+        self.selected_text_ids = set()
+        self.window.insert(text_idx)
+        if self.window.contains(text_idx):
+            self._render()
+        else:
+            self.scrollbar.set(*self.window.fractions())
+
+    def remove_text(self, texts: List[TextInfo], text_idx: int):
+        self.texts = texts
+        self.selected_text_ids = set()
+        self.window.remove(text_idx)
+        self._render()
+
+    def update_text(self, texts: List[TextInfo], text_idx: int):
+        self.texts = texts
+        self._render_row(text_idx)
+
+    def see(self, text_idx: int):
+        row = self._get_row(text_idx)
+        if row is None:
+            return
+        first_idx = self.window.first_idx
+        self.window.make_visible(row)
+        if first_idx != self.window.first_idx:
+            self._render()
+
+    def select(self, text_idx: int):
+        self.selected_text_ids = {text_idx} if text_idx is not None else set()
+        self.anchor_text_idx = text_idx
+        if text_idx is not None:
+            self.see(text_idx)
+        self._render_selection()
+
+    def get_selected_text_idx(self) -> Optional[int]:
+        return self.anchor_text_idx if self.anchor_text_idx in self.selected_text_ids else None
+
+
+class TextViewer(tkinter.Frame):
+    # следующий кусок дорисовывается, когда прокрутка дошла до этой доли показанного текста
+    LOAD_MORE_AT = 0.9
+
+    def __init__(self, parent, text_font: font.Font, **kwargs):
+        super().__init__(parent)
+        self.chunks: Sequence[str] = ()
+        self.rendered_chunks = 0
+        self.loading = False
+
+        self.text = tkinter.Text(self, wrap='word', font=text_font, state='disabled', takefocus=0, **kwargs)
+        self.scrollbar = tkinter.Scrollbar(self, orient='vertical', command=self.text.yview)
+        self.text.configure(yscrollcommand=self._on_yscroll)
+
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.text.grid(row=0, column=0, sticky='nesw')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+
+    def show(self, chunks: Sequence[str]):
+        # сразу показываем только первый кусок, остальные - по мере прокрутки
+        self.chunks = chunks
+        self.rendered_chunks = 0
+        self.text.configure(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.configure(state='disabled')
+        self._render_next_chunk()
+        self.text.yview_moveto(0)
+
+    def _render_next_chunk(self):
+        self.loading = False
+        if self.rendered_chunks < len(self.chunks):
+            self.text.configure(state='normal')
+            self.text.insert('end', self.chunks[self.rendered_chunks])
+            self.text.configure(state='disabled')
+            self.rendered_chunks += 1
+
+    def _on_yscroll(self, first: str, last: str):
+        self.scrollbar.set(first, last)
+        if not self.loading and float(last) >= self.LOAD_MORE_AT and self.rendered_chunks < len(self.chunks):
+            self.loading = True
+            self.after_idle(self._render_next_chunk)
+
+
+class TextRenderCache:
+    CHUNK_SIZE = 8192
+    BUDGET_BYTES = 32 * 1024 * 1024
+    PREFETCH_DISTANCE = 3
+
+    def __init__(self, budget_bytes: int = BUDGET_BYTES):
+        self.lock = threading.Lock()
+        # text_idx -> куски текста
+        self.chunks = LruCache(budget_bytes, get_size=lambda chunks: sum(sys.getsizeof(chunk) for chunk in chunks))
+        # меняется при каждой очистке: рендеры, начатые до неё, в кеш не попадают
+        self.generation = 0
+        self.pending: Optional[tuple[int, Sequence[TextInfo], List[int]]] = None
+        self.pending_event = threading.Event()
+        self.worker: Optional[threading.Thread] = None
+
+    @classmethod
+    def render(cls, text: str) -> tuple[str, ...]:
+        text = text.replace('\r\n', '\n')
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = start + cls.CHUNK_SIZE
+            if end < len(text):
+                # режем по пробелу, чтобы слово не разорвалось между кусками
+                space = max(text.rfind(' ', start + cls.CHUNK_SIZE // 2, end), text.rfind('\n', start + cls.CHUNK_SIZE // 2, end))
+                if space > 0:
+                    end = space + 1
+            chunks.append(text[start:end])
+            start = end
+        return tuple(chunks) if len(chunks) > 0 else ('',)
+
+    def _put(self, text_idx: int, chunks: tuple[str, ...], generation: int):
+        with self.lock:
+            if generation == self.generation:
+                self.chunks.put(text_idx, chunks)
+
+    def get(self, texts: Sequence[TextInfo], text_idx: int) -> tuple[str, ...]:
+        with self.lock:
+            chunks = self.chunks.get(text_idx)
+            if chunks is not None:
+                return chunks
+            generation = self.generation
+        chunks = self.render(texts[text_idx].text)
+        self._put(text_idx, chunks, generation)
+        return chunks
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.chunks.clear()
+            self.pending = None
+
+    def prefetch(self, texts: Sequence[TextInfo], text_ids: List[int]):
+        # новый запрос заменяет невыполненный старый
+        with self.lock:
+            self.pending = (self.generation, texts, [text_idx for text_idx in text_ids if text_idx not in self.chunks])
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._run_worker, name='text-render-prefetch', daemon=True)
+            self.worker.start()
+        self.pending_event.set()
+
+    def _run_worker(self):
+        while True:
+            self.pending_event.wait()
+            with self.lock:
+                self.pending_event.clear()
+                pending, self.pending = self.pending, None
+            if pending is None:
+                continue
+            generation, texts, text_ids = pending
+            for text_idx in text_ids:
+                with self.lock:
+                    if self.pending is not None or generation != self.generation:
+                        break
+                    if text_idx in self.chunks:
+                        continue
+                try:
+                    chunks = self.render(texts[text_idx].text)
+                except IndexError:
+                    break
+                self._put(text_idx, chunks, generation)
+
+    def get_stats(self) -> dict[str, int]:
+        with self.lock:
+            return self.chunks.get_stats()
+
+
+class GuiUpdateQueue:
+    # больше стольких точечных изменений списка за один тик дешевле перерисовать его целиком
+    MAX_TEXT_CHANGES = 20
+    LATENCY_SAMPLES = 1000
+
+    def __init__(self, refresh_texts: Callable[[List[TextInfo]], None]):
+        self.refresh_texts = refresh_texts
+        self.lock = threading.Lock()
+        # key -> (callback, args), повторная отправка с тем же key заменяет предыдущую
+        self.updates: dict[str, tuple[Callable, tuple]] = {}
+        self.text_changes: list[tuple[Callable, tuple]] = []
+        self.first_posted_at: Optional[float] = None
+
+        self.posted = 0
+        self.painted = 0
+        self.latencies: deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+
+    def _mark_posted(self):
+        self.posted += 1
+        if self.first_posted_at is None:
+            self.first_posted_at = time.perf_counter()
+
+    def post(self, key: str, callback: Callable, *args):
+        with self.lock:
+            self._mark_posted()
+            self.updates.pop(key, None)
+            self.updates[key] = (callback, args)
+
+    def post_texts(self, texts: List[TextInfo]):
+        with self.lock:
+            self._mark_posted()
+            # полная перерисовка покрывает все точечные изменения до неё
+            self.text_changes.clear()
+            self.updates.pop('texts', None)
+            self.updates['texts'] = (self.refresh_texts, (texts,))
+
+    def post_text_change(self, callback: Callable, texts: List[TextInfo], text_idx: int):
+        with self.lock:
+            self._mark_posted()
+            if 'texts' in self.updates:
+                self.updates['texts'] = (self.refresh_texts, (texts,))
+            elif len(self.text_changes) >= self.MAX_TEXT_CHANGES:
+                self.text_changes.clear()
+                self.updates['texts'] = (self.refresh_texts, (texts,))
+            else:
+                self.text_changes.append((callback, (texts, text_idx)))
+
+    def drain(self) -> list[tuple[Callable, tuple]]:
+        with self.lock:
+            updates = list(self.updates.values()) + self.text_changes
+            self.updates = {}
+            self.text_changes = []
+            return updates
+
+    def run(self) -> int:
+        with self.lock:
+            first_posted_at = self.first_posted_at
+            self.first_posted_at = None
+        updates = self.drain()
+        for callback, args in updates:
+            callback(*args)
+        if first_posted_at is not None:
+            self.painted += 1
+            self.latencies.append(time.perf_counter() - first_posted_at)
+        return len(updates)
+
+    def get_latency_stats(self) -> dict[str, float]:
+        latencies = sorted(self.latencies)
+        if len(latencies) == 0:
+            return {'posted': self.posted, 'painted': self.painted, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        return {'posted': self.posted,
+                'painted': self.painted,
+                'mean_ms': sum(latencies) / len(latencies) * 1000,
+                'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+                'max_ms': latencies[-1] * 1000}
+
+
 class Gui:
+    UPDATE_INTERVAL_MS = 16
+    # поиск запускается, когда пользователь перестал печатать
+    SEARCH_DELAY_MS = 150
+    METRICS_REFRESH_MS = 1000
+
     def __init__(self, bus: Bus):
         self.bus = bus
         self.bus.register('gui', self)
@@ -45,6 +507,14 @@ class Gui:
         self.categories_rb: dict[int, CategoryWidget] = {}
         self.texts: List[TextInfo] = []
         self.categories: dict[int, str] = {}
+        self.progress_popup: Optional[tkinter.Toplevel] = None
+        self.search_after_id: Optional[str] = None
+        # последний ответ statechart на поиск, сами тексты ищутся в его потоке
+        self.filtered_text_ids: Optional[List[int]] = None
+        # statechart и экспортёры живут в своих потоках: в Tk они только ставят обновления в очередь
+        self.updates = GuiUpdateQueue(refresh_texts=self._render_texts)
+        # готовые к показу куски текущего и соседних текстов, соседние считаются в фоне
+        self.text_cache = TextRenderCache()
 
     def run(self):
         self.root = tkinter.Tk()
@@ -64,14 +534,15 @@ class Gui:
                                              command=lambda: self._mark_text(self.current_text_idx, category_id=int(self.categories_sv.get())))
 
         self.texts_frame = tkinter.Frame(self.main_frame, background='green')
-        self.texts_list = ttk.Treeview(self.texts_frame, columns=['Text', 'text_idx'], displaycolumns=['Text'], selectmode='browse', show='headings')
-        self.texts_scrollbar = tkinter.Scrollbar(self.texts_frame, orient='vertical', command=self.texts_list.yview)
+        self.search_sv = tkinter.StringVar(value='')
+        # один раз на окно: _init_bindings вызывается при каждом открытии проекта
+        self.search_sv.trace_add('write', lambda *_: self._schedule_search())
+        self.search_entry = ttk.Entry(self.texts_frame, textvariable=self.search_sv, state='disabled')
+        self.texts_list = VirtualTextList(self.texts_frame)
+        self.only_unlabelled_bv = tkinter.BooleanVar(value=False)
 
-        self.texts_list['yscrollcommand'] = self.texts_scrollbar.set
-
-        self.current_text_sv = tkinter.StringVar(value='Тестовый текст')
         self.current_text_font = font.Font(size=24)
-        self.current_text_frame = tkinter.Label(self.main_frame, background='blue', textvariable=self.current_text_sv, font=self.current_text_font)
+        self.current_text_frame = TextViewer(self.main_frame, text_font=self.current_text_font, background='blue', padx=10, pady=10)
 
         self.root.attributes('-zoomed', True)
         self.root.rowconfigure(0, weight=1)
@@ -85,19 +556,26 @@ class Gui:
         self.categories_texts_menu.add_separator()
         self.categories_texts_menu.add_command(label='Add Text', accelerator='Ctrl-i', command=self._show_import_text_from_input_popup, state='disabled')
         self.categories_texts_menu.add_command(label='Import Text From File', accelerator='Ctrl-f', command=self._show_import_text_from_file_popup, state='disabled')
+        self.categories_texts_menu.add_command(label='Import Directory', accelerator='Ctrl-d', command=self._show_import_directory_popup, state='disabled')
+        self.categories_texts_menu.add_command(label='Import Corpus', accelerator='Ctrl-j', command=self._show_import_corpus_popup, state='disabled')
         self.categories_texts_menu.add_separator()
         self.categories_texts_menu.add_command(label='Font Size +', accelerator='Ctrl-+', command=lambda: self.change_font_size(2), state='disabled')
         self.categories_texts_menu.add_command(label='Font Size -', accelerator='Ctrl--', command=lambda: self.change_font_size(-2), state='disabled')
         self.categories_texts_menu.add_separator()
         self.categories_texts_menu.add_command(label='Undo', accelerator='Ctrl-z', command=self.bus.statechart.launch_undo_event, state='disabled')
+        self.categories_texts_menu.add_command(label='Redo', accelerator='Ctrl-y', command=self.bus.statechart.launch_redo_event, state='disabled')
+        self.categories_texts_menu.add_separator()
+        self.categories_texts_menu.add_command(label='Search', accelerator='Ctrl-e', command=self._focus_search, state='disabled')
+        self.categories_texts_menu.add_checkbutton(label='Only Unlabelled', accelerator='Ctrl-u', variable=self.only_unlabelled_bv, command=self._refresh_texts_filter, state='disabled')
 
-        if self.bus.exporters:
-            for k, v in self.bus.exporters.items():
-                self.exports_menu.add_command(label=k, command=lambda: v.show_options(), state='disabled')
+        for exporter_name in get_exporter_names():
+            self.exports_menu.add_command(label=exporter_name, command=self._make_show_export_options_callback(exporter_name), state='disabled')
 
         self.main_menu.add_cascade(label='Project', menu=self.project_menu)
         self.main_menu.add_cascade(label='Categories/Texts', menu=self.categories_texts_menu)
         self.main_menu.add_cascade(label='Export', menu=self.exports_menu)
+        if self.bus.metrics is not None:
+            self.main_menu.add_command(label='Metrics', command=self._show_metrics_popup)
         self.main_menu.add_command(label='Help', command=self._show_help_popup)
 
         self.main_frame.grid(row=0, column=0, sticky='nesw')
@@ -109,9 +587,10 @@ class Gui:
         self.nocategory_rb.grid(row=0, column=0, sticky='nesw')
 
         self.texts_frame.grid(row=1, column=0, sticky='nesw')
-        self.texts_frame.rowconfigure(0, weight=1)
-        self.texts_list.grid(row=0, column=0, sticky='nesw')
-        self.texts_scrollbar.grid(row=0, column=1, sticky='ns')
+        self.texts_frame.rowconfigure(1, weight=1)
+        self.texts_frame.columnconfigure(0, weight=1)
+        self.search_entry.grid(row=0, column=0, sticky='ew')
+        self.texts_list.grid(row=1, column=0, sticky='nesw')
 
         self.current_text_frame.grid(row=1, column=1, sticky='nesw')
 
@@ -120,22 +599,38 @@ class Gui:
         self.root.bind('<F1>', lambda _: self._show_help_popup())
 
         self.root.config(menu=self.main_menu)
+        self.root.after(self.UPDATE_INTERVAL_MS, self._process_updates)
         self.root.mainloop()
 
+    def _process_updates(self):
+        try:
+            if self.updates.run() > 0:
+                # в задержку входит и сама отрисовка, а не только обработка очереди
+                self.root.update_idletasks()
+        finally:
+            self.root.after(self.UPDATE_INTERVAL_MS, self._process_updates)
+
     def init_bindings(self):
+        self.updates.post('init_bindings', self._init_bindings)
+
+    def _init_bindings(self):
         def _on_texts_list_listbox_select_event_cb(_):
-            item_idx = self.texts_list.selection()
-            if item_idx and len(item_idx) > 0:
-                text_idx = self.texts_list.item(item_idx[0], 'values')[1]
-                self._select_text(int(text_idx))
+            text_idx = self.texts_list.get_selected_text_idx()
+            if text_idx is not None:
+                self._select_text(text_idx)
 
-        self.texts_list.bind('<Double-Button-1>', _on_texts_list_listbox_select_event_cb)
+        self.texts_list.tree.bind('<Double-Button-1>', _on_texts_list_listbox_select_event_cb)
 
         self.root.bind('<Control-s>', lambda _: self._show_save_project_popup())
         self.root.bind('<Control-k>', lambda _: self._show_add_category_popup_popup())
         self.root.bind('<Control-i>', lambda _: self._show_import_text_from_input_popup())
         self.root.bind('<Control-f>', lambda _: self._show_import_text_from_file_popup())
+        self.root.bind('<Control-d>', lambda _: self._show_import_directory_popup())
+        self.root.bind('<Control-j>', lambda _: self._show_import_corpus_popup())
         self.root.bind('<Control-z>', lambda _: self.bus.statechart.launch_undo_event())
+        self.root.bind('<Control-y>', lambda _: self.bus.statechart.launch_redo_event())
+        self.root.bind('<Control-u>', lambda _: self._toggle_only_unlabelled())
+        self.root.bind('<Control-e>', lambda _: self._focus_search())
         self.root.bind('<KeyPress-Delete>', lambda _: self.bus.statechart.launch_remove_text_event(self.current_text_idx))
 
         self.root.bind('<KeyPress-Up>', lambda _: self.select_prev())
@@ -159,14 +654,28 @@ class Gui:
 
             self.root.bind(f'<KeyPress-KP_{i}>', __closure())
 
+        # без привязок окна: пока печатается запрос, Delete, стрелки и цифры не трогают тексты
+        self.search_entry.configure(state='normal')
+        self.search_entry.bindtags((str(self.search_entry), 'TEntry', 'all'))
+        self.search_entry.bind('<Escape>', lambda _: self._clear_search())
+        self.search_entry.bind('<Return>', lambda _: self.root.focus_set())
+
     def enable_menus(self):
+        self.updates.post('enable_menus', self._enable_menus)
+
+    def _enable_menus(self):
         self.project_menu.entryconfig('Save', state='normal')
         self.categories_texts_menu.entryconfig('Add Category', state='normal')
         self.categories_texts_menu.entryconfig('Add Text', state='normal')
         self.categories_texts_menu.entryconfig('Import Text From File', state='normal')
+        self.categories_texts_menu.entryconfig('Import Directory', state='normal')
+        self.categories_texts_menu.entryconfig('Import Corpus', state='normal')
         self.categories_texts_menu.entryconfig('Font Size +', state='normal')
         self.categories_texts_menu.entryconfig('Font Size -', state='normal')
         self.categories_texts_menu.entryconfig('Undo', state='normal')
+        self.categories_texts_menu.entryconfig('Redo', state='normal')
+        self.categories_texts_menu.entryconfig('Search', state='normal')
+        self.categories_texts_menu.entryconfig('Only Unlabelled', state='normal')
 
         if self.exports_menu:
             for entry_idx in range(self.exports_menu.index('end') + 1):
@@ -174,6 +683,9 @@ class Gui:
 
 
     def update_categories(self, categories: dict):
+        self.updates.post('categories', self._render_categories, categories)
+
+    def _render_categories(self, categories: dict):
         self.categories = categories
 
         for rb in self.categories_rb.values():
@@ -200,40 +712,167 @@ class Gui:
 
             self.categories_rb[rb_idx].grid(row=0, column=len(self.categories_rb) + 1, sticky='nesw')
 
+    def _is_filtered(self) -> bool:
+        return self.only_unlabelled_bv.get() or self.search_sv.get().strip() != ''
+
+    def _get_filtered_text_ids(self) -> Optional[List[int]]:
+        # пока после правки не пришёл новый ответ, показываем прошлый без позиций за концом списка
+        if not self._is_filtered():
+            return None
+        return [text_id for text_id in self.filtered_text_ids or [] if text_id < len(self.texts)]
+
+    def _request_search(self):
+        if self._is_filtered():
+            self.bus.statechart.launch_search_event(self.search_sv.get(), self.only_unlabelled_bv.get())
+
+    def show_search_results(self, query: str, only_unlabelled: bool, text_ids: List[int]):
+        self.updates.post('search_results', self._show_search_results, query, only_unlabelled, text_ids)
+
+    def _show_search_results(self, query: str, only_unlabelled: bool, text_ids: List[int]):
+        # ответ на запрос, который пользователь уже успел изменить
+        if query != self.search_sv.get() or only_unlabelled != self.only_unlabelled_bv.get():
+            return
+        self.filtered_text_ids = text_ids
+        self.texts_list.set_texts(self.texts, self._get_filtered_text_ids())
+        self._select_text(self.current_text_idx)
+
+    def _focus_search(self):
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, 'end')
+
+    def _clear_search(self):
+        self.search_sv.set('')
+        self.root.focus_set()
+
+    def _schedule_search(self):
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(self.SEARCH_DELAY_MS, self._run_search)
+
+    def _run_search(self):
+        self.search_after_id = None
+        self._refresh_texts_filter()
+
+    def _refresh_texts_filter(self):
+        if self._is_filtered():
+            self._request_search()
+            return
+        self.filtered_text_ids = None
+        self.texts_list.set_texts(self.texts, None)
+        self._select_text(self.current_text_idx)
+
+    def _toggle_only_unlabelled(self):
+        self.only_unlabelled_bv.set(not self.only_unlabelled_bv.get())
+        self._refresh_texts_filter()
+
     def update_texts(self, texts: List[TextInfo]):
-        same_size = len(texts) == self.texts
-        self.texts = texts
-        if self.texts_list.tag_has('#text'):
-            for item in self.texts_list.get_children(''):
-                self.texts_list.delete(item)
+        self.updates.post_texts(texts)
 
-        for text_idx, text in enumerate(self.texts):
-            self.texts_list.insert('', 'end', values=(copy.copy(text.text),copy.copy(text_idx)), tags=('#text',))
+    def _render_texts(self, texts: List[TextInfo]):
+        same_size = len(texts) == len(self.texts)
+        self.texts = texts
+        self.text_cache.clear()
+        self.texts_list.set_texts(texts, self._get_filtered_text_ids())
+        self._request_search()
         if same_size:
             self._select_text(self.current_text_idx)
         else:
             self._select_text(0)
 
+    def insert_text(self, texts: List[TextInfo], text_idx: int):
+        self.updates.post_text_change(self._render_inserted_text, texts, text_idx)
+
+    def _render_inserted_text(self, texts: List[TextInfo], text_idx: int):
+        self.texts = texts
+        self.text_cache.clear()
+        if self._is_filtered():
+            self.texts_list.set_texts(texts, self._get_filtered_text_ids())
+            self._request_search()
+        else:
+            self.texts_list.insert_text(texts, text_idx)
+        if self.current_text_idx is None:
+            self._select_text(0)
+        else:
+            if text_idx <= self.current_text_idx:
+                self.current_text_idx += 1
+            self._select_text(self.current_text_idx)
+
+    def remove_text(self, texts: List[TextInfo], text_idx: int):
+        self.updates.post_text_change(self._render_removed_text, texts, text_idx)
+
+    def _render_removed_text(self, texts: List[TextInfo], text_idx: int):
+        self.texts = texts
+        self.text_cache.clear()
+        if self._is_filtered():
+            self.texts_list.set_texts(texts, self._get_filtered_text_ids())
+            self._request_search()
+        else:
+            self.texts_list.remove_text(texts, text_idx)
+        if self.current_text_idx is not None and text_idx < self.current_text_idx:
+            self.current_text_idx -= 1
+        if len(self.texts) == 0:
+            self._select_text(None)
+        else:
+            self._select_text(min(self.current_text_idx or 0, len(self.texts) - 1))
+
+    def update_text(self, texts: List[TextInfo], text_idx: int):
+        self.updates.post_text_change(self._render_updated_text, texts, text_idx)
+
+    def _render_updated_text(self, texts: List[TextInfo], text_idx: int):
+        self.texts = texts
+        if self._is_filtered():
+            self.texts_list.set_texts(texts, self._get_filtered_text_ids())
+            self._request_search()
+        else:
+            self.texts_list.update_text(texts, text_idx)
+        if text_idx == self.current_text_idx:
+            self._select_text(self.current_text_idx)
+
+    def select_text(self, text_idx: int):
+        self.updates.post('select_text', self._select_text, text_idx)
+
+    def show_duplicate_text(self, text_idx: int):
+        self.updates.post('select_text', self._show_duplicate_text, text_idx)
+
+    def _show_duplicate_text(self, text_idx: int):
+        self._select_text(text_idx)
+        messagebox.showinfo(title='Add text', message=f'The text is already in the project (#{text_idx}), it is selected instead of adding a copy')
+
     def _select_text(self, text_idx):
         self.current_text_idx = text_idx
 
         if self.current_text_idx is not None and self.current_text_idx <= (len(self.texts) - 1):
-            text = self.texts[self.current_text_idx].text
             category_id: Optional[int] = self.texts[self.current_text_idx].category_id
-            self.current_text_sv.set(text)
+            self.current_text_frame.show(self.text_cache.get(self.texts, self.current_text_idx))
             self.categories_sv.set(str(category_id) if category_id is not None else '-1')
             self._set_text_list_selection(self.current_text_idx)
+            self.text_cache.prefetch(self.texts, self._get_neighbour_text_ids(self.current_text_idx))
         else:
-            self.current_text_sv.set('')
+            self.current_text_frame.show(())
             self.categories_sv.set('-1')
 
+    def _get_neighbour_text_ids(self, text_idx: int) -> List[int]:
+        # сначала следующие: по датасету обычно идут вперёд
+        text_ids = self.texts_list.text_ids
+        row = text_idx if text_ids is None else bisect.bisect_left(text_ids, text_idx)
+        rows = len(self.texts) if text_ids is None else len(text_ids)
+        neighbour_text_ids = []
+        for distance in range(1, self.text_cache.PREFETCH_DISTANCE + 1):
+            for neighbour_row in (row + distance, row - distance):
+                if 0 <= neighbour_row < rows:
+                    neighbour_text_ids.append(neighbour_row if text_ids is None else text_ids[neighbour_row])
+        return neighbour_text_ids
+
     def _set_text_list_selection(self, text_idx_to_select):
-        for text_list_item_idx, text_list_item in enumerate(self.texts_list.get_children('')):
-            if text_idx_to_select == text_list_item_idx:
-                self.texts_list.selection_set((text_list_item,))
-                break
+        self.texts_list.select(text_idx_to_select)
 
     def _get_prev_text_idx(self) -> Optional[int]:
+        text_ids = self.texts_list.text_ids
+        if text_ids is not None:
+            if len(text_ids) == 0:
+                return None
+            row = bisect.bisect_left(text_ids, self.current_text_idx) if self.current_text_idx is not None else 0
+            return text_ids[row - 1]
         if len(self.texts) == 0:
             return None
         if self.current_text_idx is None or self.current_text_idx == 0:
@@ -241,6 +880,12 @@ class Gui:
         return self.current_text_idx - 1
 
     def _get_next_text_idx(self) -> Optional[int]:
+        text_ids = self.texts_list.text_ids
+        if text_ids is not None:
+            if len(text_ids) == 0:
+                return None
+            row = bisect.bisect_right(text_ids, self.current_text_idx) if self.current_text_idx is not None else 0
+            return text_ids[row] if row < len(text_ids) else text_ids[0]
         if len(self.texts) == 0:
             return None
         if self.current_text_idx is None or self.current_text_idx == (len(self.texts) - 1):
@@ -258,7 +903,14 @@ class Gui:
                 self.categories_rb[rb_key_to_invoke].invoke()
 
     def _mark_text(self, text_id: int, category_id: int):
-        self.bus.statechart.launch_mark_text_event(text_id, category_id)
+        # <NOCATEGORY> приходит как -1
+        category_id = category_id if category_id >= 0 else None
+        text_ids = self.texts_list.get_selected_text_ids()
+        if len(text_ids) > 1:
+            # выделено несколько текстов - размечаем их одной операцией
+            self.bus.statechart.launch_mark_texts_event(text_ids, category_id)
+        else:
+            self.bus.statechart.launch_mark_text_event(text_id, category_id)
 
     def select_prev(self):
         text_idx = self._get_prev_text_idx()
@@ -270,17 +922,122 @@ class Gui:
         if text_idx is not None:
             self._select_text(text_idx)
 
+    def _show_progress(self, title: str, done: int, total: int, cancel_command):
+        if self.progress_popup is None or not self.progress_popup.winfo_exists():
+            root = tkinter.Toplevel()
+            root.title(title)
+
+            main_frame = tkinter.Frame(root, pady=5, padx=5)
+            self.progress_sv = tkinter.StringVar()
+            self.progress_bar = ttk.Progressbar(main_frame, orient='horizontal', length=300, mode='determinate')
+            label = tkinter.Label(main_frame, textvariable=self.progress_sv)
+            button = tkinter.Button(main_frame, text='Cancel', command=cancel_command)
+
+            main_frame.grid(column=0, row=0, sticky='nesw')
+            self.progress_bar.grid(column=0, row=0, sticky='ew', padx=10, pady=10)
+            label.grid(column=0, row=1)
+            button.grid(column=0, row=2, pady=10)
+
+            root.resizable(False, False)
+            self.progress_popup = root
+
+        self.progress_bar.configure(maximum=max(total, 1), value=done)
+        self.progress_sv.set(f'{done} / {total}')
+
+    def _show_summary(self, title: str, summary):
+        if self.progress_popup is not None and self.progress_popup.winfo_exists():
+            self.progress_popup.destroy()
+        self.progress_popup = None
+        if getattr(summary, 'error', None) is not None:
+            messagebox.showerror(title=title, message=str(summary))
+        else:
+            messagebox.showinfo(title=title, message=str(summary))
+
+    @staticmethod
+    def _format_metrics(snapshot: dict) -> str:
+        lines = [f'{"histogram":48} {"count":>8} {"mean":>10} {"p95":>10} {"max":>10}']
+        for name, histogram in snapshot['histograms'].items():
+            lines.append(f'{name:48} {histogram["count"]:8} {histogram["mean"]:10.3f} {histogram["p95"]:10.3f} {histogram["max"]:10.3f}')
+        lines.append('')
+        for name, value in snapshot['counters'].items():
+            lines.append(f'{name:48} {value:8}')
+        for name, value in snapshot.get('gui_updates', {}).items():
+            lines.append(f'gui.updates.{name:36} {value:8.1f}')
+        return '\n'.join(lines)
+
+    def _show_metrics_popup(self):
+        metrics = self.bus.metrics
+        root = tkinter.Toplevel()
+        root.title('Metrics')
+
+        enabled_bv = tkinter.BooleanVar(value=metrics.enabled)
+        text = tkinter.Text(root, width=90, height=30, font='TkFixedFont')
+        buttons_frame = tkinter.Frame(root, pady=5, padx=5)
+
+        def _toggle():
+            if enabled_bv.get():
+                metrics.enable(self.bus)
+            else:
+                metrics.disable()
+
+        def _dump():
+            if path_to_file := filedialog.asksaveasfilename(defaultextension='.json', filetypes=[('JSON', '.json')]):
+                metrics.dump(path_to_file, self.bus)
+
+        def _refresh():
+            if not root.winfo_exists():
+                return
+            text.configure(state='normal')
+            text.delete('1.0', 'end')
+            text.insert('1.0', self._format_metrics(metrics.snapshot(self.bus)))
+            text.configure(state='disabled')
+            self.root.after(self.METRICS_REFRESH_MS, _refresh)
+
+        tkinter.Checkbutton(buttons_frame, text='Enabled', variable=enabled_bv, command=_toggle).grid(column=0, row=0)
+        tkinter.Button(buttons_frame, text='Reset', command=metrics.reset).grid(column=1, row=0, padx=5)
+        tkinter.Button(buttons_frame, text='Dump JSON', command=_dump).grid(column=2, row=0, padx=5)
+
+        root.rowconfigure(0, weight=1)
+        root.columnconfigure(0, weight=1)
+        text.grid(column=0, row=0, sticky='nesw')
+        buttons_frame.grid(column=0, row=1, sticky='w')
+
+        root.bind('<Escape>', lambda _: root.destroy())
+        _refresh()
+
+    def show_export_progress(self, exporter_name: str, done: int, total: int):
+        self.updates.post('export_progress', self._show_progress, f'Export: {exporter_name}', done, total,
+                          lambda: self.bus.exporters[exporter_name].cancel())
+
+    def show_export_summary(self, exporter_name: str, summary):
+        self.updates.post('export_summary', self._show_summary, f'Export: {exporter_name}', summary)
+
+    def show_import_progress(self, done: int, total: int):
+        self.updates.post('import_progress', self._show_progress, 'Import', done, total, self.bus.statechart.launch_cancel_import_event)
+
+    def show_import_summary(self, summary):
+        self.updates.post('import_summary', self._show_summary, 'Import', summary)
+
+    def _make_show_export_options_callback(self, exporter_name: str):
+        return lambda: self.bus.statechart.launch_show_export_options_event(exporter_name)
+
+    def show_export_options(self, exporter_name: str, project_name: str, project: Project):
+        self.updates.post('export_options', self._show_export_options, exporter_name, project_name, project)
+
+    def _show_export_options(self, exporter_name: str, project_name: str, project: Project):
+        get_exporter(exporter_name, bus=self.bus).show_options(project_name, project)
+
     def change_font_size(self, direction: int = 2):
         current_font_size = int(self.current_text_font.cget('size'))
         new_font_size = current_font_size + direction
         self.current_text_font.config(size=new_font_size)
 
     def _show_load_project_popup(self):
-        if path_to_project := filedialog.askopenfilename(filetypes=[('Project', '.json.tl')]):
+        if path_to_project := filedialog.askopenfilename(filetypes=[('Project', '.json.tl'), ('Project Log', '.jsonl.tl'), ('Project Database', '.sqlite.tl'), ('Project Blob', '.blob.tl')]):
             self.bus.statechart.launch_load_project_event(path_to_project)
 
     def _show_save_project_popup(self):
-        if path_to_project := filedialog.asksaveasfilename(filetypes=[('Project', '.json.tl')]):
+        if path_to_project := filedialog.asksaveasfilename(filetypes=[('Project', '.json.tl'), ('Project Log', '.jsonl.tl'), ('Project Database', '.sqlite.tl'), ('Project Blob', '.blob.tl')]):
             self.bus.statechart.launch_save_project_event(path_to_project)
 
     def _show_add_category_popup_popup(self):
@@ -356,6 +1113,14 @@ class Gui:
         if path_to_file := filedialog.askopenfilename(filetypes=[('Text', '.txt')]):
             self.bus.statechart.launch_import_text_from_file_event(path_to_file)
 
+    def _show_import_directory_popup(self):
+        if path_to_dir := filedialog.askdirectory():
+            self.bus.statechart.launch_import_directory_event(path_to_dir)
+
+    def _show_import_corpus_popup(self):
+        if path_to_file := filedialog.askopenfilename(filetypes=[('JSONL', '.jsonl'), ('CSV', '.csv'), ('TSV', '.tsv')]):
+            self.bus.statechart.launch_import_corpus_event(path_to_file)
+
     @staticmethod
     def _show_help_popup():
         root = tkinter.Toplevel()
@@ -363,13 +1128,20 @@ class Gui:
 
         help_text = '''
 <Double-Button-1> - select text from list
+<Control-Button-1>/<Shift-Button-1> - select several texts, choosing a category labels all of them
+<Control-a> - select all listed texts (when the list has focus)
 <Control-n> - new (empty) project
 <Control-o> - open existing project
 <Control-s> - save project
 <Control-k> - add category
 <Control-i> - insert text from popup
 <Control-f> - import text from file
+<Control-d> - import all *.txt files from directory
+<Control-j> - import JSONL/CSV corpus ("text" and optional "label" fields)
 <Control-z> - undo
+<Control-y> - redo
+<Control-u> - show only unlabelled texts
+<Control-e> - search texts (<Escape> clears the search)
 <KeyPress-Delete> - delete selected text
 
 <KeyPress-Left>/<KeyPress-Up> - select previous text
@@ -410,6 +1182,39 @@ class TestableGui(Gui):
     def update_texts(self, texts: dict):
         pass
 
+    def insert_text(self, texts: List[TextInfo], text_idx: int):
+        pass
+
+    def remove_text(self, texts: List[TextInfo], text_idx: int):
+        pass
+
+    def update_text(self, texts: List[TextInfo], text_idx: int):
+        pass
+
+    def select_text(self, text_idx: int):
+        pass
+
+    def show_duplicate_text(self, text_idx: int):
+        pass
+
+    def show_search_results(self, query: str, only_unlabelled: bool, text_ids: List[int]):
+        pass
+
+    def show_export_options(self, exporter_name: str, project_name: str, project: Project):
+        pass
+
+    def show_export_progress(self, exporter_name: str, done: int, total: int):
+        pass
+
+    def show_export_summary(self, exporter_name: str, summary):
+        pass
+
+    def show_import_progress(self, done: int, total: int):
+        pass
+
+    def show_import_summary(self, summary):
+        pass
+
     def _show_load_project_popup(self):
         pass
 
@@ -426,3 +1231,9 @@ class TestableGui(Gui):
     def _show_import_text_from_file_popup(self):
         pass
 
+    def _show_import_directory_popup(self):
+        pass
+
+    def _show_import_corpus_popup(self):
+        pass
+
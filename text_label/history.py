@@ -1,19 +1,140 @@
-import copy
-from typing import List
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional
+
+from text_label.text_info import TextInfo
+
+
+class Operation:
+    def apply(self, project):
+        raise NotImplementedError
+
+    def revert(self, project):
+        raise NotImplementedError
+
+
+@dataclass
+class AddCategory(Operation):
+    category_id: int
+    category: str
+
+    def apply(self, project):
+        project._put_category(self.category_id, self.category)
+
+    def revert(self, project):
+        project._pop_category(self.category_id)
+
+
+@dataclass
+class RemoveCategory(Operation):
+    category_id: int
+    category: str
+    text_ids: List[int]
+
+    def apply(self, project):
+        project._set_texts_category(self.text_ids, [None] * len(self.text_ids))
+        project._pop_category(self.category_id)
+
+    def revert(self, project):
+        project._put_category(self.category_id, self.category)
+        project._set_texts_category(self.text_ids, [self.category_id] * len(self.text_ids))
+
+
+@dataclass
+class AddText(Operation):
+    text_id: int
+    text_info: TextInfo
+
+    def apply(self, project):
+        project._insert_text(self.text_id, self.text_info)
+
+    def revert(self, project):
+        project._pop_text(self.text_id)
+
+
+@dataclass
+class RemoveText(Operation):
+    text_id: int
+    text_info: TextInfo
+
+    def apply(self, project):
+        project._pop_text(self.text_id)
+
+    def revert(self, project):
+        project._insert_text(self.text_id, self.text_info)
+
+
+@dataclass
+class MarkText(Operation):
+    text_id: int
+    prev_category_id: Optional[int]
+    category_id: Optional[int]
+
+    def apply(self, project):
+        project._set_text_category(self.text_id, self.category_id)
+
+    def revert(self, project):
+        project._set_text_category(self.text_id, self.prev_category_id)
+
+
+@dataclass
+class MarkTexts(Operation):
+    text_ids: List[int]
+    prev_category_ids: List[Optional[int]]
+    category_id: Optional[int]
+
+    def apply(self, project):
+        project._set_texts_category(self.text_ids, [self.category_id] * len(self.text_ids))
+
+    def revert(self, project):
+        project._set_texts_category(self.text_ids, self.prev_category_ids)
+
+
+@dataclass
+class Batch(Operation):
+    operations: List[Operation]
+
+    def apply(self, project):
+        for operation in self.operations:
+            operation.apply(project)
+
+    def revert(self, project):
+        for operation in reversed(self.operations):
+            operation.revert(project)
 
 
 class History:
-    def __init__(self, initial_state):
-        self.states: List = [initial_state]
+    DEFAULT_MAX_DEPTH = 1000
+
+    def __init__(self, max_depth: Optional[int] = DEFAULT_MAX_DEPTH):
+        self.max_depth = max_depth
+        self.undo_operations: Deque[Operation] = deque(maxlen=max_depth)
+        self.redo_operations: List[Operation] = []
+
+    def add_operation(self, operation: Operation):
+        self.undo_operations.append(operation)
+        self.redo_operations.clear()
+
+    def rollback_operation(self) -> Optional[Operation]:
+        if len(self.undo_operations) > 0:
+            operation = self.undo_operations.pop()
+            self.redo_operations.append(operation)
+            return operation
+        return None
+
+    def redo_operation(self) -> Optional[Operation]:
+        if len(self.redo_operations) > 0:
+            operation = self.redo_operations.pop()
+            self.undo_operations.append(operation)
+            return operation
+        return None
 
-    def add_state(self, new_state):
-        self.states.append(copy.deepcopy(new_state))
+    def can_undo(self) -> bool:
+        return len(self.undo_operations) > 0
 
-    def rollback_state(self):
-        if len(self.states) > 1:
-            return self.states.pop()
-        else:
-            return copy.deepcopy(self.states[0])
+    def can_redo(self) -> bool:
+        return len(self.redo_operations) > 0
 
-    def get_current_state(self):
-        return copy.deepcopy(self.states[-1])
\ No newline at end of file
+    def clear(self):
+        self.undo_operations.clear()
+        self.redo_operations.clear()
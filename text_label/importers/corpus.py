@@ -0,0 +1,127 @@
+import csv
+import hashlib
+import json
+import pathlib
+from typing import Iterable, Iterator, Optional, Set, Tuple, Union
+
+from text_label.importers.importer import Importer, ImportBatch
+
+
+# (text, category, error)
+Row = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+class CorpusImporter(Importer):
+    NAME = 'corpus'
+    BATCH_SIZE = 10_000
+    TEXT_FIELD = 'text'
+    CATEGORY_FIELD = 'label'
+    FORMATS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv', '.tsv': 'tsv'}
+    # по умолчанию csv не читает поля длиннее 128K символов, а документы в корпусе бывают и больше
+    CSV_FIELD_SIZE_LIMIT = 2 ** 31 - 1
+
+    def __init__(self, text_field: str = TEXT_FIELD, category_field: Optional[str] = CATEGORY_FIELD,
+                 batch_size: int = BATCH_SIZE, known_hashes: Optional[Set[bytes]] = None):
+        super().__init__()
+        self.text_field = text_field
+        self.category_field = category_field
+        self.batch_size = batch_size
+        # храним только 16-байтовые хеши, а не сами тексты, чтобы память не росла вместе с корпусом
+        self.seen_hashes: Set[bytes] = set(known_hashes) if known_hashes else set()
+
+    @staticmethod
+    def hash_text(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    @classmethod
+    def hash_texts(cls, texts: Iterable[str]) -> Set[bytes]:
+        return {cls.hash_text(text) for text in texts}
+
+    @classmethod
+    def get_format(cls, path_to_file: Union[str, pathlib.Path]) -> str:
+        suffix = pathlib.Path(path_to_file).suffix.lower()
+        if suffix not in cls.FORMATS:
+            raise ValueError(f'Unsupported corpus file: {path_to_file}, expected one of {tuple(cls.FORMATS)}')
+        return cls.FORMATS[suffix]
+
+    @staticmethod
+    def _make_category(value) -> Optional[str]:
+        if value is None or value == '':
+            return None
+        return str(value)
+
+    def iter_jsonl_rows(self, lines: Iterable[bytes]) -> Iterator[Row]:
+        # json.loads на каждой строке заново определяет кодировку и создаёт декодер
+        decode = json.JSONDecoder().decode
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = decode(line.decode('utf-8'))
+            except ValueError as e:
+                yield None, None, f'line {line_no}: {e}'
+                continue
+
+            if isinstance(row, str):
+                yield row, None, None
+            elif isinstance(row, dict) and isinstance(row.get(self.text_field), str):
+                category = row.get(self.category_field) if self.category_field else None
+                yield row[self.text_field], self._make_category(category), None
+            else:
+                yield None, None, f'line {line_no}: no "{self.text_field}" field'
+
+    def iter_csv_rows(self, lines: Iterable[bytes], delimiter: str = ',') -> Iterator[Row]:
+        if csv.field_size_limit() < self.CSV_FIELD_SIZE_LIMIT:
+            csv.field_size_limit(self.CSV_FIELD_SIZE_LIMIT)
+        reader = csv.reader((line.decode('utf-8') for line in lines), delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        if self.text_field not in header:
+            raise ValueError(f'No "{self.text_field}" column in header: {header}')
+        text_column = header.index(self.text_field)
+        category_column = header.index(self.category_field) if self.category_field in header else None
+
+        for row_no, row in enumerate(reader, start=1):
+            if len(row) <= text_column:
+                yield None, None, f'row {row_no}: no "{self.text_field}" column'
+                continue
+            category = row[category_column] if category_column is not None and category_column < len(row) else None
+            yield row[text_column], self._make_category(category), None
+
+    def iter_rows(self, file_handle, corpus_format: str) -> Iterator[Row]:
+        if corpus_format == 'jsonl':
+            return self.iter_jsonl_rows(file_handle)
+        return self.iter_csv_rows(file_handle, delimiter='\t' if corpus_format == 'tsv' else ',')
+
+    def import_batches(self, path_to_file: Union[str, pathlib.Path]) -> Iterator[ImportBatch]:
+        self.cancel_event.clear()
+        path_to_file = pathlib.Path(path_to_file)
+        corpus_format = self.get_format(path_to_file)
+        total = path_to_file.stat().st_size
+
+        # файл читается построчно в бинарном режиме: tell() даёт прогресс в байтах, а в памяти только одна пачка
+        with open(path_to_file, mode='rb') as file_handle:
+            batch = ImportBatch(texts=[], errors=[], done=0, total=total, categories=[])
+            for text, category, error in self.iter_rows(file_handle, corpus_format):
+                if error is not None:
+                    batch.errors.append((str(path_to_file), error))
+                    continue
+
+                text_hash = self.hash_text(text)
+                if text_hash in self.seen_hashes:
+                    batch.duplicates += 1
+                    continue
+                self.seen_hashes.add(text_hash)
+                batch.texts.append(text)
+                batch.categories.append(category)
+
+                if len(batch.texts) >= self.batch_size:
+                    batch.done = file_handle.tell()
+                    yield batch
+                    if self.is_cancelled():
+                        return
+                    batch = ImportBatch(texts=[], errors=[], done=0, total=total, categories=[])
+
+            batch.done = total
+            yield batch
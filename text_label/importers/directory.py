@@ -0,0 +1,51 @@
+import glob
+import os
+import os.path
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple, Union
+
+from text_label.importers.importer import Importer, ImportBatch
+
+
+class DirectoryImporter(Importer):
+    NAME = 'directory'
+    BATCH_SIZE = 500
+    PATTERN = '*.txt'
+
+    def __init__(self, max_workers: int = min(32, (os.cpu_count() or 1) * 4), batch_size: int = BATCH_SIZE):
+        super().__init__()
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+    @classmethod
+    def find_files(cls, path_or_glob: Union[str, pathlib.Path]) -> List[pathlib.Path]:
+        if os.path.isdir(path_or_glob):
+            return sorted(path for path in pathlib.Path(path_or_glob).rglob(cls.PATTERN) if path.is_file())
+        return sorted(pathlib.Path(path) for path in glob.glob(str(path_or_glob), recursive=True) if os.path.isfile(path))
+
+    @staticmethod
+    def read_file(path_to_file: pathlib.Path) -> Tuple[pathlib.Path, Optional[str], Optional[str]]:
+        try:
+            with open(path_to_file, mode='r', encoding='utf-8') as text_handle:
+                return path_to_file, text_handle.read(), None
+        except (OSError, UnicodeDecodeError) as e:
+            return path_to_file, None, str(e)
+
+    def iter_batches(self, paths: List[pathlib.Path]) -> Iterator[ImportBatch]:
+        self.cancel_event.clear()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='directory-import') as executor:
+            for start in range(0, len(paths), self.batch_size):
+                if self.is_cancelled():
+                    break
+                chunk = paths[start:start + self.batch_size]
+                texts, errors = [], []
+                for path_to_file, text, error in executor.map(self.read_file, chunk):
+                    if error is None:
+                        texts.append(text)
+                    else:
+                        errors.append((str(path_to_file), error))
+                yield ImportBatch(texts=texts, errors=errors, done=start + len(chunk), total=len(paths))
+
+    def import_batches(self, path_or_glob: Union[str, pathlib.Path]) -> Iterator[ImportBatch]:
+        return self.iter_batches(self.find_files(path_or_glob))
@@ -0,0 +1,81 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class ImportBatch:
+    texts: List[str]
+    errors: List[Tuple[str, str]]
+    done: int
+    total: int
+    categories: Optional[List[Optional[str]]] = None
+    duplicates: int = 0
+
+
+@dataclass
+class ImportSummary:
+    texts: int = 0
+    duplicates: int = 0
+    near_duplicates: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    seconds: float = 0.0
+    cancelled: bool = False
+    started: float = field(default_factory=time.perf_counter, repr=False, compare=False)
+
+    def finish(self, cancelled: bool = False) -> 'ImportSummary':
+        self.seconds = time.perf_counter() - self.started
+        self.cancelled = cancelled
+        return self
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        status = 'cancelled' if self.cancelled else 'done'
+        result = (f'{status}: {self.texts} texts in {self.seconds:.1f}s '
+                  f'({self.texts_per_second:.0f} texts/s), {self.duplicates} duplicates skipped, '
+                  f'{self.near_duplicates} near duplicates, {len(self.errors)} errors')
+        for source, error in self.errors[:10]:
+            result += f'\n{source}: {error}'
+        return result
+
+
+class Importer:
+    NAME: str = None
+
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.import_thread: threading.Thread = None
+
+    def import_batches(self, source) -> Iterator[ImportBatch]:
+        raise NotImplementedError
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def run_in_background(self, source,
+                          on_batch: Callable[[ImportBatch], None],
+                          on_done: Callable[[ImportSummary], None]) -> threading.Thread:
+        def _import():
+            summary = ImportSummary()
+            try:
+                for batch in self.import_batches(source):
+                    summary.texts += len(batch.texts)
+                    summary.duplicates += batch.duplicates
+                    summary.errors.extend(batch.errors)
+                    on_batch(batch)
+            except Exception as e:
+                summary.errors.append((str(source), str(e)))
+            finally:
+                # statechart ждёт итога в importing, поэтому он отправляется при любой ошибке
+                on_done(summary.finish(cancelled=self.is_cancelled()))
+
+        self.import_thread = threading.Thread(target=_import, name=f'import-{self.NAME}', daemon=True)
+        self.import_thread.start()
+        return self.import_thread
@@ -0,0 +1,49 @@
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LruCache:
+    # вытесняет давно использованное, когда сумма размеров превышает бюджет в байтах;
+    # блокировок нет, их берёт владелец кеша
+    def __init__(self, budget_bytes: int, get_size: Callable[[Any], int] = sys.getsizeof):
+        self.budget_bytes = budget_bytes
+        self.get_size = get_size
+        # ключ -> (значение, байты), порядок - от давно использованных к недавним
+        self.entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        # значение больше всего бюджета не кешируется
+        size = self.get_size(value)
+        if size > self.budget_bytes:
+            return
+        old_entry = self.entries.pop(key, None)
+        if old_entry is not None:
+            self.size_bytes -= old_entry[1]
+        self.entries[key] = (value, size)
+        self.size_bytes += size
+        while self.size_bytes > self.budget_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+
+    def clear(self):
+        self.entries.clear()
+        self.size_bytes = 0
+
+    def get_stats(self) -> dict[str, int]:
+        return {'entries': len(self.entries), 'bytes': self.size_bytes, 'hits': self.hits, 'misses': self.misses}
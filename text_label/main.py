@@ -1,18 +1,36 @@
+import os
+
 from text_label.bus import Bus
-from text_label.statechart import Statechart
-from text_label.gui import Gui
-from text_label.exporters.text_directory import TextDirectoryExporter
 
 
 def run():
+    # tkinter и miros грузятся только при запуске GUI, экспортёры - при выборе в меню
+    from text_label.statechart import Statechart
+    from text_label.gui import Gui
+    from text_label.metrics import Metrics
+    from text_label.blob_project import BlobProject
+
     bus = Bus()
+    metrics = Metrics()
+    bus.register('metrics', metrics)
+    # TEXT_LABEL_TEXT_CACHE_MB - сколько памяти отдать под прочитанные тела текстов в .blob.tl проектах
+    if text_cache_mb := os.environ.get('TEXT_LABEL_TEXT_CACHE_MB'):
+        BlobProject.TEXT_CACHE_BYTES = int(float(text_cache_mb) * 1024 * 1024)
+
     statechart = Statechart(name='statechart', bus=bus)
     gui = Gui(bus=bus)
-    td_export = TextDirectoryExporter(bus=bus)
+
+    # TEXT_LABEL_METRICS=1 включает метрики с самого старта, TEXT_LABEL_METRICS=path.json ещё и сохраняет их при выходе
+    metrics_env = os.environ.get('TEXT_LABEL_METRICS', '')
+    if metrics_env:
+        metrics.enable(bus)
 
     statechart.run()
     gui.run()
 
+    if metrics_env.endswith('.json'):
+        metrics.dump(metrics_env, bus)
+
 
 if __name__ == '__main__':
     run()
@@ -0,0 +1,184 @@
+import bisect
+import functools
+import json
+import pathlib
+import threading
+import time
+from typing import Any, Callable, Optional, Union
+
+from text_label.atomic_file import open_atomic
+
+
+class Histogram:
+    # миллисекунды для времён, штуки для глубины очереди
+    TIME_BOUNDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+    COUNT_BOUNDS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+    def __init__(self, bounds: tuple = TIME_BOUNDS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        # верхняя граница корзины, в которую попал квантиль; для последней корзины - максимум
+        rank = q * self.count
+        seen = 0
+        for idx, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket > 0:
+                return min(self.bounds[idx], self.max) if idx < len(self.bounds) else self.max
+        return 0.0
+
+    def to_dict(self) -> dict:
+        return {'count': self.count,
+                'sum': round(self.total, 3),
+                'mean': round(self.total / self.count, 3) if self.count > 0 else 0.0,
+                'p50': self.quantile(0.5),
+                'p95': self.quantile(0.95),
+                'max': round(self.max, 3),
+                'buckets': {f'<={bound}': bucket for bound, bucket in zip(self.bounds, self.buckets) if bucket > 0}
+                           | ({'>': self.buckets[-1]} if self.buckets[-1] > 0 else {})}
+
+
+class Metrics:
+    PROJECT_METHODS = ('add_category', 'remove_category', 'add_text', 'add_texts', 'remove_text', 'mark_text', 'mark_texts',
+                       'undo', 'redo', 'save_project', 'autosave', 'get_texts', 'get_name', 'search_texts')
+    GUI_METHODS = ('_render_texts', '_render_categories', '_render_inserted_text', '_render_removed_text', '_render_updated_text',
+                   '_select_text', '_refresh_texts_filter')
+
+    def __init__(self):
+        # выключенные метрики ничего не стоят: замеры ставятся обёртками поверх методов экземпляров только при включении
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+        # (объект, атрибут, был ли атрибут в самом экземпляре, прежнее значение)
+        self.patches: list[tuple[Any, str, bool, Any]] = []
+        self.project_patches: list[tuple[Any, str, bool, Any]] = []
+
+    def increment(self, name: str, value: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, bounds: tuple = Histogram.TIME_BOUNDS):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(bounds)
+            histogram.observe(value)
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def _patch(self, patches: list, obj: Any, name: str, make_wrapper: Callable[[Callable], Callable]):
+        own = name in vars(obj)
+        original = getattr(obj, name)
+        patches.append((obj, name, own, vars(obj)[name] if own else None))
+        setattr(obj, name, make_wrapper(original))
+
+    @staticmethod
+    def _unpatch(patches: list):
+        while patches:
+            obj, name, own, value = patches.pop()
+            if own:
+                setattr(obj, name, value)
+            else:
+                delattr(obj, name)
+
+    def _make_timer(self, metric_name: str) -> Callable[[Callable], Callable]:
+        def make_wrapper(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(metric_name, (time.perf_counter() - started) * 1000)
+            return timed
+        return make_wrapper
+
+    def time_method(self, obj: Any, name: str, metric_name: str, patches: Optional[list] = None):
+        self._patch(self.patches if patches is None else patches, obj, name, self._make_timer(metric_name))
+
+    def instrument_statechart(self, statechart):
+        for name in dir(type(statechart)):
+            if name.startswith('on_'):
+                self.time_method(statechart, name, f'statechart.{name}.ms')
+
+        def make_post_fifo(post_fifo: Callable) -> Callable:
+            @functools.wraps(post_fifo)
+            def counted_post_fifo(e, *args, **kwargs):
+                # периодические события miros сам перепосылает через post_fifo без period
+                if len(args) == 0 and kwargs.get('period') is None:
+                    e.posted_at = time.perf_counter()
+                    self.increment(f'statechart.events.{e.signal_name}')
+                    self.observe('statechart.queue_depth', len(statechart.queue), bounds=Histogram.COUNT_BOUNDS)
+                return post_fifo(e, *args, **kwargs)
+            return counted_post_fifo
+
+        def make_dispatch(dispatch: Callable) -> Callable:
+            @functools.wraps(dispatch)
+            def timed_dispatch(e):
+                posted_at = getattr(e, 'posted_at', None)
+                if posted_at is not None:
+                    self.observe('statechart.dwell.ms', (time.perf_counter() - posted_at) * 1000)
+                return dispatch(e)
+            return timed_dispatch
+
+        self._patch(self.patches, statechart, 'post_fifo', make_post_fifo)
+        self._patch(self.patches, statechart, 'dispatch', make_dispatch)
+
+    def instrument_project(self, project):
+        # проект заменяется при открытии и создании, замеры переезжают на новый
+        self._unpatch(self.project_patches)
+        if project is None:
+            return
+        for name in self.PROJECT_METHODS:
+            if hasattr(project, name):
+                self.time_method(project, name, f'project.{name}.ms', patches=self.project_patches)
+
+    def instrument_gui(self, gui):
+        for name in self.GUI_METHODS:
+            self.time_method(gui, name, f'gui.{name}.ms')
+        # полная перерисовка вызывается через очередь, которая держит ссылку на исходный метод
+        self._patch(self.patches, gui.updates, 'refresh_texts', lambda _: gui._render_texts)
+        self.time_method(gui.updates, 'run', 'gui.repaint.ms')
+
+    def enable(self, bus):
+        if self.enabled:
+            return
+        self.enabled = True
+        if bus.statechart is not None:
+            self.instrument_statechart(bus.statechart)
+            self.instrument_project(bus.statechart.project)
+        if bus.gui is not None and hasattr(bus.gui, 'updates'):
+            self.instrument_gui(bus.gui)
+
+    def disable(self):
+        self.enabled = False
+        self._unpatch(self.project_patches)
+        self._unpatch(self.patches)
+
+    def snapshot(self, bus=None) -> dict:
+        with self.lock:
+            result = {'enabled': self.enabled,
+                      'counters': dict(sorted(self.counters.items())),
+                      'histograms': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())}}
+        if bus is not None and bus.gui is not None and hasattr(bus.gui, 'updates'):
+            result['gui_updates'] = bus.gui.updates.get_latency_stats()
+        return result
+
+    def dump(self, path_to_file: Union[str, pathlib.Path], bus=None):
+        with open_atomic(path_to_file) as dump_handle:
+            json.dump(self.snapshot(bus), dump_handle, indent=2)
@@ -1,18 +1,41 @@
-import copy
-import hashlib
 import json
 import pathlib
-from typing import Optional, Union, Tuple
+from typing import Callable, Iterable, Iterator, Optional, Union
 
+from text_label.category_index import CategoryIndex
+from text_label.project_digest import ProjectDigest
+from text_label.duplicate_index import DuplicateIndex
+from text_label.search_index import SearchIndex
 from text_label.text_info import TextInfo
-from text_label.history import History
+from text_label.history import History, Operation, AddCategory, RemoveCategory, AddText, RemoveText, MarkText, MarkTexts, Batch
+from text_label.project_log import ProjectLog
+from text_label.project_journal import ProjectJournal
+from text_label.atomic_file import open_atomic
 
 
 class Project:
-    def __init__(self, categories: Optional[dict[int, str]] = None, data: Optional[list] = ()):
+    # во сколько раз лог может быть длиннее самого проекта, прежде чем его перепишем целиком
+    LOG_COMPACTION_RATIO = 2
+    LOG_COMPACTION_MIN_RECORDS = 1000
+
+    def __init__(self, categories: Optional[dict[int, str]] = None, data: Optional[list] = (),
+                 history_depth: Optional[int] = History.DEFAULT_MAX_DEPTH):
         self.categories: dict[int, str] = self._make_categories_from_raw(categories if categories else {})
         self.data: list[TextInfo] = self._make_data_from_raw(data)
-        self.history = History(self._get_snapshot())
+        self.category_index = CategoryIndex(self.data)
+        # дайджест считается одним проходом при первом get_name, дальше поддерживается примитивами
+        self.digest: Optional[ProjectDigest] = None
+        # как и дайджест, строится при первом обращении и дальше поддерживается примитивами
+        self.duplicate_index: Optional[DuplicateIndex] = None
+        self.search_index: Optional[SearchIndex] = None
+        self.history = History(max_depth=history_depth)
+
+        self.path_to_project: Optional[pathlib.Path] = None
+        self.unsaved_changes: list[dict] = []
+        self.recording_changes: bool = True
+        self.log_size: int = 0
+        # журнал повторяет unsaved_changes на диске и включается только в GUI
+        self.journal: Optional[ProjectJournal] = None
 
     @staticmethod
     def _make_categories_from_raw(categories: dict[Union[str, int]]) -> dict[int, str]:
@@ -23,55 +46,343 @@ class Project:
         return [TextInfo(text=text_info[0], category_id=text_info[1]) if len(text_info) == 2 else TextInfo(text=text_info[0])
                 for text_info in list(data)]
 
-    def _get_snapshot(self) -> Tuple:
-        return copy.deepcopy((self.categories, self.data))
-
     @staticmethod
     def load_project_from_path(path_to_project: pathlib.Path):
-        with open(path_to_project, mode='r', encoding='utf-8') as project_handle:
-            raw = json.loads(project_handle.read())
-            return Project(categories=raw['categories'], data=raw['data'])
+        from text_label.sqlite_project import SqliteProject
+        from text_label.blob_project import BlobProject
+        if SqliteProject.is_database_file(path_to_project):
+            # журнал остаётся, если проект сохранили в базу и правили дальше, не переоткрыв: записи переносятся в базу.
+            # читаем его до подключения, подключение меняет файл базы и журнал перестал бы к нему подходить
+            records = ProjectJournal.read_records(path_to_project)
+            project = SqliteProject(path_to_project)
+            for record in records or ():
+                project._apply_record(record)
+            project.autosave()
+            ProjectJournal.remove(path_to_project)
+            return project
+
+        if BlobProject.is_blob_file(path_to_project):
+            project = BlobProject(path_to_project)
+        else:
+            with open(path_to_project, mode='r', encoding='utf-8') as project_handle:
+                if ProjectLog.read_header(project_handle) is not None:
+                    project = Project()
+                    project.recording_changes = False
+                    for record in ProjectLog.read_records(project_handle):
+                        project._apply_record(record)
+                        project.log_size += 1
+                    project.recording_changes = True
+                else:
+                    project_handle.seek(0)
+                    raw = json.load(project_handle)
+                    project = Project(categories=raw['categories'], data=raw['data'])
+
+        project.path_to_project = pathlib.Path(path_to_project)
+        project._replay_journal()
+        return project
 
     def save_project(self, path_to_project: pathlib.Path):
-        with open(path_to_project, mode='w', encoding='utf-8') as project_handle:
-            raw = {"version": 0, "categories": self.categories, "data": [[text_info.text, text_info.category_id] for text_info in self.data]}
-            project_handle.write(json.dumps(raw))
-        self.history = History(self._get_snapshot())
+        self._write_project(path_to_project)
+        self.history.clear()
+
+    def _write_project(self, path_to_project: pathlib.Path):
+        from text_label.sqlite_project import SqliteProject
+        from text_label.blob_project import BlobProject
+        path_to_project = pathlib.Path(path_to_project)
+        if ProjectLog.is_log_path(path_to_project):
+            self._save_project_log(path_to_project)
+        elif SqliteProject.is_database_path(path_to_project):
+            SqliteProject.write_database(path_to_project, self.categories, self.data)
+        elif BlobProject.is_blob_path(path_to_project):
+            BlobProject.write_blob(path_to_project, self.categories, self.data)
+        else:
+            with open_atomic(path_to_project) as project_handle:
+                raw = {"version": 0, "categories": self.categories, "data": [[text_info.text, text_info.category_id] for text_info in self.data]}
+                json.dump(raw, project_handle)
+        self._reset_journal(path_to_project)
+        self.path_to_project = path_to_project
+        self.unsaved_changes = []
+
+    def _get_max_log_size(self) -> int:
+        return self.LOG_COMPACTION_RATIO * (len(self.categories) + len(self.data)) + self.LOG_COMPACTION_MIN_RECORDS
+
+    def _save_project_log(self, path_to_project: pathlib.Path):
+        if (path_to_project == self.path_to_project and ProjectLog.is_complete(path_to_project)
+                and self.log_size + len(self.unsaved_changes) <= self._get_max_log_size()):
+            self.log_size += ProjectLog.append(path_to_project, self.unsaved_changes)
+        else:
+            self.log_size = ProjectLog.write(path_to_project, ProjectLog.make_snapshot_records(self.categories, self.data))
+
+    def _apply_record(self, record: dict):
+        op = record['op']
+        if op == 'add_category':
+            self._put_category(int(record['category_id']), str(record['category']))
+        elif op == 'remove_category':
+            self._pop_category(int(record['category_id']))
+        elif op == 'insert_text':
+            self._insert_text(int(record['text_id']), TextInfo(text=record['text'], category_id=record['category_id']))
+        elif op == 'remove_text':
+            self._pop_text(int(record['text_id']))
+        elif op == 'mark_text':
+            self._set_text_category(int(record['text_id']), record['category_id'])
+        else:
+            raise ValueError(f'Unknown project log record: {op}')
+
+    def _replay_journal(self):
+        records = ProjectJournal.read_records(self.path_to_project)
+        if not records:
+            return
+        recording_changes, self.recording_changes = self.recording_changes, False
+        for record in records:
+            self._apply_record(record)
+        self.recording_changes = recording_changes
+        # изменения, не попавшие в файл проекта до падения, остаются несохранёнными и попадут в новый журнал
+        self.unsaved_changes = list(records)
+
+    def _reset_journal(self, path_to_project: pathlib.Path):
+        if self.journal is None:
+            ProjectJournal.remove(path_to_project)
+            return
+        self.journal.close()
+        if self.path_to_project is not None and self.path_to_project != path_to_project:
+            ProjectJournal.remove(self.path_to_project)
+        self.journal = ProjectJournal.create(path_to_project)
+
+    def enable_journal(self):
+        if self.journal is None and self.path_to_project is not None:
+            self.journal = ProjectJournal.create(self.path_to_project, self.unsaved_changes)
+
+    def autosave(self) -> bool:
+        # сам файл проекта переписывается, только когда журнал вырос сравнимо с проектом
+        if self.journal is None:
+            return False
+        if self.journal.records > self._get_max_log_size():
+            # история отмены при этом сохраняется, в отличие от явного сохранения
+            self._write_project(self.path_to_project)
+            return True
+        self.journal.flush(sync=True)
+        return False
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def _do(self, operation: Operation):
+        operation.apply(self)
+        self.history.add_operation(operation)
+        self._flush_journal()
+
+    def _record_change(self, make_record: Callable[..., dict], *args):
+        # записи нужны только журналу и дописыванию в лог при сохранении; иначе файл всё равно переписывается целиком
+        if self.recording_changes and (self.journal is not None
+                                       or (self.path_to_project is not None and ProjectLog.is_log_path(self.path_to_project))):
+            record = make_record(*args)
+            self.unsaved_changes.append(record)
+            if self.journal is not None:
+                self.journal.write(record)
+
+    def _flush_journal(self):
+        if self.journal is not None:
+            self.journal.flush()
+
+    def _index_text(self, text_id: int, text_info: TextInfo):
+        if self.digest is not None:
+            self.digest.add_text(text_info)
+        # индекс дубликатов может быть достроен не до конца: тексты за его концом проиндексируются позже
+        if self.duplicate_index is not None and text_id <= len(self.duplicate_index):
+            self.duplicate_index.insert(text_id, text_info.text)
+        if self.search_index is not None:
+            self.search_index.insert(text_id, text_info.text)
+
+    def _unindex_text(self, text_id: int, text_info: TextInfo):
+        if self.digest is not None:
+            self.digest.remove_text(text_info)
+        if self.duplicate_index is not None and text_id < len(self.duplicate_index):
+            self.duplicate_index.remove(text_id, text_info.text)
+        if self.search_index is not None:
+            self.search_index.remove(text_id, text_info.text)
+
+    def _put_category(self, category_id: int, category: str):
+        self.categories[category_id] = category
+        if self.digest is not None:
+            self.digest.add_category(category_id, category)
+        if len(self.categories) > 1 and category_id < max(self.categories.keys()):
+            self.categories = dict(sorted(self.categories.items()))
+        self._record_change(ProjectLog.make_add_category_record, category_id, category)
+
+    def _pop_category(self, category_id: int) -> str:
+        category = self.categories.pop(category_id)
+        if self.digest is not None:
+            self.digest.remove_category(category_id, category)
+        self._record_change(ProjectLog.make_remove_category_record, category_id)
+        return category
+
+    def _insert_text(self, text_id: int, text_info: TextInfo):
+        if text_id < len(self.data):
+            self.category_index.shift(text_id, 1)
+        self.data.insert(text_id, text_info)
+        self.category_index.add(text_id, text_info.category_id)
+        self._index_text(text_id, text_info)
+        self._record_change(ProjectLog.make_insert_text_record, text_id, text_info)
+
+    def _pop_text(self, text_id: int) -> TextInfo:
+        text_info = self.data.pop(text_id)
+        self.category_index.discard(text_id, text_info.category_id)
+        self.category_index.shift(text_id, -1)
+        self._unindex_text(text_id, text_info)
+        self._record_change(ProjectLog.make_remove_text_record, text_id)
+        return text_info
+
+    def _set_text_category(self, text_id: int, category_id: Optional[int]):
+        text_info = self.data[text_id]
+        self.category_index.discard(text_id, text_info.category_id)
+        if self.digest is not None:
+            self.digest.remove_text(text_info)
+        text_info.category_id = category_id
+        if self.digest is not None:
+            self.digest.add_text(text_info)
+        self.category_index.add(text_id, category_id)
+        self._record_change(ProjectLog.make_mark_text_record, text_id, category_id)
+
+    def _set_texts_category(self, text_ids: list[int], category_ids: list[Optional[int]]):
+        moves = []
+        for text_id, category_id in zip(text_ids, category_ids):
+            text_info = self.data[text_id]
+            moves.append((text_id, text_info.category_id, category_id))
+            if self.digest is not None:
+                self.digest.remove_text(text_info)
+            text_info.category_id = category_id
+            if self.digest is not None:
+                self.digest.add_text(text_info)
+            self._record_change(ProjectLog.make_mark_text_record, text_id, category_id)
+        self.category_index.move_many(moves)
 
     def add_category(self, category: str):
         if category not in self.categories.values():
-            next_id = list(self.categories.keys())[-1]+1 if len(self.categories) > 0 else 0
-            self.categories[next_id] = category
-            self.history.add_state(self._get_snapshot())
+            next_id = max(self.categories.keys()) + 1 if len(self.categories) > 0 else 0
+            self._do(AddCategory(category_id=next_id, category=category))
 
     def remove_category(self, category_id: int):
-        self.categories.pop(category_id)
-        for text_id, text_info in enumerate(self.data):
-            if text_info.category_id == category_id:
-                self.data[text_id].category_id = None
-                self.history.add_state(self._get_snapshot())
+        text_ids = self.get_text_ids_of_category(category_id)
+        self._do(RemoveCategory(category_id=category_id, category=self.categories[category_id], text_ids=text_ids))
+
+    def add_text(self, text: str) -> int:
+        text_id = len(self.data)
+        self._do(AddText(text_id=text_id, text_info=TextInfo(text=text)))
+        return text_id
 
-    def add_text(self, text: str):
-        self.data.append(TextInfo(text=text))
-        self.history.add_state(self._get_snapshot())
+    def add_texts(self, texts: list[str], categories: Optional[list[Optional[str]]] = None) -> range:
+        first_text_id = len(self.data)
+        if len(texts) > 0:
+            operations: list[Operation] = []
+            category_ids = [None] * len(texts)
+            if categories is not None:
+                # незнакомые категории создаются в той же пачке, чтобы откатывались вместе с текстами
+                category_ids_by_name = {category: category_id for category_id, category in self.categories.items()}
+                next_id = max(self.categories.keys()) + 1 if len(self.categories) > 0 else 0
+                for idx, category in enumerate(categories):
+                    if category is None:
+                        continue
+                    if category not in category_ids_by_name:
+                        category_ids_by_name[category] = next_id
+                        operations.append(AddCategory(category_id=next_id, category=category))
+                        next_id += 1
+                    category_ids[idx] = category_ids_by_name[category]
+            operations.extend(AddText(text_id=first_text_id + idx, text_info=TextInfo(text=text, category_id=category_id))
+                              for idx, (text, category_id) in enumerate(zip(texts, category_ids)))
+            self._do(Batch(operations))
+        return range(first_text_id, first_text_id + len(texts))
 
     def remove_text(self, text_id: int):
-        self.data.pop(text_id)
-        self.history.add_state(self._get_snapshot())
+        self._do(RemoveText(text_id=text_id, text_info=self.data[text_id]))
 
     def mark_text(self, text_id: int, category_id: int):
-        self.data[text_id].category_id = category_id
-        self.history.add_state(self._get_snapshot())
+        self._do(MarkText(text_id=text_id, prev_category_id=self.data[text_id].category_id, category_id=category_id))
+
+    def mark_texts(self, text_ids: Iterable[int], category_id: Optional[int]) -> list[int]:
+        # одна запись в истории на все тексты, уже размеченные этой категорией пропускаются
+        prev_category_ids = {text_id: self.data[text_id].category_id for text_id in text_ids}
+        text_ids = sorted(text_id for text_id, prev_category_id in prev_category_ids.items() if prev_category_id != category_id)
+        if len(text_ids) > 0:
+            self._do(MarkTexts(text_ids=text_ids, prev_category_ids=[prev_category_ids[text_id] for text_id in text_ids], category_id=category_id))
+        return text_ids
 
     def get_texts(self, category_id: Optional[int] = None) -> list[TextInfo]:
         data = self.data
         if category_id is not None:
-            data = [text for text in data if text.category_id == category_id]
+            data = [data[text_id] for text_id in self.category_index.text_ids.get(category_id, [])]
         return data
 
-    def undo(self):
-        self.history.rollback_state()
-        self.categories, self.data = self.history.get_current_state()
+    def iter_texts(self, category_id: Optional[int] = None) -> Iterator[TextInfo]:
+        # те же тексты, что get_texts, для одного прохода по многим текстам (экспорт); BlobProject читает их мимо кеша
+        return iter(self.get_texts(category_id))
+
+    def iter_texts_at(self, text_ids: Iterable[int]) -> Iterator[TextInfo]:
+        return (self.data[text_id] for text_id in text_ids)
+
+    def get_text_ids_of_category(self, category_id: Optional[int]) -> list[int]:
+        return self.category_index.get_text_ids(category_id)
+
+    def count_texts_of_category(self, category_id: Optional[int]) -> int:
+        return self.category_index.count(category_id)
+
+    def undo(self) -> Optional[Operation]:
+        operation = self.history.rollback_operation()
+        if operation is not None:
+            operation.revert(self)
+            self._flush_journal()
+        return operation
+
+    def redo(self) -> Optional[Operation]:
+        operation = self.history.redo_operation()
+        if operation is not None:
+            operation.apply(self)
+            self._flush_journal()
+        return operation
+
+    def build_duplicate_index(self, max_texts: int) -> bool:
+        # достраивает индекс дубликатов не больше чем на max_texts текстов, True - индекс готов
+        if self.duplicate_index is None:
+            self.duplicate_index = DuplicateIndex()
+        start = len(self.duplicate_index)
+        stop = min(len(self.data), start + max_texts)
+        self.duplicate_index.extend(text_info.text for text_info in self.iter_texts_at(range(start, stop)))
+        return stop == len(self.data)
+
+    def get_duplicate_index(self, near_duplicates: bool = False) -> DuplicateIndex:
+        if self.duplicate_index is None or (near_duplicates and not self.duplicate_index.near_duplicates):
+            self.duplicate_index = DuplicateIndex((text_info.text for text_info in self.data), near_duplicates=near_duplicates)
+        else:
+            self.build_duplicate_index(len(self.data))
+        return self.duplicate_index
+
+    def get_search_index(self) -> SearchIndex:
+        if self.search_index is None:
+            self.search_index = SearchIndex(text_info.text for text_info in self.data)
+        return self.search_index
+
+    def search_texts(self, query: str, category_id: Optional[int] = None, only_unlabelled: bool = False,
+                     limit: Optional[int] = None) -> list[int]:
+        text_ids = None
+        if category_id is not None or only_unlabelled:
+            text_ids = self.get_text_ids_of_category(category_id)
+        return self.get_search_index().search(query, text_ids, get_text=lambda text_id: self.data[text_id].text, limit=limit)
+
+    def find_text_ids(self, text: str) -> list[int]:
+        # кандидаты с тем же хешем из индекса дубликатов, сам текст сравниваем только у них
+        return [text_id for text_id in self.get_duplicate_index().find_text_ids(text) if self.data[text_id].text == text]
+
+    def make_snapshot(self) -> 'Project':
+        # копия для экспорта в фоновом потоке, пока statechart продолжает править проект:
+        # свои пары (текст, категория) и позиции категорий, сами строки текстов общие
+        snapshot = Project(categories=self.categories, history_depth=0)
+        snapshot.data = [TextInfo(text=text_info.text, category_id=text_info.category_id) for text_info in self.data]
+        snapshot.category_index = self.category_index.copy()
+        return snapshot
 
-    def get_name(self):
-        return str(hashlib.md5(str(self.history).encode('utf-8')).hexdigest())
+    def get_name(self) -> str:
+        # только из потока, который меняет проект (statechart или CLI): дайджест строится проходом по текстам
+        if self.digest is None:
+            self.digest = ProjectDigest(self.categories, self.data)
+        return self.digest.hexdigest()
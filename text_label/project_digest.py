@@ -0,0 +1,39 @@
+import hashlib
+from typing import Iterable, Optional
+
+from text_label.text_info import TextInfo
+
+
+class ProjectDigest:
+    # сумма хешей по модулю 2^128: порядок элементов не важен, а любое изменение пересчитывается за O(1)
+    MODULUS = 2 ** 128
+
+    def __init__(self, categories: Optional[dict[int, str]] = None, data: Iterable[TextInfo] = ()):
+        self.value = 0
+        for category_id, category in (categories or {}).items():
+            self.add_category(category_id, category)
+        for text_info in data:
+            self.add_text(text_info)
+
+    @staticmethod
+    def _hash(kind: bytes, key: Optional[int], value: str) -> int:
+        digest = hashlib.blake2b(kind, digest_size=16)
+        digest.update(str(key).encode('utf-8'))
+        digest.update(b'\x00')
+        digest.update(value.encode('utf-8'))
+        return int.from_bytes(digest.digest(), 'big')
+
+    def add_category(self, category_id: int, category: str):
+        self.value = (self.value + self._hash(b'c', category_id, category)) % self.MODULUS
+
+    def remove_category(self, category_id: int, category: str):
+        self.value = (self.value - self._hash(b'c', category_id, category)) % self.MODULUS
+
+    def add_text(self, text_info: TextInfo):
+        self.value = (self.value + self._hash(b't', text_info.category_id, text_info.text)) % self.MODULUS
+
+    def remove_text(self, text_info: TextInfo):
+        self.value = (self.value - self._hash(b't', text_info.category_id, text_info.text)) % self.MODULUS
+
+    def hexdigest(self) -> str:
+        return f'{self.value:032x}'
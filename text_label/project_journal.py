@@ -0,0 +1,92 @@
+import json
+import os
+import pathlib
+import time
+from typing import Iterable, Optional, TextIO
+
+from text_label.atomic_file import open_atomic
+
+
+class ProjectJournal:
+    VERSION = 1
+    SUFFIX = '.journal'
+    # fsync не чаще раза в секунду: после падения процесса записи всё равно у ОС,
+    # при отключении питания теряется не больше секунды работы
+    SYNC_INTERVAL = 1.0
+
+    def __init__(self, path_to_journal: pathlib.Path, handle: TextIO, records: int):
+        self.path_to_journal = path_to_journal
+        self.handle = handle
+        self.records = records
+        self.synced_at = time.monotonic()
+
+    @classmethod
+    def get_path(cls, path_to_project: pathlib.Path) -> pathlib.Path:
+        path_to_project = pathlib.Path(path_to_project)
+        return path_to_project.with_name(path_to_project.name + cls.SUFFIX)
+
+    @staticmethod
+    def make_base(path_to_project: pathlib.Path) -> list[int]:
+        # журнал относится к конкретной версии файла проекта: атомарная замена меняет inode,
+        # дописывание в лог - размер, так что после сохранения старый журнал не применится
+        stat = os.stat(path_to_project)
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    @classmethod
+    def read_records(cls, path_to_project: pathlib.Path) -> Optional[list[dict]]:
+        try:
+            with open(cls.get_path(path_to_project), mode='r', encoding='utf-8') as handle:
+                lines = handle.readlines()
+        except FileNotFoundError:
+            return None
+
+        try:
+            header = json.loads(lines[0]) if len(lines) > 0 else None
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(header, dict) or header.get('version') != cls.VERSION or header.get('base') != cls.make_base(path_to_project):
+            return None
+
+        records = []
+        for line in lines[1:]:
+            # недописанная при падении последняя строка отбрасывается
+            if not line.endswith('\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+        return records
+
+    @classmethod
+    def create(cls, path_to_project: pathlib.Path, records: Iterable[dict] = ()) -> 'ProjectJournal':
+        path_to_journal = cls.get_path(path_to_project)
+        count = 0
+        with open_atomic(path_to_journal) as handle:
+            handle.write(json.dumps({'version': cls.VERSION, 'base': cls.make_base(path_to_project)}))
+            handle.write('\n')
+            for record in records:
+                handle.write(json.dumps(record, ensure_ascii=False))
+                handle.write('\n')
+                count += 1
+        return ProjectJournal(path_to_journal, open(path_to_journal, mode='a', encoding='utf-8'), count)
+
+    @classmethod
+    def remove(cls, path_to_project: pathlib.Path):
+        cls.get_path(path_to_project).unlink(missing_ok=True)
+
+    def write(self, record: dict):
+        self.handle.write(json.dumps(record, ensure_ascii=False))
+        self.handle.write('\n')
+        self.records += 1
+
+    def flush(self, sync: bool = False):
+        self.handle.flush()
+        if sync or time.monotonic() - self.synced_at >= self.SYNC_INTERVAL:
+            os.fsync(self.handle.fileno())
+            self.synced_at = time.monotonic()
+
+    def close(self):
+        if not self.handle.closed:
+            self.flush(sync=True)
+            self.handle.close()
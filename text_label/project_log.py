@@ -0,0 +1,100 @@
+import json
+import os
+import pathlib
+from typing import Iterable, Iterator, Optional, TextIO
+
+from text_label.atomic_file import open_atomic
+from text_label.text_info import TextInfo
+
+
+class ProjectLog:
+    VERSION = 1
+    SUFFIX = '.jsonl.tl'
+    HEADER_MAX_LENGTH = 256
+
+    @classmethod
+    def is_log_path(cls, path_to_project: pathlib.Path) -> bool:
+        return str(path_to_project).endswith(cls.SUFFIX)
+
+    @staticmethod
+    def make_add_category_record(category_id: int, category: str) -> dict:
+        return {'op': 'add_category', 'category_id': category_id, 'category': category}
+
+    @staticmethod
+    def make_remove_category_record(category_id: int) -> dict:
+        return {'op': 'remove_category', 'category_id': category_id}
+
+    @staticmethod
+    def make_insert_text_record(text_id: int, text_info: TextInfo) -> dict:
+        return {'op': 'insert_text', 'text_id': text_id, 'text': text_info.text, 'category_id': text_info.category_id}
+
+    @staticmethod
+    def make_remove_text_record(text_id: int) -> dict:
+        return {'op': 'remove_text', 'text_id': text_id}
+
+    @staticmethod
+    def make_mark_text_record(text_id: int, category_id: Optional[int]) -> dict:
+        return {'op': 'mark_text', 'text_id': text_id, 'category_id': category_id}
+
+    @classmethod
+    def make_snapshot_records(cls, categories: dict[int, str], data: Iterable[TextInfo]) -> Iterator[dict]:
+        for category_id, category in categories.items():
+            yield cls.make_add_category_record(category_id, category)
+        for text_id, text_info in enumerate(data):
+            yield cls.make_insert_text_record(text_id, text_info)
+
+    @classmethod
+    def read_header(cls, handle: TextIO) -> Optional[dict]:
+        line = handle.readline(cls.HEADER_MAX_LENGTH)
+        if not line.endswith('\n'):
+            return None
+        try:
+            header = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(header, dict) and header.get('version') == cls.VERSION:
+            return header
+        return None
+
+    @staticmethod
+    def read_records(handle: TextIO) -> Iterator[dict]:
+        for line in handle:
+            # недописанная при падении последняя строка отбрасывается
+            if not line.endswith('\n'):
+                break
+            if line.strip():
+                yield json.loads(line)
+
+    @staticmethod
+    def is_complete(path_to_project: pathlib.Path) -> bool:
+        # дописывать можно только после целой строки, иначе лог перепишется целиком
+        try:
+            with open(path_to_project, mode='rb') as handle:
+                handle.seek(-1, os.SEEK_END)
+                return handle.read(1) == b'\n'
+        except OSError:
+            return False
+
+    @staticmethod
+    def _write_records(handle: TextIO, records: Iterable[dict]) -> int:
+        count = 0
+        for record in records:
+            handle.write(json.dumps(record, ensure_ascii=False))
+            handle.write('\n')
+            count += 1
+        return count
+
+    @classmethod
+    def write(cls, path_to_project: pathlib.Path, records: Iterable[dict]) -> int:
+        with open_atomic(path_to_project) as handle:
+            handle.write(json.dumps({'version': cls.VERSION}))
+            handle.write('\n')
+            return cls._write_records(handle, records)
+
+    @classmethod
+    def append(cls, path_to_project: pathlib.Path, records: Iterable[dict]) -> int:
+        with open(path_to_project, mode='a', encoding='utf-8') as handle:
+            count = cls._write_records(handle, records)
+            handle.flush()
+            os.fsync(handle.fileno())
+            return count
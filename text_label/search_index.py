@@ -0,0 +1,172 @@
+import array
+import bisect
+import heapq
+import re
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from text_label import gap_keys
+
+
+class SearchIndex:
+    TOKEN_RE = re.compile(r'\w+')
+    # более короткое последнее слово ищется целиком, иначе префикс из 1-2 букв разворачивается в пол-словаря
+    MIN_PREFIX_LENGTH = 3
+    # если кандидатов по целым словам меньше, префикс проверяется по самим текстам
+    MAX_SCANNED_CANDIDATES = 1000
+
+    def __init__(self, texts: Iterable[str] = ()):
+        # uid текстов - ключи gap_keys: postings не надо сдвигать при вставке и удалении, а позиция uid находится бисекцией
+        self.uids = array.array('q')
+        self.postings: dict[str, list[int]] = {}
+        # отсортированный словарь для префиксных запросов: строится при первом запросе, дальше поддерживается вставками
+        self.sorted_tokens: Optional[list[str]] = None
+
+        for text_id, text in enumerate(texts):
+            uid = gap_keys.get_initial_key(text_id)
+            self.uids.append(uid)
+            for token in set(self.tokenize(text)):
+                postings = self.postings.get(token)
+                if postings is None:
+                    self.postings[token] = [uid]
+                else:
+                    postings.append(uid)
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    @classmethod
+    def tokenize(cls, text: str) -> list[str]:
+        return cls.TOKEN_RE.findall(text.lower())
+
+    def _renumber_uids(self):
+        new_uids = gap_keys.make_initial_keys(len(self.uids))
+        uid_map = dict(zip(self.uids, new_uids))
+        self.uids = new_uids
+        for token, postings in self.postings.items():
+            self.postings[token] = [uid_map[uid] for uid in postings]
+
+    def _make_uid(self, text_id: int) -> int:
+        uid = gap_keys.make_key(self.uids, text_id)
+        if uid is None:
+            self._renumber_uids()
+            uid = gap_keys.make_key(self.uids, text_id)
+        return uid
+
+    def insert(self, text_id: int, text: str):
+        uid = self._make_uid(text_id)
+        self.uids.insert(text_id, uid)
+
+        for token in set(self.tokenize(text)):
+            postings = self.postings.get(token)
+            if postings is None:
+                self.postings[token] = [uid]
+                if self.sorted_tokens is not None:
+                    bisect.insort(self.sorted_tokens, token)
+            elif postings[-1] < uid:
+                postings.append(uid)
+            else:
+                bisect.insort(postings, uid)
+
+    def remove(self, text_id: int, text: str):
+        uid = self.uids.pop(text_id)
+        for token in set(self.tokenize(text)):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            idx = bisect.bisect_left(postings, uid)
+            if idx < len(postings) and postings[idx] == uid:
+                postings.pop(idx)
+            if len(postings) == 0:
+                del self.postings[token]
+                if self.sorted_tokens is not None:
+                    self.sorted_tokens.pop(bisect.bisect_left(self.sorted_tokens, token))
+
+    def _get_prefix_postings(self, prefix: str) -> list[list[int]]:
+        if self.sorted_tokens is None:
+            self.sorted_tokens = sorted(self.postings)
+        idx = bisect.bisect_left(self.sorted_tokens, prefix)
+        end = idx
+        while end < len(self.sorted_tokens) and self.sorted_tokens[end].startswith(prefix):
+            end += 1
+        return [self.postings[token] for token in self.sorted_tokens[idx:end]]
+
+    @staticmethod
+    def _iter_union(postings: list[list[int]]) -> Iterator[int]:
+        prev_uid = None
+        for uid in heapq.merge(*postings):
+            if uid != prev_uid:
+                yield uid
+                prev_uid = uid
+
+    @staticmethod
+    def _contains_from(postings: Sequence[int], uid: int, cursors: list[int], idx: int) -> bool:
+        # кандидаты идут по возрастанию, поэтому бисекция в каждом списке продолжается с прошлого места
+        cursor = bisect.bisect_left(postings, uid, cursors[idx])
+        cursors[idx] = cursor
+        return cursor < len(postings) and postings[cursor] == uid
+
+    def search(self, query: str, text_ids: Optional[Sequence[int]] = None,
+               get_text: Optional[Callable[[int], str]] = None, limit: Optional[int] = None) -> list[int]:
+        # text_ids - отсортированные позиции, которыми ограничен поиск (например, тексты одной категории),
+        # limit - сколько первых по порядку совпадений вернуть
+        tokens = self.tokenize(query)
+        if len(tokens) == 0:
+            return list((text_ids if text_ids is not None else range(len(self.uids)))[:limit])
+
+        # последнее слово, которое ещё набирается, ищем по префиксу
+        prefix = None
+        prefix_postings: list[list[int]] = []
+        if not query[-1].isspace() and len(tokens[-1]) >= self.MIN_PREFIX_LENGTH:
+            prefix = tokens.pop()
+            prefix_postings = sorted(self._get_prefix_postings(prefix), key=len, reverse=True)
+            if len(prefix_postings) == 0:
+                return []
+
+        postings = sorted((self.postings.get(token, []) for token in set(tokens)), key=len)
+        if len(postings) > 0 and len(postings[0]) == 0:
+            return []
+
+        # кандидаты берутся из самого короткого списка, остальные списки только проверяются;
+        # префикс разворачивается в кандидаты, только если его списки вместе короче самого короткого списка слов
+        if prefix is not None and (len(postings) == 0 or sum(map(len, prefix_postings)) <= len(postings[0])):
+            candidates = prefix_postings[0] if len(prefix_postings) == 1 else self._iter_union(prefix_postings)
+            prefix = None
+            prefix_postings = []
+        else:
+            candidates = postings.pop(0)
+            if prefix is not None and get_text is not None and len(candidates) <= self.MAX_SCANNED_CANDIDATES:
+                # кандидатов мало: префикс дешевле проверить по самим текстам, чем по спискам всех подходящих слов
+                prefix_postings = []
+            elif prefix is not None:
+                prefix = None
+
+        cursors = [0] * len(postings)
+        prefix_cursors = [0] * len(prefix_postings)
+        uid_cursor = 0
+        text_ids_cursor = 0
+        result = []
+        for uid in candidates:
+            if postings and not all(self._contains_from(other, uid, cursors, idx) for idx, other in enumerate(postings)):
+                continue
+            if prefix_postings and not any(self._contains_from(other, uid, prefix_cursors, idx)
+                                                    for idx, other in enumerate(prefix_postings)):
+                continue
+            # uid возрастают вместе с позицией: позиция ищется от предыдущей, у идущих подряд текстов - без бисекции
+            if uid_cursor < len(self.uids) and self.uids[uid_cursor] == uid:
+                text_id = uid_cursor
+            else:
+                text_id = bisect.bisect_left(self.uids, uid, uid_cursor)
+            uid_cursor = text_id + 1
+            if text_ids is not None:
+                if text_ids_cursor < len(text_ids) and text_ids[text_ids_cursor] < text_id:
+                    text_ids_cursor = bisect.bisect_left(text_ids, text_id, text_ids_cursor + 1)
+                if text_ids_cursor == len(text_ids):
+                    break
+                if text_ids[text_ids_cursor] != text_id:
+                    continue
+            if prefix is not None and not any(token.startswith(prefix) for token in self.tokenize(get_text(text_id))):
+                continue
+            result.append(text_id)
+            if len(result) == limit:
+                break
+        return result
@@ -0,0 +1,248 @@
+import array
+import bisect
+import pathlib
+import sqlite3
+import threading
+from collections.abc import Sequence
+from typing import Iterable, Iterator, Optional
+
+from text_label import gap_keys
+from text_label.atomic_file import make_tmp_path, replace_file
+from text_label.history import History
+from text_label.project import Project
+from text_label.project_log import ProjectLog
+from text_label.text_info import TextInfo
+
+
+class SqliteTexts(Sequence):
+    FETCH_SIZE = 1000
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.RLock):
+        self.connection = connection
+        self.lock = lock
+        # позиции текстов по возрастанию, сами тексты остаются на диске
+        with self.lock:
+            self.positions = array.array('q', (row[0] for row in self.connection.execute('SELECT position FROM texts ORDER BY position')))
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        with self.lock:
+            row = self.connection.execute('SELECT text, category_id FROM texts WHERE position = ?', (self.positions[idx],)).fetchone()
+        return TextInfo(text=row[0], category_id=row[1])
+
+    def __iter__(self) -> Iterator[TextInfo]:
+        with self.lock:
+            cursor = self.connection.execute('SELECT text, category_id FROM texts ORDER BY position')
+            rows = cursor.fetchmany(self.FETCH_SIZE)
+        while rows:
+            for row in rows:
+                yield TextInfo(text=row[0], category_id=row[1])
+            with self.lock:
+                rows = cursor.fetchmany(self.FETCH_SIZE)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def get_text_id(self, position: int) -> int:
+        return bisect.bisect_left(self.positions, position)
+
+    def get_positions_of_category(self, category_id: Optional[int]) -> list[int]:
+        with self.lock:
+            rows = self.connection.execute('SELECT position FROM texts WHERE category_id IS ? ORDER BY position',
+                                           (category_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def get_by_category(self, category_id: int) -> list[TextInfo]:
+        with self.lock:
+            rows = self.connection.execute('SELECT text, category_id FROM texts WHERE category_id = ? ORDER BY position',
+                                           (category_id,)).fetchall()
+        return [TextInfo(text=row[0], category_id=row[1]) for row in rows]
+
+    def count_by_category(self, category_id: Optional[int]) -> int:
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM texts WHERE category_id IS ?', (category_id,)).fetchone()[0]
+
+
+class SqliteProject(Project):
+    SUFFIX = '.sqlite.tl'
+    SQLITE_MAGIC = b'SQLite format 3\x00'
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path_to_database: pathlib.Path, history_depth: Optional[int] = History.DEFAULT_MAX_DEPTH):
+        super().__init__(history_depth=history_depth)
+        self.path_to_database = pathlib.Path(path_to_database)
+        self.lock = threading.RLock()
+        self.connection = self._connect(self.path_to_database)
+
+        self.categories = {row[0]: row[1] for row in self.connection.execute('SELECT id, name FROM categories ORDER BY id')}
+        self.data: SqliteTexts = SqliteTexts(self.connection, self.lock)
+
+        self.path_to_project = self.path_to_database
+        # изменения сразу попадают в базу, копить их записи для лога или журнала незачем
+        self.recording_changes = False
+
+    @classmethod
+    def _connect(cls, path_to_database: pathlib.Path) -> sqlite3.Connection:
+        # GUI читает тексты из потока Tk, а изменения приходят из потока statechart
+        connection = sqlite3.connect(path_to_database, check_same_thread=False)
+        connection.execute('CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL)')
+        connection.execute('CREATE TABLE IF NOT EXISTS texts (id INTEGER PRIMARY KEY, position INTEGER NOT NULL, '
+                           'text TEXT NOT NULL, category_id INTEGER)')
+        connection.execute('CREATE INDEX IF NOT EXISTS texts_category_id ON texts (category_id)')
+        connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS texts_position ON texts (position)')
+        connection.execute(f'PRAGMA user_version = {cls.SCHEMA_VERSION}')
+        connection.commit()
+        return connection
+
+    @classmethod
+    def is_database_path(cls, path_to_project: pathlib.Path) -> bool:
+        return str(path_to_project).endswith(cls.SUFFIX)
+
+    @classmethod
+    def is_database_file(cls, path_to_project: pathlib.Path) -> bool:
+        with open(path_to_project, mode='rb') as project_handle:
+            return project_handle.read(len(cls.SQLITE_MAGIC)) == cls.SQLITE_MAGIC
+
+    @classmethod
+    def write_database(cls, path_to_database: pathlib.Path, categories: dict[int, str], data: Iterable[TextInfo]):
+        # база собирается во временном файле и подменяет старую целиком
+        path_to_tmp = make_tmp_path(path_to_database)
+        path_to_tmp.unlink(missing_ok=True)
+        connection = cls._connect(path_to_tmp)
+        try:
+            connection.executemany('INSERT INTO categories (id, name) VALUES (?, ?)', categories.items())
+            connection.executemany('INSERT INTO texts (position, text, category_id) VALUES (?, ?, ?)',
+                                   ((gap_keys.get_initial_key(text_id), text_info.text, text_info.category_id)
+                                    for text_id, text_info in enumerate(data)))
+            connection.commit()
+        except BaseException:
+            connection.close()
+            path_to_tmp.unlink(missing_ok=True)
+            raise
+        connection.close()
+        replace_file(path_to_tmp, path_to_database)
+
+    def _write_project(self, path_to_project: pathlib.Path):
+        path_to_project = pathlib.Path(path_to_project)
+        with self.lock:
+            self.connection.commit()
+            if not self.is_database_path(path_to_project):
+                # другой формат - только копия, проектом остаётся база
+                super()._write_project(path_to_project)
+            elif path_to_project.resolve() != self.path_to_database.resolve():
+                self._copy_database(path_to_project)
+        self.path_to_project = self.path_to_database
+        self.unsaved_changes = []
+
+    def _copy_database(self, path_to_database: pathlib.Path):
+        # "сохранить как" в базу: копия через backup, и дальнейшие изменения идут уже в неё
+        path_to_tmp = make_tmp_path(path_to_database)
+        path_to_tmp.unlink(missing_ok=True)
+        target = sqlite3.connect(path_to_tmp)
+        try:
+            self.connection.backup(target)
+        finally:
+            target.close()
+        replace_file(path_to_tmp, path_to_database)
+
+        self.connection.close()
+        self.connection = self._connect(path_to_database)
+        self.data.connection = self.connection
+        self.path_to_database = path_to_database
+
+    def enable_journal(self):
+        # у sqlite свой журнал транзакций
+        pass
+
+    def autosave(self) -> bool:
+        with self.lock:
+            self.connection.commit()
+        return False
+
+    def close(self):
+        super().close()
+        with self.lock:
+            self.connection.close()
+
+    def _make_position(self, text_id: int) -> int:
+        position = gap_keys.make_key(self.data.positions, text_id)
+        if position is None:
+            self._renumber_positions()
+            position = gap_keys.make_key(self.data.positions, text_id)
+        return position
+
+    def _renumber_positions(self):
+        positions = self.data.positions
+        new_positions = gap_keys.make_initial_keys(len(positions))
+        with self.lock:
+            # сначала уводим позиции в отрицательные, чтобы не нарушить уникальность при перенумерации
+            self.connection.execute('UPDATE texts SET position = -position')
+            self.connection.executemany('UPDATE texts SET position = ? WHERE position = ?',
+                                        ((new_position, -position) for new_position, position in zip(new_positions, positions)))
+            self.data.positions = new_positions
+
+    def _put_category(self, category_id: int, category: str):
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO categories (id, name) VALUES (?, ?)', (category_id, category))
+        super()._put_category(category_id, category)
+
+    def _pop_category(self, category_id: int) -> str:
+        with self.lock:
+            self.connection.execute('DELETE FROM categories WHERE id = ?', (category_id,))
+        return super()._pop_category(category_id)
+
+    def _insert_text(self, text_id: int, text_info: TextInfo):
+        position = self._make_position(text_id)
+        with self.lock:
+            self.connection.execute('INSERT INTO texts (position, text, category_id) VALUES (?, ?, ?)',
+                                    (position, text_info.text, text_info.category_id))
+            self.data.positions.insert(text_id, position)
+        self._index_text(text_id, text_info)
+        self._record_change(ProjectLog.make_insert_text_record, text_id, text_info)
+
+    def _pop_text(self, text_id: int) -> TextInfo:
+        text_info = self.data[text_id]
+        with self.lock:
+            self.connection.execute('DELETE FROM texts WHERE position = ?', (self.data.positions[text_id],))
+            self.data.positions.pop(text_id)
+        self._unindex_text(text_id, text_info)
+        self._record_change(ProjectLog.make_remove_text_record, text_id)
+        return text_info
+
+    def _set_text_category(self, text_id: int, category_id: Optional[int]):
+        if self.digest is not None:
+            text_info = self.data[text_id]
+            self.digest.remove_text(text_info)
+            self.digest.add_text(TextInfo(text=text_info.text, category_id=category_id))
+        with self.lock:
+            self.connection.execute('UPDATE texts SET category_id = ? WHERE position = ?', (category_id, self.data.positions[text_id]))
+        self._record_change(ProjectLog.make_mark_text_record, text_id, category_id)
+
+    def _set_texts_category(self, text_ids: list[int], category_ids: list[Optional[int]]):
+        if self.digest is not None:
+            for text_id, category_id in zip(text_ids, category_ids):
+                text_info = self.data[text_id]
+                self.digest.remove_text(text_info)
+                self.digest.add_text(TextInfo(text=text_info.text, category_id=category_id))
+        with self.lock:
+            self.connection.executemany('UPDATE texts SET category_id = ? WHERE position = ?',
+                                        ((category_id, self.data.positions[text_id]) for text_id, category_id in zip(text_ids, category_ids)))
+        for text_id, category_id in zip(text_ids, category_ids):
+            self._record_change(ProjectLog.make_mark_text_record, text_id, category_id)
+
+    def get_texts(self, category_id: Optional[int] = None) -> Sequence[TextInfo]:
+        if category_id is not None:
+            return self.data.get_by_category(category_id)
+        return self.data
+
+    def get_text_ids_of_category(self, category_id: Optional[int]) -> list[int]:
+        return [self.data.get_text_id(position) for position in self.data.get_positions_of_category(category_id)]
+
+    def count_texts_of_category(self, category_id: Optional[int]) -> int:
+        return self.data.count_by_category(category_id)
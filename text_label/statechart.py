@@ -1,24 +1,51 @@
 import pathlib
+import threading
+from typing import Optional, Union
 
 from miros import ActiveObject
 from miros import return_status, signals, Event
 from miros import spy_on
 
 from text_label.project import Project
+from text_label.importers.importer import Importer, ImportBatch, ImportSummary
 
 
 class Statechart(ActiveObject):
+    # сколько пачек импорта может одновременно ждать в очереди событий
+    MAX_PENDING_IMPORT_BATCHES = 4
+    # поиск похожих текстов ~40 мкс на текст при импорте и ~45 с на построение индекса для миллиона текстов
+    FLAG_NEAR_DUPLICATES = False
+    # журнал дописывается при каждом изменении, а раз в AUTOSAVE_INTERVAL секунд сбрасывается на диск и при необходимости сворачивается в файл проекта
+    AUTOSAVE_INTERVAL = 30.0
+    # индекс дубликатов строится после открытия проекта по столько текстов за событие, чтобы не задерживать правки
+    DUPLICATE_INDEX_STEP = 50_000
+    # в список уходят только первые совпадения: поиск и перерисовка не растут вместе с проектом
+    MAX_SEARCH_RESULTS = 10_000
+
     def __init__(self, name: str, bus):
         super().__init__(name)
         self.bus = bus
         self.bus.register('statechart', self)
         self.project: Project = None
+        self.importer: Importer = None
+        self.pending_import_batches = threading.BoundedSemaphore(self.MAX_PENDING_IMPORT_BATCHES)
+        self.import_duplicates = 0
+        self.import_near_duplicates = 0
 
     def run(self):
         self.start_at(init)
+        self.post_fifo(Event(signal=signals.AUTOSAVE), period=self.AUTOSAVE_INTERVAL, deferred=True)
+
+    def _open_project(self, project: Project):
+        if self.project is not None:
+            self.project.close()
+        self.project = project
+        if self.bus.metrics is not None and self.bus.metrics.enabled:
+            self.bus.metrics.instrument_project(self.project)
+        self.on_build_duplicate_index_in_in_project(project)
 
     def on_new_project_in_init(self):
-        self.project = Project()
+        self._open_project(Project())
 
         self.bus.gui.enable_menus()
         self.bus.gui.init_bindings()
@@ -27,7 +54,8 @@ class Statechart(ActiveObject):
         self.bus.gui.update_texts(self.project.get_texts())
 
     def on_load_project_in_init(self, path_to_project: pathlib.Path):
-        self.project = Project.load_project_from_path(path_to_project)
+        self._open_project(Project.load_project_from_path(path_to_project))
+        self.project.enable_journal()
 
         self.bus.gui.enable_menus()
         self.bus.gui.init_bindings()
@@ -45,27 +73,131 @@ class Statechart(ActiveObject):
 
         self.bus.gui.update_categories(self.project.categories)
 
-    def on_import_text_from_input_in_in_project(self, text: str):
-        self.project.add_text(text)
+    def on_build_duplicate_index_in_in_project(self, project: Project):
+        # событие могло остаться от проекта, который уже закрыли
+        if project is self.project and not project.build_duplicate_index(self.DUPLICATE_INDEX_STEP):
+            self.post_fifo(Event(signal=signals.BUILD_DUPLICATE_INDEX, payload=project))
 
-        self.bus.gui.update_texts(self.project.get_texts())
+    def _add_text_unless_duplicate(self, text: str):
+        # повторно тот же текст не добавляем, а показываем уже существующий
+        text_ids = self.project.find_text_ids(text)
+        if len(text_ids) > 0:
+            self.bus.gui.show_duplicate_text(text_ids[0])
+        else:
+            text_id = self.project.add_text(text)
+            self.bus.gui.insert_text(self.project.get_texts(), text_id)
+
+    def on_import_text_from_input_in_in_project(self, text: str):
+        self._add_text_unless_duplicate(text)
 
     def on_import_text_from_file_in_in_project(self, path_to_file: pathlib.Path):
         with open(path_to_file, mode='r', encoding='utf-8') as text_handle:
-            self.project.add_text(text_handle.read())
-
-            self.bus.gui.update_texts(self.project.get_texts())
+            self._add_text_unless_duplicate(text_handle.read())
+
+    def _start_import(self, importer: Importer, source):
+        def on_batch(batch: ImportBatch):
+            # не даём потоку импорта переполнить очередь событий, пока statechart занят
+            self.pending_import_batches.acquire()
+            self.post_fifo(Event(signal=signals.IMPORT_BATCH, payload=batch))
+
+        def on_done(summary: ImportSummary):
+            self.post_fifo(Event(signal=signals.IMPORT_DONE, payload=summary))
+
+        self.importer = importer
+        self.import_duplicates = 0
+        self.import_near_duplicates = 0
+        self.importer.run_in_background(source, on_batch=on_batch, on_done=on_done)
+
+    def on_import_directory_in_in_project(self, path_or_glob: Union[str, pathlib.Path]):
+        from text_label.importers.directory import DirectoryImporter
+        self._start_import(DirectoryImporter(), path_or_glob)
+
+    def on_import_corpus_in_in_project(self, path_to_file: pathlib.Path):
+        from text_label.importers.corpus import CorpusImporter
+        self._start_import(CorpusImporter(), path_to_file)
+
+    def _filter_duplicates(self, batch: ImportBatch) -> tuple[list[str], Optional[list[Optional[str]]]]:
+        # точные копии уже существующих текстов пропускаем, похожие только считаем
+        duplicate_index = self.project.get_duplicate_index(near_duplicates=self.FLAG_NEAR_DUPLICATES)
+        texts, categories, batch_texts = [], [] if batch.categories is not None else None, set()
+        for idx, text in enumerate(batch.texts):
+            if text in batch_texts or duplicate_index.is_duplicate(text):
+                self.import_duplicates += 1
+                continue
+            if duplicate_index.is_near_duplicate(text):
+                self.import_near_duplicates += 1
+            batch_texts.add(text)
+            texts.append(text)
+            if categories is not None:
+                categories.append(batch.categories[idx])
+        return texts, categories
+
+    def on_import_batch_in_importing(self, batch: ImportBatch):
+        try:
+            texts, categories = self._filter_duplicates(batch)
+            if len(texts) > 0:
+                categories_count = len(self.project.categories)
+                self.project.add_texts(texts, categories)
+                if len(self.project.categories) != categories_count:
+                    self.bus.gui.update_categories(self.project.categories)
+                self.bus.gui.update_texts(self.project.get_texts())
+            self.bus.gui.show_import_progress(batch.done, batch.total)
+        finally:
+            self.pending_import_batches.release()
+
+    def on_import_done_in_importing(self, summary: ImportSummary):
+        self.importer = None
+        summary.texts -= self.import_duplicates
+        summary.duplicates += self.import_duplicates
+        summary.near_duplicates += self.import_near_duplicates
+        self.bus.gui.show_import_summary(summary)
+
+    def on_cancel_import_in_importing(self):
+        self.importer.cancel()
 
     def on_mark_text_in_in_project(self, text_id: int, category_id: int):
         self.project.mark_text(text_id=text_id, category_id=category_id)
 
+        self.bus.gui.update_text(self.project.get_texts(), text_id)
+
+    def on_mark_texts_in_in_project(self, text_ids: list[int], category_id: Optional[int]):
+        if len(self.project.mark_texts(text_ids, category_id)) > 0:
+            self.bus.gui.update_texts(self.project.get_texts())
+
     def on_remove_text_in_in_project(self, text_id: int):
         self.project.remove_text(text_id=text_id)
 
-        self.bus.gui.update_texts(self.project.get_texts())
+        self.bus.gui.remove_text(self.project.get_texts(), text_id)
 
     def on_save_project_in_in_project(self, path_to_project: pathlib.Path):
+        from text_label.sqlite_project import SqliteProject
+        from text_label.project_journal import ProjectJournal
         self.project.save_project(path_to_project)
+        if SqliteProject.is_database_path(path_to_project) and not isinstance(self.project, SqliteProject):
+            # после "сохранить как" в базу правки идут прямо в неё, журнал рядом с базой не нужен
+            self._open_project(SqliteProject(path_to_project))
+            ProjectJournal.remove(path_to_project)
+
+            self.bus.gui.update_categories(self.project.categories)
+            self.bus.gui.update_texts(self.project.get_texts())
+        else:
+            self.project.enable_journal()
+
+    def on_autosave_in_in_project(self):
+        self.project.autosave()
+
+    def on_search_in_in_project(self, query: str, only_unlabelled: bool):
+        # поиск идёт здесь, а не в потоке Tk: проект и поисковый индекс меняются только в этом потоке
+        if query.strip() != '':
+            text_ids = self.project.search_texts(query, only_unlabelled=only_unlabelled, limit=self.MAX_SEARCH_RESULTS)
+        else:
+            text_ids = self.project.get_text_ids_of_category(None)
+        self.bus.gui.show_search_results(query, only_unlabelled, text_ids)
+
+    def on_show_export_options_in_in_project(self, exporter_name: str):
+        # дайджест строится и обновляется только здесь, вместе с правками; экспортёр получает готовое имя
+        # и снимок проекта на тот же момент: экспорт идёт в своём потоке, а правки продолжаются здесь
+        self.bus.gui.show_export_options(exporter_name, self.project.get_name(), self.project.make_snapshot())
 
     def launch_new_project_event(self):
         self.post_fifo(Event(signal=signals.NEW_PROJECT))
@@ -85,21 +217,51 @@ class Statechart(ActiveObject):
     def launch_import_text_from_file_event(self, path_to_file: pathlib.Path):
         self.post_fifo(Event(signal=signals.IMPORT_TEXT_FROM_FILE, payload=path_to_file))
 
+    def launch_import_directory_event(self, path_or_glob: Union[str, pathlib.Path]):
+        self.post_fifo(Event(signal=signals.IMPORT_DIRECTORY, payload=path_or_glob))
+
+    def launch_import_corpus_event(self, path_to_file: pathlib.Path):
+        self.post_fifo(Event(signal=signals.IMPORT_CORPUS, payload=path_to_file))
+
+    def launch_cancel_import_event(self):
+        self.post_fifo(Event(signal=signals.CANCEL_IMPORT))
+
     def launch_remove_text_event(self, text_id: int):
         self.post_fifo(Event(signal=signals.REMOVE_TEXT, payload=text_id))
 
     def launch_mark_text_event(self, text_id: int, category_id):
         self.post_fifo(Event(signal=signals.MARK_TEXT, payload=(text_id, category_id)))
 
+    def launch_mark_texts_event(self, text_ids: list[int], category_id: Optional[int]):
+        self.post_fifo(Event(signal=signals.MARK_TEXTS, payload=(text_ids, category_id)))
+
     def launch_save_project_event(self, path_to_project: pathlib.Path):
         self.post_fifo(Event(signal=signals.SAVE_PROJECT, payload=path_to_project))
 
+    def launch_search_event(self, query: str, only_unlabelled: bool):
+        self.post_fifo(Event(signal=signals.SEARCH, payload=(query, only_unlabelled)))
+
+    def launch_show_export_options_event(self, exporter_name: str):
+        self.post_fifo(Event(signal=signals.SHOW_EXPORT_OPTIONS, payload=exporter_name))
+
     def launch_undo_event(self):
         self.post_fifo(Event(signal=signals.UNDO))
 
+    def launch_redo_event(self):
+        self.post_fifo(Event(signal=signals.REDO))
+
     def on_undo_project_in_in_project(self):
         self.project.undo()
 
+        self.bus.gui.update_categories(self.project.categories)
+        self.bus.gui.update_texts(self.project.get_texts())
+
+    def on_redo_project_in_in_project(self):
+        self.project.redo()
+
+        self.bus.gui.update_categories(self.project.categories)
+        self.bus.gui.update_texts(self.project.get_texts())
+
 
 @spy_on
 def init(s: Statechart, e: Event) -> return_status:
@@ -138,20 +300,79 @@ def in_project(s: Statechart, e: Event) -> return_status:
     elif e.signal == signals.IMPORT_TEXT_FROM_FILE:
         status = return_status.HANDLED
         s.on_import_text_from_file_in_in_project(e.payload)
+    elif e.signal == signals.IMPORT_DIRECTORY:
+        status = s.trans(importing)
+        s.on_import_directory_in_in_project(e.payload)
+    elif e.signal == signals.IMPORT_CORPUS:
+        status = s.trans(importing)
+        s.on_import_corpus_in_in_project(e.payload)
     elif e.signal == signals.MARK_TEXT:
         status = return_status.HANDLED
         s.on_mark_text_in_in_project(text_id=e.payload[0], category_id=e.payload[1])
+    elif e.signal == signals.MARK_TEXTS:
+        status = return_status.HANDLED
+        s.on_mark_texts_in_in_project(text_ids=e.payload[0], category_id=e.payload[1])
     elif e.signal == signals.REMOVE_TEXT:
         status = return_status.HANDLED
         s.on_remove_text_in_in_project(text_id=e.payload)
     elif e.signal == signals.SAVE_PROJECT:
         status = return_status.HANDLED
         s.on_save_project_in_in_project(e.payload)
+    elif e.signal == signals.AUTOSAVE:
+        status = return_status.HANDLED
+        s.on_autosave_in_in_project()
+    elif e.signal == signals.BUILD_DUPLICATE_INDEX:
+        status = return_status.HANDLED
+        s.on_build_duplicate_index_in_in_project(e.payload)
+    elif e.signal == signals.SEARCH:
+        status = return_status.HANDLED
+        s.on_search_in_in_project(query=e.payload[0], only_unlabelled=e.payload[1])
+    elif e.signal == signals.SHOW_EXPORT_OPTIONS:
+        status = return_status.HANDLED
+        s.on_show_export_options_in_in_project(e.payload)
     elif e.signal == signals.UNDO:
         status = return_status.HANDLED
         s.on_undo_project_in_in_project()
+    elif e.signal == signals.REDO:
+        status = return_status.HANDLED
+        s.on_redo_project_in_in_project()
     else:
         status = return_status.SUPER
         s.temp.fun = init
 
     return status
+
+
+
+@spy_on
+def importing(s: Statechart, e: Event) -> return_status:
+    status = return_status.UNHANDLED
+
+    if e.signal == signals.INIT_SIGNAL:
+        status = return_status.HANDLED
+    elif e.signal == signals.EXIT_SIGNAL:
+        status = return_status.HANDLED
+        # всё, что пришло во время импорта, выполняется после него в исходном порядке
+        while s.recall() is not None:
+            pass
+    elif e.signal == signals.IMPORT_BATCH:
+        status = return_status.HANDLED
+        s.on_import_batch_in_importing(e.payload)
+    elif e.signal == signals.IMPORT_DONE:
+        status = s.trans(in_project)
+        s.on_import_done_in_importing(e.payload)
+    elif e.signal == signals.CANCEL_IMPORT:
+        status = return_status.HANDLED
+        s.on_cancel_import_in_importing()
+    elif e.signal in (signals.NEW_PROJECT, signals.LOAD_PROJECT,
+                      signals.ADD_CATEGORY, signals.REMOVE_CATEGORY,
+                      signals.IMPORT_TEXT_FROM_INPUT, signals.IMPORT_TEXT_FROM_FILE, signals.IMPORT_DIRECTORY, signals.IMPORT_CORPUS,
+                      signals.MARK_TEXT, signals.MARK_TEXTS, signals.REMOVE_TEXT,
+                      signals.SAVE_PROJECT, signals.UNDO, signals.REDO):
+        status = return_status.HANDLED
+        s.defer(e)
+    else:
+        status = return_status.SUPER
+        s.temp.fun = in_project
+
+    return status